@@ -1,2 +1,3 @@
 """AI Agents module."""
-from .assistant import CommunityAssistant
+from .assistant import CommunityAssistant, community_assistant
+from .conversation_store import ConversationStore, conversation_store
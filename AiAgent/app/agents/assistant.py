@@ -1,36 +1,82 @@
 """Community Assistant - AI-powered chat assistant."""
+import asyncio
+import contextlib
+import re
+import threading
 import uuid
-from transformers import pipeline
+from typing import AsyncIterator
+from transformers import pipeline, StoppingCriteria, StoppingCriteriaList, TextStreamer
+from app.agents.conversation_store import ConversationStore, conversation_store
 from app.core.config import settings
+from app.core.inference import inference_executor
+from app.core.intents import IntentIndex
+from app.core.model_registry import model_registry
+
+
+class _QueueStreamer(TextStreamer):
+    """Hand decoded text from the generation thread to an asyncio queue."""
+    
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.loop = loop
+        self.queue = queue
+    
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (text, stream_end))
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Stop generation once the client has gone away."""
+    
+    def __init__(self, event: threading.Event):
+        self.event = event
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
 
 
 class CommunityAssistant:
     """AI assistant for community interactions."""
     
-    def __init__(self):
-        self.conversations: dict[str, list] = {}
+    INTENTS = {
+        "car": ["car", "vehicle", "auto"],
+        "maintenance": ["maintenance"],
+        "problem": ["problem", "issue"],
+        "buy": ["buy", "purchase"],
+        "help": ["help"],
+        "profile": ["profile", "account"],
+        "password": ["password"],
+        "marketplace": ["marketplace"],
+        "event": ["event"],
+    }
+    
+    def __init__(self, store: ConversationStore | None = None):
+        self.store = store or conversation_store
         self.generator = None
+        self._intents = IntentIndex()
+        self._intents.add_all(self.INTENTS)
     
     def _load_model(self):
         if self.generator is None and settings.huggingface_token:
-            try:
-                self.generator = pipeline(
+            self.generator = model_registry.get(
+                settings.chat_model,
+                lambda: pipeline(
                     "text-generation",
-                    model="microsoft/DialoGPT-small",
+                    model=settings.chat_model,
                     token=settings.huggingface_token
                 )
-            except Exception:
-                pass
+            )
     
     async def chat(self, message: str, conversation_id: str | None, user_id: str | None) -> dict:
-        conv_id = conversation_id or str(uuid.uuid4())
+        conv_id = conversation_id
+        if conv_id is None:
+            conv_id = str(uuid.uuid4())
+            self.store.start(conv_id, user_id)
         
-        if conv_id not in self.conversations:
-            self.conversations[conv_id] = []
-        
-        self.conversations[conv_id].append({"role": "user", "content": message})
+        await self.store.append(conv_id, "user", message, user_id)
         response = self._generate_response(message)
-        self.conversations[conv_id].append({"role": "assistant", "content": response})
+        await self.store.append(conv_id, "assistant", response, user_id)
         
         return {
             "response": response,
@@ -38,36 +84,134 @@ class CommunityAssistant:
             "suggestions": self._get_suggestions(message)
         }
     
+    async def stream_chat(
+        self,
+        message: str,
+        conversation_id: str | None,
+        user_id: str | None
+    ) -> AsyncIterator[dict]:
+        """
+        Chat, yielding the reply as it is generated.
+        
+        Yields a `start` event with the conversation id, `token` events with
+        text deltas and an `end` event with suggestions. Generation runs on
+        the inference executor; closing the iterator (e.g. when the client
+        disconnects) stops it at the next token. A partial reply is saved
+        with `cancelled` set in its extra data.
+        """
+        conv_id = conversation_id
+        if conv_id is None:
+            conv_id = str(uuid.uuid4())
+            self.store.start(conv_id, user_id)
+        
+        history = await self.store.get_history(conv_id)
+        await self.store.append(conv_id, "user", message, user_id)
+        yield {"type": "start", "conversation_id": conv_id}
+        
+        await asyncio.to_thread(self._load_model)
+        parts: list[str] = []
+        completed = False
+        try:
+            if self.generator is not None:
+                tokens = self._stream_model(history, message)
+            else:
+                tokens = self._stream_text(self._generate_response(message))
+            # Close the token stream as soon as this generator stops, which stops generation
+            async with contextlib.aclosing(tokens):
+                async for text in tokens:
+                    parts.append(text)
+                    yield {"type": "token", "text": text}
+            completed = True
+        finally:
+            response = "".join(parts).strip()
+            if response or not completed:
+                await self.store.append(
+                    conv_id, "assistant", response, user_id,
+                    extra_data=None if completed else {"cancelled": True}
+                )
+        
+        yield {"type": "end", "conversation_id": conv_id, "suggestions": self._get_suggestions(message)}
+    
+    async def _stream_text(self, text: str) -> AsyncIterator[str]:
+        """Stream a prepared reply word by word."""
+        for word in re.findall(r"\S+\s*", text):
+            yield word
+    
+    async def _stream_model(self, history: list[dict], message: str) -> AsyncIterator[str]:
+        """Generate a reply with the chat model, yielding text as it is decoded."""
+        tokenizer = self.generator.tokenizer
+        turns = [turn["content"] for turn in history] + [message]
+        prompt = "".join(turn + tokenizer.eos_token for turn in turns)
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        streamer = _QueueStreamer(tokenizer, asyncio.get_running_loop(), queue)
+        generation = asyncio.ensure_future(inference_executor.run(
+            "chat", self._generate_sync, prompt, streamer, stop
+        ))
+        # Nobody awaits an abandoned generation; retrieve its outcome so it is not reported
+        generation.add_done_callback(lambda f: f.cancelled() or f.exception())
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, generation}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    # Generation ended without a final chunk (e.g. it failed)
+                    await generation
+                    return
+                text, stream_end = getter.result()
+                if text:
+                    yield text
+                if stream_end:
+                    break
+            await generation
+        finally:
+            stop.set()
+            if getter is not None:
+                getter.cancel()
+    
+    def _generate_sync(self, prompt: str, streamer: TextStreamer, stop: threading.Event):
+        """Run generation for a streaming reply (blocking)."""
+        model, tokenizer = self.generator.model, self.generator.tokenizer
+        # Keep the prompt within the model's context, dropping the oldest turns
+        input_ids = tokenizer(prompt, return_tensors="pt").input_ids[:, -settings.chat_max_context_tokens:]
+        model.generate(
+            input_ids.to(model.device),
+            max_new_tokens=settings.chat_max_new_tokens,
+            pad_token_id=tokenizer.eos_token_id,
+            streamer=streamer,
+            stopping_criteria=StoppingCriteriaList([_StopOnEvent(stop)])
+        )
+    
     def _generate_response(self, message: str) -> str:
-        message_lower = message.lower()
+        matches = self._intents.match(message)
         
         # Car-related responses
-        if any(word in message_lower for word in ["car", "vehicle", "auto"]):
-            if "maintenance" in message_lower:
+        if matches.has("car"):
+            if matches.has("maintenance"):
                 return "Regular maintenance is key! Check your oil every 5,000 miles, rotate tires, and inspect brakes regularly."
-            elif "problem" in message_lower or "issue" in message_lower:
+            elif matches.has("problem"):
                 return "I can help diagnose car issues. Try our Car Assistant at /api/v1/car/diagnose for detailed analysis."
-            elif "buy" in message_lower or "purchase" in message_lower:
+            elif matches.has("buy"):
                 return "Looking to buy a car? Check our marketplace for great deals, or ask about specific models."
         
         # General responses
-        if "help" in message_lower:
+        if matches.has("help"):
             return "I'm here to help! You can ask me about cars, maintenance, community features, or your account."
-        elif "profile" in message_lower or "account" in message_lower:
+        elif matches.has("profile"):
             return "You can update your profile from the Profile page. Change your name, phone number, and bio there."
-        elif "password" in message_lower:
+        elif matches.has("password"):
             return "To change your password, go to your profile settings and look for the security section."
-        elif "marketplace" in message_lower:
+        elif matches.has("marketplace"):
             return "Our marketplace has car parts, accessories, and more. Browse products or list your own items!"
-        elif "event" in message_lower:
+        elif matches.has("event"):
             return "Check out community events - car shows, meetups, and workshops. Find them in the Events section."
         else:
             return "I'm your CommunityCar assistant. Ask me about cars, maintenance, marketplace, events, or community features!"
     
     def _get_suggestions(self, message: str) -> list[str]:
-        message_lower = message.lower()
-        
-        if "car" in message_lower:
+        if self._intents.match(message).has("car"):
             return [
                 "What maintenance does my car need?",
                 "How do I diagnose a car problem?",
@@ -90,3 +234,6 @@ class CommunityAssistant:
                 "Check out the marketplace"
             ]
         }
+
+
+community_assistant = CommunityAssistant()
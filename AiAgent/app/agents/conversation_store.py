@@ -0,0 +1,266 @@
+"""Bounded conversation history with write-behind persistence."""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.db.models import ConversationHistory
+
+
+@dataclass
+class _Conversation:
+    turns: deque
+    user_id: Optional[str] = None
+    last_access: float = field(default_factory=time.time)
+
+
+class ConversationStore:
+    """
+    Keep recent turns in memory and persist every turn to `ConversationHistory`.
+
+    Each conversation holds its last `window` turns in memory. Conversations
+    are evicted least recently used above `max_conversations` and after
+    `ttl` seconds without access. A miss reloads the window from the
+    database, so history survives restarts and is shared by every worker
+    using the same database. New turns are queued and written in batches by
+    a background task every `flush_interval_ms`, or as soon as
+    `flush_batch_size` turns are waiting.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        window: int = 20,
+        max_conversations: int = 10000,
+        ttl: int = 3600,
+        flush_interval_ms: float = 500.0,
+        flush_batch_size: int = 200,
+        max_pending: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_batch_size = flush_batch_size
+        self.max_pending = max_pending
+
+        self._conversations: OrderedDict[str, _Conversation] = OrderedDict()
+        self._pending: list[dict] = []
+        self._in_flight: list[dict] = []
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._hits = 0
+        self._rehydrations = 0
+        self._evictions = 0
+        self._flushes = 0
+        self._written = 0
+        self._dropped = 0
+
+    def _ensure_worker(self):
+        """Start the flush loop on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    def start(self, conversation_id: str, user_id: Optional[str] = None):
+        """Register a new conversation without looking it up in the database."""
+        self._conversations[conversation_id] = _Conversation(
+            turns=deque(maxlen=self.window), user_id=user_id
+        )
+        self._evict(time.time())
+
+    async def get_history(self, conversation_id: str) -> list[dict]:
+        """Get the recent turns of a conversation, oldest first."""
+        conversation = await self._get(conversation_id)
+        return list(conversation.turns)
+
+    async def append(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        user_id: Optional[str] = None,
+        extra_data: Optional[dict] = None
+    ) -> dict:
+        """Add a turn to the hot window and queue it for persistence."""
+        self._ensure_worker()
+        conversation = await self._get(conversation_id)
+        if user_id:
+            conversation.user_id = user_id
+
+        turn = {"id": str(uuid.uuid4()), "role": role, "content": content}
+        conversation.turns.append(turn)
+        self._pending.append({
+            **turn,
+            "conversation_id": conversation_id,
+            "user_id": conversation.user_id,
+            "extra_data": extra_data,
+            # Naive UTC like the column; set here so turns in one flush keep their order
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        })
+        # Bound the queue while a slow flush runs, dropping the oldest turns
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self._dropped += overflow
+        if len(self._pending) >= self.flush_batch_size:
+            self._wakeup.set()
+        return turn
+
+    async def _get(self, conversation_id: str) -> _Conversation:
+        now = time.time()
+        conversation = self._conversations.get(conversation_id)
+        if conversation is not None and now - conversation.last_access <= self.ttl:
+            self._conversations.move_to_end(conversation_id)
+            conversation.last_access = now
+            self._hits += 1
+            return conversation
+
+        conversation = await self._rehydrate(conversation_id)
+        # Another request may have loaded it while we waited on the database
+        current = self._conversations.get(conversation_id)
+        if current is not None and now - current.last_access <= self.ttl:
+            current.last_access = now
+            return current
+        self._conversations[conversation_id] = conversation
+        self._conversations.move_to_end(conversation_id)
+        self._evict(now)
+        return conversation
+
+    def _evict(self, now: float):
+        """Drop expired conversations and the least recently used above the cap."""
+        while self._conversations:
+            oldest_id, oldest = next(iter(self._conversations.items()))
+            if len(self._conversations) <= self.max_conversations and now - oldest.last_access <= self.ttl:
+                break
+            del self._conversations[oldest_id]
+            self._evictions += 1
+
+    async def _rehydrate(self, conversation_id: str) -> _Conversation:
+        """Reload a conversation's window from the database plus unwritten turns."""
+        self._rehydrations += 1
+        rows = await asyncio.to_thread(self._load_turns, conversation_id)
+        unwritten = [
+            turn for turn in self._in_flight + self._pending
+            if turn["conversation_id"] == conversation_id
+        ]
+        # A flush may commit while we read; turn ids keep each turn once
+        seen = {row["id"] for row in rows}
+        turns = rows + [turn for turn in unwritten if turn["id"] not in seen]
+        user_id = next((t["user_id"] for t in reversed(turns) if t.get("user_id")), None)
+        return _Conversation(
+            turns=deque(
+                ({"id": t["id"], "role": t["role"], "content": t["content"]} for t in turns),
+                maxlen=self.window
+            ),
+            user_id=user_id
+        )
+
+    def _load_turns(self, conversation_id: str) -> list[dict]:
+        """Read the latest `window` turns of a conversation (blocking)."""
+        db = self.session_factory()
+        try:
+            rows = db.query(ConversationHistory).filter(
+                ConversationHistory.conversation_id == conversation_id
+            ).order_by(ConversationHistory.created_at.desc()).limit(self.window).all()
+            return [
+                {"id": row.id, "role": row.role, "content": row.content, "user_id": row.user_id}
+                for row in reversed(rows)
+            ]
+        except Exception:
+            return []
+        finally:
+            db.close()
+
+    async def _run(self):
+        """Flush queued turns periodically or when a batch is full."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all queued turns in one transaction."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._in_flight, self._pending = self._pending, []
+            written = await asyncio.to_thread(self._write_turns, self._in_flight)
+            if written:
+                self._flushes += 1
+                self._written += len(self._in_flight)
+            else:
+                # Retry with the next flush, dropping the oldest turns beyond the cap
+                self._pending = self._in_flight + self._pending
+                overflow = len(self._pending) - self.max_pending
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    self._dropped += overflow
+            self._in_flight = []
+
+    def _write_turns(self, turns: list[dict]) -> bool:
+        """Insert turns into ConversationHistory (blocking)."""
+        db = self.session_factory()
+        try:
+            db.bulk_insert_mappings(ConversationHistory, turns)
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    async def close(self):
+        """Stop the flush loop and write any queued turns."""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        await self.flush()
+
+    def get_metrics(self) -> dict:
+        """Get cache and write-behind metrics."""
+        lookups = self._hits + self._rehydrations
+        return {
+            "conversations": len(self._conversations),
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "rehydrations": self._rehydrations,
+            "evictions": self._evictions,
+            "pending_writes": len(self._pending),
+            "flushes": self._flushes,
+            "written": self._written,
+            "dropped": self._dropped,
+        }
+
+
+conversation_store = ConversationStore(
+    window=settings.conversation_window,
+    max_conversations=settings.conversation_cache_size,
+    ttl=settings.conversation_ttl,
+    flush_interval_ms=settings.conversation_flush_interval_ms,
+    flush_batch_size=settings.conversation_flush_batch_size
+)
@@ -2,7 +2,7 @@
 from fastapi import APIRouter
 from .endpoints import (
     agents, car, damage, voice, recommendations, content,
-    analyzer, moderation, translator, scraping, training
+    analyzer, moderation, translator, scraping, training, embeddings
 )
 
 api_router = APIRouter()
@@ -14,6 +14,7 @@ api_router.include_router(damage.router, prefix="/damage", tags=["Damage Detecti
 api_router.include_router(voice.router, prefix="/voice", tags=["Voice"])
 api_router.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
 api_router.include_router(content.router, prefix="/content", tags=["Content Generator"])
+api_router.include_router(embeddings.router, prefix="/embeddings", tags=["Embeddings"])
 
 # Training
 api_router.include_router(training.router, prefix="/training", tags=["Training"])
@@ -1,5 +1,5 @@
 """API v1 endpoints."""
 from . import (
     agents, car, damage, voice, recommendations, content,
-    analyzer, moderation, translator, scraping, training
+    analyzer, moderation, translator, scraping, training, embeddings
 )
@@ -1,10 +1,13 @@
 """Agents endpoint - AI community assistant."""
-from fastapi import APIRouter
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.agents.assistant import CommunityAssistant
+from typing import AsyncIterator
+import asyncio
+import json
+from app.agents.assistant import community_assistant as agent
 
 router = APIRouter()
-agent = CommunityAssistant()
 
 
 class ChatRequest(BaseModel):
@@ -25,6 +28,82 @@ async def chat_with_agent(request: ChatRequest):
     return await agent.chat(request.message, request.conversation_id, request.user_id)
 
 
+async def _to_sse(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Serialize chat events as server-sent events."""
+    try:
+        async for event in events:
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+    finally:
+        # Runs when the client disconnects too, which stops generation
+        await events.aclose()
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Chat with the assistant, streaming the reply as server-sent events."""
+    events = agent.stream_chat(request.message, request.conversation_id, request.user_id)
+    return StreamingResponse(
+        _to_sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _forward(events: AsyncIterator[dict], websocket: WebSocket, state: dict):
+    """Send chat events over a WebSocket, remembering the conversation id."""
+    try:
+        async for event in events:
+            state["conversation_id"] = event.get("conversation_id", state["conversation_id"])
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+    finally:
+        await events.aclose()
+
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Chat with the assistant over a WebSocket.
+    
+    Send `{"message": ..., "conversation_id": ..., "user_id": ...}`; the reply
+    streams back as `start`, `token` and `end` events. Send `{"type": "cancel"}`
+    (or a new message) to stop the reply in progress. The conversation id
+    carries over between messages on the same connection.
+    """
+    await websocket.accept()
+    state = {"conversation_id": None}
+    # One receive is always pending, also while a reply streams, so nothing is dropped
+    receiver = asyncio.create_task(websocket.receive_json())
+    sender = None
+    try:
+        while True:
+            data = await receiver
+            receiver = asyncio.create_task(websocket.receive_json())
+            if not data.get("message"):
+                continue
+            
+            state["conversation_id"] = data.get("conversation_id") or state["conversation_id"]
+            events = agent.stream_chat(data["message"], state["conversation_id"], data.get("user_id"))
+            sender = asyncio.create_task(_forward(events, websocket, state))
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                # Cancel request, new message or disconnect: stop the reply
+                sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (sender, receiver):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(task for task in (sender, receiver) if task is not None), return_exceptions=True)
+
+
 @router.get("/insights/{user_id}")
 async def get_user_insights(user_id: str):
     """Get AI-powered insights for a user."""
@@ -1,6 +1,9 @@
 """Analyzer endpoint - Text and sentiment analysis."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Optional, AsyncIterator, Literal
+import json
 from app.services.analyzer import analyzer_service
 
 router = APIRouter()
@@ -15,6 +18,68 @@ class KeywordsInput(BaseModel):
     max_keywords: int = 10
 
 
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    text: str
+
+
+class BatchAnalyzeRequest(BaseModel):
+    items: list[BatchItem]
+    mode: Literal["analyze", "sentiment"] = "analyze"
+
+
+async def _iter_items(items: list[BatchItem]) -> AsyncIterator[dict]:
+    """Yield request items, defaulting ids to their position."""
+    for i, item in enumerate(items):
+        yield {"id": item.id if item.id is not None else str(i), "text": item.text}
+
+
+async def _iter_ndjson(file: UploadFile, chunk_size: int = 64 * 1024) -> AsyncIterator[dict]:
+    """
+    Parse an NDJSON upload line by line without reading it all into memory.
+    
+    Each line is either a JSON object with `text` (and optional `id`) or a
+    bare JSON string.
+    """
+    buffer = b""
+    line_number = 0
+    
+    while True:
+        chunk = await file.read(chunk_size)
+        if chunk:
+            buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop() if chunk else b""
+        
+        for line in lines:
+            if not line.strip():
+                continue
+            line_number += 1
+            default_id = str(line_number - 1)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield {"id": default_id, "error": f"Invalid JSON on line {line_number}"}
+                continue
+            
+            if isinstance(record, str):
+                yield {"id": default_id, "text": record}
+            elif isinstance(record, dict) and isinstance(record.get("text"), str):
+                record_id = record.get("id")
+                yield {"id": str(record_id) if record_id is not None else default_id, "text": record["text"]}
+            else:
+                yield {"id": default_id, "error": f"Missing text on line {line_number}"}
+        
+        if not chunk:
+            break
+
+
+async def _to_ndjson(results: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Serialize results as newline-delimited JSON."""
+    async for result in results:
+        yield json.dumps(result) + "\n"
+
+
 @router.post("/analyze")
 async def analyze_text(request: TextInput):
     """Perform comprehensive text analysis."""
@@ -23,6 +88,25 @@ async def analyze_text(request: TextInput):
     return await analyzer_service.analyze_text(request.text)
 
 
+@router.post("/analyze-batch")
+async def analyze_batch(request: BatchAnalyzeRequest):
+    """Analyze many texts, streaming NDJSON results as each batch finishes."""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    results = analyzer_service.analyze_stream(_iter_items(request.items), request.mode)
+    return StreamingResponse(_to_ndjson(results), media_type="application/x-ndjson")
+
+
+@router.post("/analyze-batch/upload")
+async def analyze_batch_upload(
+    file: UploadFile = File(...),
+    mode: Literal["analyze", "sentiment"] = Form("analyze")
+):
+    """Analyze an NDJSON upload, streaming NDJSON results as each batch finishes."""
+    results = analyzer_service.analyze_stream(_iter_ndjson(file), mode)
+    return StreamingResponse(_to_ndjson(results), media_type="application/x-ndjson")
+
+
 @router.post("/sentiment")
 async def analyze_sentiment(request: TextInput):
     """Analyze sentiment of text."""
@@ -1,24 +1,68 @@
 """Damage Detection endpoint - Car damage analysis from images."""
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from typing import Optional
+import asyncio
+import os
+from app.core.config import settings
+from app.core.uploads import UploadTooLargeError, spool_upload
 from app.services.damage_detection import damage_detection_service
 
 router = APIRouter()
 
 
+def _check_size(image: UploadFile) -> int:
+    """Size of an upload, rewound for reading; oversize files raise UploadTooLargeError (413)."""
+    size = image.size
+    if size is None:
+        size = image.file.seek(0, os.SEEK_END)
+    if size > settings.damage_max_image_mb * 1024 * 1024:
+        raise UploadTooLargeError(f"Image too large (max {settings.damage_max_image_mb}MB)")
+    image.file.seek(0)
+    return size
+
+
+async def _spool(image: UploadFile) -> tuple[str, int]:
+    """
+    Copy an upload to a named temp file in chunks.
+
+    Starlette has already spooled the upload, but to an anonymous file that
+    cannot be handed to the decoding worker processes; they open the copy by
+    path instead of receiving the bytes pickled.
+    """
+    _check_size(image)
+    max_bytes = settings.damage_max_image_mb * 1024 * 1024
+    return await asyncio.to_thread(spool_upload, image.file, max_bytes, settings.damage_spool_dir or None)
+
+
+def _remove(paths: list[str]):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
 @router.post("/analyze")
 async def analyze_damage(
     image: UploadFile = File(...),
-    car_part: Optional[str] = Form(None)
+    car_part: Optional[str] = Form(None),
+    quality: str = Form("fast")
 ):
-    """Analyze a car image for damage."""
-    image_data = await image.read()
-    if len(image_data) == 0:
-        raise HTTPException(status_code=400, detail="Empty image file")
-    if len(image_data) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
+    """
+    Analyze a car image for damage.
     
-    result = await damage_detection_service.detect_damage(image_data, car_part)
+    `quality` trades latency for localization: "fast" classifies the whole
+    photo; "balanced" and "high" scan 3x3 and 5x5 overlapping tiles in one
+    batch and return a `heatmap` of tile scores and a `bbox` per damage area.
+    """
+    if quality not in settings.damage_scan_grids:
+        raise HTTPException(
+            status_code=400, detail=f"quality must be one of {', '.join(settings.damage_scan_grids)}"
+        )
+    # A single image is decoded in this process, straight from Starlette's spooled file
+    if _check_size(image) == 0:
+        raise HTTPException(status_code=400, detail="Empty image file")
+    result = await damage_detection_service.detect_damage(image.file, car_part, quality)
     return {
         "image_analyzed": result.image_analyzed,
         "has_damage": result.has_damage,
@@ -26,7 +70,9 @@ async def analyze_damage(
         "damage_areas": [area.model_dump() for area in result.damage_areas],
         "total_estimated_cost": result.total_estimated_cost,
         "recommendations": result.recommendations,
-        "confidence": result.confidence
+        "confidence": result.confidence,
+        "timing": result.timing,
+        "heatmap": result.heatmap
     }
 
 
@@ -35,23 +81,34 @@ async def analyze_multiple_images(
     images: list[UploadFile] = File(...),
     car_parts: Optional[str] = Form(None)
 ):
-    """Analyze multiple car images for comprehensive damage assessment."""
-    if len(images) > 10:
-        raise HTTPException(status_code=400, detail="Maximum 10 images allowed")
-    
-    parts_list = [p.strip() for p in car_parts.split(",")] if car_parts else []
-    image_data_list = []
-    
-    for i, image in enumerate(images):
-        data = await image.read()
-        if len(data) > 0:
-            part = parts_list[i] if i < len(parts_list) else None
-            image_data_list.append((data, part))
+    """
+    Analyze multiple car images for comprehensive damage assessment.
     
-    if not image_data_list:
-        raise HTTPException(status_code=400, detail="No valid images provided")
+    All images are classified in one batch and damage seen in several photos
+    of the same part is reported once.
+    """
+    if len(images) > settings.damage_max_images:
+        raise HTTPException(
+            status_code=400, detail=f"Maximum {settings.damage_max_images} images allowed"
+        )
     
-    result = await damage_detection_service.analyze_multiple_images(image_data_list)
+    parts_list = [p.strip() for p in car_parts.split(",")] if car_parts else []
+    paths = []
+    try:
+        image_list = []
+        for i, image in enumerate(images):
+            path, size = await _spool(image)
+            paths.append(path)
+            if size > 0:
+                part = parts_list[i] if i < len(parts_list) else None
+                image_list.append((path, part))
+        
+        if not image_list:
+            raise HTTPException(status_code=400, detail="No valid images provided")
+        
+        result = await damage_detection_service.analyze_multiple_images(image_list)
+    finally:
+        _remove(paths)
     return {
         "image_analyzed": result.image_analyzed,
         "has_damage": result.has_damage,
@@ -59,7 +116,8 @@ async def analyze_multiple_images(
         "damage_areas": [area.model_dump() for area in result.damage_areas],
         "total_estimated_cost": result.total_estimated_cost,
         "recommendations": result.recommendations,
-        "confidence": result.confidence
+        "confidence": result.confidence,
+        "timing": result.timing
     }
 
 
@@ -0,0 +1,95 @@
+"""Embeddings endpoint - Content embeddings and semantic search."""
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+from app.core.config import settings
+from app.services.embeddings import embedding_service
+from app.services.similar_items import similar_items_index
+
+router = APIRouter()
+
+
+class EmbeddingItem(BaseModel):
+    entity_type: str  # post, product, guide, ...
+    entity_id: str
+    text: str
+
+
+class EncodeRequest(BaseModel):
+    items: list[EmbeddingItem]
+    return_embeddings: bool = False
+
+
+class EmbeddingKey(BaseModel):
+    entity_type: str
+    entity_id: str
+
+
+class DeleteRequest(BaseModel):
+    items: list[EmbeddingKey]
+
+
+class SearchRequest(BaseModel):
+    query: str
+    entity_type: Optional[str] = None
+    limit: int = 10
+
+
+@router.post("/encode")
+async def encode_items(request: EncodeRequest):
+    """Embed and store content items; unchanged content is not re-encoded."""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Items cannot be empty")
+    if len(request.items) > settings.embedding_encode_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.embedding_encode_max_items} items per request"
+        )
+    if any(not item.text.strip() for item in request.items):
+        raise HTTPException(status_code=400, detail="Item text cannot be empty")
+
+    results = await embedding_service.index_items([item.model_dump() for item in request.items])
+    if results is None:
+        raise HTTPException(status_code=503, detail="Embedding model unavailable")
+
+    for result in results:
+        embedding = result.pop("embedding")
+        if request.return_embeddings:
+            result["embedding"] = embedding.tolist()
+    return {
+        "model": settings.model_name,
+        "encoded": sum(r["status"] == "encoded" for r in results),
+        "unchanged": sum(r["status"] == "unchanged" for r in results),
+        "items": results
+    }
+
+
+@router.post("/delete")
+async def delete_items(request: DeleteRequest):
+    """Delete stored embeddings, e.g. for removed posts or sold products."""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Items cannot be empty")
+    if len(request.items) > settings.embedding_encode_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.embedding_encode_max_items} items per request"
+        )
+
+    keys = [(item.entity_type, item.entity_id) for item in request.items]
+    deleted = await embedding_service.delete_items(keys)
+    similar_items_index.remove(keys)
+    return {"deleted": deleted}
+
+
+@router.post("/search")
+async def search(request: SearchRequest):
+    """Find stored items most similar to a query."""
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    results = await embedding_service.search(
+        request.query, max(1, min(request.limit, 100)), request.entity_type
+    )
+    if results is None:
+        raise HTTPException(status_code=503, detail="Embedding model unavailable")
+    return {"query": request.query, "results": results}
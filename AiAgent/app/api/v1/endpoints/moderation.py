@@ -1,7 +1,8 @@
 """Moderation endpoint - Content moderation and safety."""
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.services.moderation import moderation_service
+from app.core.config import settings
+from app.services.moderation import moderation_service, BatchModerationItem
 
 router = APIRouter()
 
@@ -16,6 +17,12 @@ class SafeCheckRequest(BaseModel):
     text: str
 
 
+class BatchModerationRequest(BaseModel):
+    items: list[BatchModerationItem]
+    check_pii: bool = True
+    auto_clean: bool = False
+
+
 @router.post("/moderate")
 async def moderate_content(request: ModerationRequest):
     """Moderate content for safety."""
@@ -26,6 +33,21 @@ async def moderate_content(request: ModerationRequest):
     )
 
 
+@router.post("/moderate-batch")
+async def moderate_batch(request: BatchModerationRequest):
+    """Moderate many items in one call, e.g. a feed ingestion batch."""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    if len(request.items) > settings.moderation_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.moderation_batch_max_items} items allowed"
+        )
+    return await moderation_service.moderate_batch(
+        request.items, request.check_pii, request.auto_clean
+    )
+
+
 @router.post("/check-safe")
 async def check_safe(request: SafeCheckRequest):
     """Quick safety check for content."""
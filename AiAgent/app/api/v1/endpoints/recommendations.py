@@ -1,8 +1,11 @@
 """Recommendations endpoint - Personalized recommendations."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, AsyncIterator
+import json
+from app.core.config import settings
 from app.services.recommendation import recommendation_service
+from app.services.trending import trending_engine
 
 router = APIRouter()
 
@@ -11,12 +14,14 @@ class RecommendationRequest(BaseModel):
     user_id: str
     item_type: Optional[str] = None
     limit: int = 10
+    exclude_ids: list[str] = []  # e.g. items already on screen
 
 
 class SimilarItemsRequest(BaseModel):
     item_id: str
     item_type: str
     limit: int = 5
+    exclude_ids: list[str] = []  # e.g. items already shown or in the cart
 
 
 class TrendingRequest(BaseModel):
@@ -30,17 +35,27 @@ class UpdatePreferencesRequest(BaseModel):
     interests: Optional[list[str]] = None
     viewed_item: Optional[str] = None
     liked_item: Optional[str] = None
+    purchased_item: Optional[str] = None
+    location: Optional[str] = None
 
 
 @router.post("/for-you")
-async def get_recommendations(request: RecommendationRequest):
-    """Get personalized recommendations for a user."""
+async def get_recommendations(request: RecommendationRequest, response: Response):
+    """
+    Get personalized recommendations for a user.
+    
+    Per-stage ranking times are returned in the `Server-Timing` header.
+    """
     if not request.user_id.strip():
         raise HTTPException(status_code=400, detail="User ID is required")
     
-    return await recommendation_service.get_recommendations(
-        request.user_id, request.item_type, request.limit
+    results, timings = await recommendation_service.get_recommendations(
+        request.user_id, request.item_type, max(1, min(request.limit, 100)), request.exclude_ids
+    )
+    response.headers["Server-Timing"] = ", ".join(
+        f"{stage};dur={ms:.2f}" for stage, ms in timings.items()
     )
+    return results
 
 
 @router.post("/similar")
@@ -50,7 +65,7 @@ async def get_similar_items(request: SimilarItemsRequest):
         raise HTTPException(status_code=400, detail="Item ID is required")
     
     return await recommendation_service.get_similar_items(
-        request.item_id, request.item_type, request.limit
+        request.item_id, request.item_type, request.limit, request.exclude_ids
     )
 
 
@@ -62,12 +77,71 @@ async def get_trending(request: TrendingRequest):
     )
 
 
+async def _iter_event_lines(request: Request) -> AsyncIterator[Optional[dict]]:
+    """Parse a streamed NDJSON body line by line, yielding None for malformed lines."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _parse_event(line)
+    if buffer.strip():
+        yield _parse_event(buffer)
+
+
+def _parse_event(line: bytes) -> Optional[dict]:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+@router.post("/events")
+async def ingest_events(request: Request):
+    """
+    Ingest engagement events for trending.
+    
+    The body is NDJSON, one event per line:
+    `{"item_id": ..., "item_type": ..., "event": "view|like|comment|share|bid|purchase",
+    "category": ..., "title": ..., "timestamp": ...}`. Events are applied in
+    batches while the body is still uploading.
+    """
+    accepted = rejected = 0
+    batch: list[dict] = []
+    async for event in _iter_event_lines(request):
+        if event is None:
+            rejected += 1
+            continue
+        batch.append(event)
+        if len(batch) >= settings.trending_ingest_batch_size:
+            counts = await trending_engine.ingest_async(batch)
+            accepted, rejected = accepted + counts[0], rejected + counts[1]
+            batch = []
+    if batch:
+        counts = await trending_engine.ingest_async(batch)
+        accepted, rejected = accepted + counts[0], rejected + counts[1]
+    return {"accepted": accepted, "rejected": rejected}
+
+
+@router.get("/trending/categories")
+async def get_trending_categories(limit: int = 10):
+    """Get categories with the most recent engagement."""
+    return trending_engine.trending_categories(max(1, min(limit, 100)))
+
+
 @router.post("/preferences")
 async def update_preferences(request: UpdatePreferencesRequest):
     """Update user preferences for better recommendations."""
     if not request.user_id.strip():
         raise HTTPException(status_code=400, detail="User ID is required")
     
-    return await recommendation_service.update_user_preferences(
-        request.user_id, request.interests, request.viewed_item, request.liked_item
-    )
+    try:
+        return await recommendation_service.update_user_preferences(
+            request.user_id, request.interests, request.viewed_item, request.liked_item,
+            request.purchased_item, request.location
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
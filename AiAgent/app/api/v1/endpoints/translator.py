@@ -1,6 +1,7 @@
 """Translator endpoint - Multi-language translation."""
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from app.core.config import settings
 from app.services.translator import translator_service
 
 router = APIRouter()
@@ -12,10 +13,20 @@ class TranslationRequest(BaseModel):
     target_language: str = "es"
 
 
+class BatchTranslationRequest(BaseModel):
+    texts: list[str]
+    source_language: str = "en"
+    target_language: str = "es"
+
+
 class DetectLanguageRequest(BaseModel):
     text: str
 
 
+class BatchDetectLanguageRequest(BaseModel):
+    texts: list[str]
+
+
 @router.post("/translate")
 async def translate_text(request: TranslationRequest):
     """Translate text from source to target language."""
@@ -26,6 +37,21 @@ async def translate_text(request: TranslationRequest):
     )
 
 
+@router.post("/translate-batch")
+async def translate_batch(request: BatchTranslationRequest):
+    """Translate many documents in one call, sharing model batches."""
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="Texts cannot be empty")
+    if len(request.texts) > settings.translation_batch_max_documents:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.translation_batch_max_documents} texts per request"
+        )
+    return await translator_service.translate_batch(
+        request.texts, request.source_language, request.target_language
+    )
+
+
 @router.post("/detect")
 async def detect_language(request: DetectLanguageRequest):
     """Detect the language of input text."""
@@ -34,6 +60,19 @@ async def detect_language(request: DetectLanguageRequest):
     return await translator_service.detect_language(request.text)
 
 
+@router.post("/detect-batch")
+async def detect_language_batch(request: BatchDetectLanguageRequest):
+    """Detect the language of many texts in one call."""
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="Texts cannot be empty")
+    if len(request.texts) > settings.language_detect_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.language_detect_batch_max_items} texts per request"
+        )
+    return await translator_service.detect_language_batch(request.texts)
+
+
 @router.get("/languages")
 async def get_supported_languages():
     """Get list of supported languages."""
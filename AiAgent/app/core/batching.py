@@ -0,0 +1,135 @@
+"""Dynamic micro-batching for model inference."""
+import asyncio
+import time
+from typing import Any, Callable, Optional
+
+from app.core.inference import QueueFullError, inference_executor
+
+
+class BatchScheduler:
+    """
+    Collect concurrent single-item requests and run them as one batch.
+
+    A batch is flushed when `max_batch_size` items are queued or when
+    `max_wait_ms` has elapsed since the first item arrived, whichever comes
+    first. `batch_fn` receives a list of inputs, must return a list of outputs
+    in the same order, and runs on the shared inference executor under the
+    scheduler's name so the event loop stays free.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[list], list],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        max_queue_size: int = 1024
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_queue_size = max_queue_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+    def _ensure_worker(self):
+        """Start the flush loop on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise QueueFullError(f"{self.name} queue is full ({self.max_queue_size} pending)")
+        return await future
+
+    async def _run(self):
+        """Gather items into batches and dispatch them."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: list[tuple]):
+        """Run one batch off the event loop and resolve its futures."""
+        # Skip callers that have already gone away
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        for _, _, queued_at in batch:
+            wait = started - queued_at
+            self._queue_wait_total += wait
+            self._queue_wait_max = max(self._queue_wait_max, wait)
+        self._batches += 1
+        self._items += len(batch)
+
+        inputs = [item for item, _, _ in batch]
+        try:
+            outputs = await inference_executor.run(self.name, self.batch_fn, inputs)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
+
+    async def close(self):
+        """Stop the flush loop."""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def get_metrics(self) -> dict:
+        """Get batching metrics."""
+        avg_batch = self._items / self._batches if self._batches else 0.0
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "rejected": self._rejected,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": round(avg_batch, 2),
+            "batch_fill_ratio": round(avg_batch / self.max_batch_size, 4),
+            "avg_queue_latency_ms": round(self._queue_wait_total / self._items * 1000, 3) if self._items else 0.0,
+            "max_queue_latency_ms": round(self._queue_wait_max * 1000, 3),
+        }
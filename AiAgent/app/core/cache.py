@@ -0,0 +1,196 @@
+"""Content-addressed result cache for model outputs."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+class CacheBackend(ABC):
+    """Interface for one cache tier. Values must be JSON-serializable."""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the live value for a key, or None."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int):
+        """Store a value for `ttl` seconds."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU tier with per-entry expiry."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Local persistent tier stored in a SQLite file."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_results_expires ON results (expires_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        """Drop expired rows, then the soonest-expiring rows above the cap."""
+        self._conn.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+class ResultCache:
+    """
+    Tiered cache for deterministic model results.
+
+    Keys combine a namespace, a model/version tag and a SHA-256 of the input,
+    so changing a model or word list never serves stale results. Lookups try
+    each tier in order and promote hits into the faster tiers.
+    """
+
+    def __init__(self, tiers: list[CacheBackend], ttl: int = 3600):
+        self.tiers = tiers
+        self.ttl = ttl
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(namespace: str, version: str, content: str, *params: Any) -> str:
+        """Build a cache key from the content hash plus model version and options."""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        suffix = ":".join(str(p) for p in params)
+        return f"{namespace}:{version}:{digest}:{suffix}"
+
+    def _count(self, namespace: str, field: str):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        stats[field] = stats.get(field, 0) + 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key in each tier, promoting hits to earlier tiers."""
+        namespace = key.split(":", 1)[0]
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value, self.ttl)
+                self._count(namespace, "hits")
+                self._count(namespace, f"{tier.name}_hits")
+                return value
+        self._count(namespace, "misses")
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a value in every tier."""
+        for tier in self.tiers:
+            tier.set(key, value, self.ttl)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def get_metrics(self) -> dict:
+        """Get hit rates per namespace."""
+        metrics = {}
+        for namespace, stats in self._stats.items():
+            total = stats["hits"] + stats["misses"]
+            metrics[namespace] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / total, 4) if total else 0.0
+            }
+        return {"tiers": [tier.name for tier in self.tiers], "namespaces": metrics}
+
+
+def _create_result_cache() -> ResultCache:
+    tiers: list[CacheBackend] = [MemoryCacheBackend(settings.cache_max_entries)]
+    if settings.cache_persistent:
+        tiers.append(SQLiteCacheBackend(settings.cache_db_path, settings.cache_persistent_max_entries))
+    return ResultCache(tiers, ttl=settings.cache_ttl)
+
+
+result_cache = _create_result_cache()
@@ -35,9 +35,42 @@ class Settings(BaseSettings):
     huggingface_token: str = os.getenv("HUGGINGFACE_TOKEN", "")
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     sentiment_model: str = "distilbert-base-uncased-finetuned-sst-2-english"
-    translation_model: str = "Helsinki-NLP/opus-mt-en-es"
+    translation_pairs_path: str = ""  # manifest of direct pair models, default app/resources/translation_pairs.json
+    translation_route_latency_weight: float = 200.0  # MB of model loading worth one unit of per-sentence latency
+    language_detect_batch_max_items: int = 1000
     whisper_model: str = "openai/whisper-tiny"
     tts_model: str = "microsoft/speecht5_tts"
+    damage_model: str = "microsoft/resnet-50"  # base model, use a fine-tuned one in production
+    chat_model: str = "microsoft/DialoGPT-small"
+    chat_max_new_tokens: int = 128
+    chat_max_context_tokens: int = 768  # prompt tokens kept from the conversation history
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Model Registry
+    # ═══════════════════════════════════════════════════════════════════════════
+    model_memory_budget_mb: int = 4096  # evict least recently used models above this
+    model_load_retry_seconds: int = 300  # wait before retrying a failed load
+    model_warmup: list[str] = []  # model ids to load at startup, e.g. ["openai/whisper-tiny"]
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Inference Batching
+    # ═══════════════════════════════════════════════════════════════════════════
+    sentiment_batch_size: int = 16
+    sentiment_batch_wait_ms: float = 10.0  # max time to hold a partial batch
+    sentiment_queue_size: int = 1024  # pending requests before rejecting
+    analyzer_bulk_batch_size: int = 64  # texts per forward pass for bulk jobs
+    translation_batch_size: int = 8  # sentences per padded forward pass
+    translation_batch_max_sentences: int = 64  # sentences collected per flush, per language pair
+    translation_batch_wait_ms: float = 10.0
+    translation_queue_size: int = 4096  # pending sentences per language pair before rejecting
+    translation_batch_max_documents: int = 100
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Inference Executor
+    # ═══════════════════════════════════════════════════════════════════════════
+    inference_concurrency: int = 1  # worker threads per model
+    inference_queue_size: int = 32  # waiting requests per model before 429
+    inference_model_concurrency: dict[str, int] = {}  # per-model overrides, e.g. {"translation": 2}
 
     # ═══════════════════════════════════════════════════════════════════════════
     # AWS Bedrock (for Strands Agents)
@@ -45,6 +78,99 @@ class Settings(BaseSettings):
     aws_region: str = os.getenv("AWS_REGION", "us-west-2")
     aws_bedrock_api_key: str = os.getenv("AWS_BEDROCK_API_KEY", "")
 
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Moderation
+    # ═══════════════════════════════════════════════════════════════════════════
+    moderation_lexicon_path: str = ""  # JSON {"profanity": [...], "hate_speech": [...], "violence": [...]}
+    moderation_workers: int = 0  # batch worker processes, 0 = CPU count
+    moderation_parallel_threshold: int = 200  # smaller batches run in a single thread
+    moderation_batch_max_items: int = 10000
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Translation Memory
+    # ═══════════════════════════════════════════════════════════════════════════
+    translation_memory_enabled: bool = True  # reuse stored sentence translations
+    translation_memory_max_entries: int = 100000  # least recently used rows pruned above this
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Conversations
+    # ═══════════════════════════════════════════════════════════════════════════
+    conversation_window: int = 20  # recent turns kept in memory per conversation
+    conversation_cache_size: int = 10000  # conversations kept in memory
+    conversation_ttl: int = 3600  # seconds before an idle conversation is reloaded
+    conversation_flush_interval_ms: float = 500.0  # write-behind interval
+    conversation_flush_batch_size: int = 200  # flush early once this many turns are queued
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Embeddings
+    # ═══════════════════════════════════════════════════════════════════════════
+    embedding_batch_size: int = 32  # texts per padded forward pass
+    embedding_batch_max_texts: int = 256  # texts collected per flush
+    embedding_batch_wait_ms: float = 5.0
+    embedding_queue_size: int = 4096  # pending texts before rejecting
+    embedding_max_tokens: int = 256  # longer texts are truncated
+    embedding_encode_max_items: int = 500  # items per /embeddings/encode call
+    embedding_index_dir: str = "data/embeddings"  # memory-mapped vector matrix per model
+    embedding_sync_interval: int = 30  # seconds between checks for rows written by other workers
+    vector_index_type: str = "exact"  # "exact" (brute force) or "ivf" (approximate, for large catalogs)
+    vector_index_nlist: int = 0  # IVF clusters, 0 = about 4 * sqrt(vectors)
+    vector_index_nprobe: int = 32  # IVF clusters scanned per query; higher is slower and more accurate
+    vector_index_train_threshold: int = 10000  # IVF searches exactly until this many vectors are stored
+    similar_items_neighbors: int = 20  # precomputed neighbours per item
+    similar_items_refresh_interval: int = 60  # seconds between incremental neighbour updates
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Damage Detection
+    # ═══════════════════════════════════════════════════════════════════════════
+    damage_decode_size: int = 256  # decoded images are shrunk to this shorter side (ResNet resizes to 256, crops 224)
+    damage_decode_workers: int = 0  # image decoding processes, 0 = CPU count (max 8)
+    damage_max_images: int = 12  # images per /damage/analyze-multiple request
+    damage_max_image_mb: int = 20  # per image; larger requests are refused before upload
+    damage_spool_dir: str = ""  # temp directory for uploads, empty = system default
+    damage_scan_grids: dict[str, int] = {"fast": 1, "balanced": 3, "high": 5}  # quality -> tiles per side
+    damage_scan_decode_size: int = 768  # shorter side decoded for tiled scans
+    damage_scan_threshold: float = 0.5  # tile damage score that marks a region
+    damage_cache_enabled: bool = True  # reuse results for near-duplicate photos
+    damage_cache_path: str = "data/damage_cache.db"
+    damage_cache_max_entries: int = 50000
+    damage_cache_max_distance: int = 4  # differing bits of the 64-bit perceptual hash
+    damage_cache_ttl: int = 30 * 86400  # seconds
+    damage_heuristic_size: int = 192  # longer side analyzed by the no-model fallback (bounds its CPU time)
+    damage_heuristic_threshold: float = 4.0  # robust z-score a cell needs to be flagged; higher = fewer, surer regions
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Ranking
+    # ═══════════════════════════════════════════════════════════════════════════
+    ranking_weights: dict[str, float] = {  # linear model over the candidate features
+        "trending": 0.3, "similarity": 1.0, "category": 0.6, "seen": -0.5
+    }
+    ranking_candidates_per_source: int = 100
+    ranking_seed_items: int = 10  # latest liked/purchased items used for similar-item candidates
+    ranking_diversity: float = 0.15  # score penalty per item already picked from the same type/category
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # User Profiles
+    # ═══════════════════════════════════════════════════════════════════════════
+    profile_history_size: int = 100  # viewed/liked/purchased items kept per user
+    profile_cache_size: int = 10000  # profiles kept in memory
+    profile_ttl: int = 300  # seconds before a cached profile is reloaded
+    profile_flush_interval_ms: float = 1000.0  # write-behind interval
+    profile_flush_batch_size: int = 500  # flush early once this many users are queued
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # Trending
+    # ═══════════════════════════════════════════════════════════════════════════
+    trending_half_life_hours: float = 6.0  # engagement loses half its weight in this time
+    trending_event_weights: dict[str, float] = {
+        "view": 1.0, "like": 3.0, "comment": 4.0, "share": 5.0, "bid": 6.0, "purchase": 10.0
+    }
+    trending_sketch_width: int = 16384  # Count-Min columns; more means fewer collisions
+    trending_sketch_depth: int = 4
+    trending_top_k: int = 200  # items tracked per type/category scope
+    trending_ingest_batch_size: int = 1000  # events applied together from a stream
+    trending_snapshot_path: str = "data/trending.npz"  # empty to disable snapshots
+    trending_snapshot_interval: int = 60  # seconds
+
     # ═══════════════════════════════════════════════════════════════════════════
     # Paths
     # ═══════════════════════════════════════════════════════════════════════════
@@ -57,6 +183,10 @@ class Settings(BaseSettings):
     # Cache & Rate Limiting
     # ═══════════════════════════════════════════════════════════════════════════
     cache_ttl: int = 3600  # 1 hour
+    cache_max_entries: int = 10000  # in-process LRU tier
+    cache_persistent: bool = False  # add a SQLite tier that survives restarts
+    cache_db_path: str = "data/result_cache.db"
+    cache_persistent_max_entries: int = 100000
     rate_limit_requests: int = 100
     rate_limit_window: int = 60  # seconds
 
@@ -0,0 +1,142 @@
+"""Classical image cues for locating car body damage without a model."""
+from typing import Union
+
+import numpy as np
+from PIL import Image
+
+# Cue maps, in the order of the last axis of the cell feature array
+CUES = ("edges", "contrast", "color")
+# Damage each cue most often indicates on a painted panel
+CUE_DAMAGE_TYPES = {"edges": "scratch", "contrast": "dent", "color": "rust"}
+
+
+def connected_regions(mask: np.ndarray, diagonal: bool = False) -> list[list[tuple[int, int]]]:
+    """Group flagged grid cells into 4-connected (or with `diagonal`, 8-connected) regions."""
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    if diagonal:
+        steps += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    regions = []
+    seen = np.zeros_like(mask, dtype=bool)
+    for start in map(tuple, np.argwhere(mask).tolist()):
+        if seen[start]:
+            continue
+        seen[start] = True
+        region, stack = [], [start]
+        while stack:
+            row, col = stack.pop()
+            region.append((row, col))
+            for r, c in ((row + dr, col + dc) for dr, dc in steps):
+                if 0 <= r < mask.shape[0] and 0 <= c < mask.shape[1] and mask[r, c] and not seen[r, c]:
+                    seen[r, c] = True
+                    stack.append((r, c))
+        regions.append(region)
+    return regions
+
+
+def cue_maps(pixels: Union[np.ndarray, Image.Image], size: int = 192, cell: int = 8) -> np.ndarray:
+    """
+    Per-cell cue strengths of an RGB image, shape (rows, cols, len(CUES)).
+
+    The image is shrunk by a whole factor so its longer side is at most
+    `size` pixels and cut into `cell` x `cell` pixel cells. Per cell, edges
+    is the mean absolute Laplacian, contrast the standard deviation of
+    brightness, and color the summed variance of the chroma channels (RGB
+    minus brightness), so paint of a different hue stands out even at equal
+    brightness.
+    """
+    image = pixels if isinstance(pixels, Image.Image) else Image.fromarray(pixels)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    factor = -(-max(image.size) // size)
+    if factor > 1:
+        image = image.reduce(factor)
+    rows, cols = image.height // cell, image.width // cell
+    rgb = np.asarray(image, dtype=np.float32)[:rows * cell, :cols * cell] / 255
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    chroma = rgb - gray[..., None]
+
+    # 4-neighbour Laplacian: responds to lines and specks, not to smooth shading
+    padded = np.pad(gray, 1, mode="edge")
+    edges = np.abs(
+        padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:] - 4 * gray
+    )
+
+    # One pass of cell means over every channel; variances from E[x²] - E[x]²
+    channels = np.concatenate(
+        [edges[..., None], gray[..., None], gray[..., None] ** 2, chroma, chroma ** 2], axis=-1
+    )
+    pooled = channels.reshape(rows, cell, cols, cell, -1).mean(axis=(1, 3))
+    contrast = np.sqrt(np.maximum(pooled[..., 2] - pooled[..., 1] ** 2, 0))
+    color = np.maximum(pooled[..., 6:9] - pooled[..., 3:6] ** 2, 0).sum(axis=-1)
+    return np.stack([pooled[..., 0], contrast, color], axis=-1)
+
+
+def find_damage_regions(
+    pixels: Union[np.ndarray, Image.Image],
+    size: int = 192,
+    threshold: float = 4.0,
+    max_regions: int = 5,
+    max_area: float = 0.25
+) -> list[dict]:
+    """
+    Locate cells whose cues stand out from the rest of the photo.
+
+    Each cue is scored per cell as a robust z-score (distance above the
+    median in units of median absolute deviation), so a photo is judged
+    against itself. Cells above `threshold` are grouped into regions cue by
+    cue; regions running edge to edge or covering more than `max_area` of
+    the photo are scene structure rather than damage and are skipped.
+    Returns up to `max_regions` dicts with a normalized `bbox`
+    [x0, y0, x1, y1], the `score`, the `cue` that flagged it, and the
+    `area` as a fraction of the photo, strongest first.
+    """
+    grid = cue_maps(pixels, size)
+    rows, cols = grid.shape[:2]
+    if rows < 3 or cols < 3:
+        return []
+
+    flat = grid.reshape(-1, len(CUES))
+    median = np.median(flat, axis=0)
+    spread = np.median(np.abs(flat - median), axis=0) * 1.4826
+    # Floors keep near-uniform photos (tiny spread) from flagging noise
+    spread = np.maximum(spread, np.array([0.004, 0.004, 0.0005], dtype=np.float32))
+    # Straight structure across the photo (reflections, panel lines, the horizon)
+    # raises its whole row or column, so cells are measured against those too
+    baseline = np.maximum(
+        median, np.maximum(np.median(grid, axis=1, keepdims=True), np.median(grid, axis=0, keepdims=True))
+    )
+    scores = (grid - baseline) / spread
+
+    candidates = []
+    for index, cue in enumerate(CUES):
+        for region in connected_regions(scores[..., index] > threshold, diagonal=True):
+            region_rows, region_cols = zip(*region)
+            spans_photo = (
+                min(region_cols) == 0 and max(region_cols) == cols - 1
+                or min(region_rows) == 0 and max(region_rows) == rows - 1
+            )
+            if spans_photo or len(region) > max_area * rows * cols:
+                continue
+            candidates.append((float(scores[region_rows, region_cols, index].max()), cue, set(region)))
+
+    # Cues often fire together on one defect; keep the strongest reading of each spot
+    regions, claimed = [], []
+    for score, cue, cells in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+        if any(len(cells & other) > len(cells) / 2 for other in claimed):
+            continue
+        claimed.append(cells)
+        region_rows, region_cols = zip(*cells)
+        regions.append({
+            "bbox": [
+                round(min(region_cols) / cols, 4),
+                round(min(region_rows) / rows, 4),
+                round((max(region_cols) + 1) / cols, 4),
+                round((max(region_rows) + 1) / rows, 4),
+            ],
+            "score": round(score, 2),
+            "cue": cue,
+            "area": round(len(cells) / (rows * cols), 4),
+        })
+        if len(regions) == max_regions:
+            break
+    return regions
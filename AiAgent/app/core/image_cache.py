@@ -0,0 +1,200 @@
+"""Near-duplicate image result cache keyed by perceptual hashes."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+
+# Set bits per byte value, for Hamming distances on numpy < 2.0 (no bitwise_count)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def dhash(pixels: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash of an RGB or grayscale image as a `hash_size`² bit integer.
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale and each bit
+    records whether a pixel is brighter than its right neighbour, so
+    re-encoding, resizing and small edits change only a few bits.
+    """
+    image = Image.fromarray(pixels).convert("L").resize((hash_size + 1, hash_size), Image.BOX)
+    gray = np.asarray(image, dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(hashes: np.ndarray, value: int) -> np.ndarray:
+    """Bit differences between each uint64 in `hashes` and `value`."""
+    xor = np.ascontiguousarray(hashes ^ np.uint64(value))
+    return _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class ImageResultCache:
+    """
+    Cache results per image, matching near-duplicates by perceptual hash.
+
+    Results live in a SQLite file so they survive restarts and are shared by
+    workers on the same host; only the 64-bit hashes are held in memory
+    (rows added by other workers are picked up on the next lookup), and a
+    lookup compares the query against all of them at once. An entry
+    matches when it was stored under the same `variant` (model and options)
+    within `max_distance` differing bits. Above `max_entries` the least
+    recently used tenth is dropped.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_distance: int = 4, ttl: int = 7 * 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._variants = np.zeros(0, dtype=np.int32)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._variant_ids: dict[str, int] = {}
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._stored = 0
+
+    @staticmethod
+    def _signed(value: int) -> int:
+        """SQLite integers are signed 64-bit."""
+        return value - (1 << 64) if value >= 1 << 63 else value
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and load the hashes on first use. Caller holds the lock."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_results ("
+                "id INTEGER PRIMARY KEY, hash INTEGER NOT NULL, variant TEXT NOT NULL, "
+                "value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._reload()
+        return self._conn
+
+    def _reload(self):
+        """Rebuild the in-memory hash arrays from the table. Caller holds the lock."""
+        self._variant_ids = {}
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._variants = np.zeros(0, dtype=np.int32)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._append(self._conn.execute(
+            "SELECT id, hash, variant, created_at FROM image_results WHERE created_at >= ? ORDER BY id",
+            (time.time() - self.ttl,)
+        ).fetchall())
+
+    def _sync(self):
+        """Pick up rows other workers inserted since the last look. Caller holds the lock."""
+        last_id = int(self._ids[-1]) if len(self._ids) else 0
+        self._append(self._conn.execute(
+            "SELECT id, hash, variant, created_at FROM image_results WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall())
+
+    def _append(self, rows: list[tuple[int, int, str, float]]):
+        if not rows:
+            return
+        self._ids = np.concatenate([self._ids, np.array([row[0] for row in rows], dtype=np.int64)])
+        self._hashes = np.concatenate([
+            self._hashes, np.array([row[1] for row in rows], dtype=np.int64).view(np.uint64)
+        ])
+        self._variants = np.concatenate([self._variants, np.array(
+            [self._variant_ids.setdefault(row[2], len(self._variant_ids)) for row in rows],
+            dtype=np.int32
+        )])
+        self._created = np.concatenate([self._created, np.array([row[3] for row in rows], dtype=np.float64)])
+
+    def get(self, image_hash: int, variant: str) -> Optional[tuple[Any, int]]:
+        """Find the closest stored result for a hash. Returns (value, distance) or None."""
+        with self._lock:
+            conn = self._connect()
+            self._sync()
+            variant_id = self._variant_ids.get(variant)
+            row = None
+            if variant_id is not None and len(self._hashes):
+                # Expired rows stay in the arrays until the next reload; never pick one
+                live = (self._variants == variant_id) & (self._created >= time.time() - self.ttl)
+                distances = np.where(live, hamming(self._hashes, image_hash), 65)
+                best = int(np.argmin(distances))
+                if distances[best] <= self.max_distance:
+                    row = conn.execute(
+                        "SELECT value, created_at FROM image_results WHERE id = ?", (int(self._ids[best]),)
+                    ).fetchone()
+                    if row is not None and row[1] < time.time() - self.ttl:
+                        row = None
+            if row is None:
+                self._misses += 1
+                return None
+            conn.execute(
+                "UPDATE image_results SET last_used = ? WHERE id = ?", (time.time(), int(self._ids[best]))
+            )
+            conn.commit()
+            self._hits += 1
+            return json.loads(row[0]), int(distances[best])
+
+    def set(self, image_hash: int, variant: str, value: Any):
+        """Store a result for an image hash."""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                "INSERT INTO image_results (hash, variant, value, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self._signed(image_hash), variant, json.dumps(value), now, now)
+            )
+            self._stored += 1
+            if len(self._ids) >= self.max_entries:
+                conn.execute("DELETE FROM image_results WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM image_results WHERE id IN ("
+                    "SELECT id FROM image_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries - self.max_entries // 10,)
+                )
+                conn.commit()
+                self._reload()
+                return
+            conn.commit()
+            self._sync()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM image_results")
+            conn.commit()
+            self._reload()
+
+    def get_metrics(self) -> dict:
+        """Get hit rate and size."""
+        total = self._hits + self._misses
+        return {
+            "entries": len(self._ids),
+            "hits": self._hits,
+            "misses": self._misses,
+            "stored": self._stored,
+            "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            "max_distance": self.max_distance,
+        }
+
+
+damage_result_cache = ImageResultCache(
+    settings.damage_cache_path,
+    max_entries=settings.damage_cache_max_entries,
+    max_distance=settings.damage_cache_max_distance,
+    ttl=settings.damage_cache_ttl
+)
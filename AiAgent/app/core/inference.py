@@ -0,0 +1,113 @@
+"""Shared executor for blocking model inference."""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+
+
+class QueueFullError(RuntimeError):
+    """Raised when inference work cannot be accepted; surfaced as HTTP 429."""
+
+
+class InferenceExecutor:
+    """
+    Run synchronous model calls off the event loop.
+
+    Each model gets its own bounded thread pool so a slow model cannot starve
+    the others. Work beyond `concurrency + queue_size` in flight for a model is
+    rejected with `QueueFullError` instead of piling up behind it.
+
+    Threads are used rather than processes: torch releases the GIL inside its
+    kernels, and models stay loaded once per worker instead of once per child.
+    """
+
+    def __init__(
+        self,
+        default_concurrency: int = 1,
+        queue_size: int = 32,
+        model_concurrency: dict[str, int] | None = None
+    ):
+        self.default_concurrency = max(1, default_concurrency)
+        self.queue_size = max(0, queue_size)
+        self.model_concurrency = model_concurrency or {}
+
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._in_flight: dict[str, int] = {}
+        self._completed: dict[str, int] = {}
+        self._rejected: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _concurrency(self, model: str) -> int:
+        return max(1, self.model_concurrency.get(model, self.default_concurrency))
+
+    def _get_pool(self, model: str) -> ThreadPoolExecutor:
+        """Get or create the thread pool for a model."""
+        with self._lock:
+            if model not in self._pools:
+                self._pools[model] = ThreadPoolExecutor(
+                    max_workers=self._concurrency(model),
+                    thread_name_prefix=f"inference-{model}"
+                )
+            return self._pools[model]
+
+    async def run(self, model: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the model's pool and await the result.
+
+        Raises:
+            QueueFullError: If the model already has its maximum work in flight
+        """
+        limit = self._concurrency(model) + self.queue_size
+        pool = self._get_pool(model)
+        with self._lock:
+            if self._in_flight.get(model, 0) >= limit:
+                self._rejected[model] = self._rejected.get(model, 0) + 1
+                raise QueueFullError(f"{model} inference is saturated ({limit} requests in flight)")
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._in_flight[model] -= 1
+            raise
+        # Free the slot when the call ends, not when the caller stops waiting: cancelling
+        # the caller leaves a started call running on the thread
+        future.add_done_callback(functools.partial(self._finished, model))
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, model: str, future):
+        """Release a model's slot once its work is done (runs on the worker thread)."""
+        with self._lock:
+            self._in_flight[model] -= 1
+            self._completed[model] = self._completed.get(model, 0) + 1
+
+    def get_metrics(self) -> dict:
+        """Get per-model concurrency and back-pressure metrics."""
+        return {
+            model: {
+                "concurrency": self._concurrency(model),
+                "in_flight": self._in_flight.get(model, 0),
+                "completed": self._completed.get(model, 0),
+                "rejected": self._rejected.get(model, 0),
+            }
+            for model in self._pools
+        }
+
+    def shutdown(self):
+        """Shut down all model pools."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        # Cancelled futures run `_finished` on this thread, which takes the lock
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+inference_executor = InferenceExecutor(
+    default_concurrency=settings.inference_concurrency,
+    queue_size=settings.inference_queue_size,
+    model_concurrency=settings.inference_model_concurrency
+)
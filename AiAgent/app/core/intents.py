@@ -0,0 +1,113 @@
+"""Keyword-based intent matching."""
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+@dataclass
+class IntentMatch:
+    """Intents found in one message, scored by the weights of their matched terms."""
+    scores: dict[str, float] = field(default_factory=dict)
+    terms: dict[str, list[str]] = field(default_factory=dict)
+    _order: dict[str, int] = field(default_factory=dict, repr=False)
+
+    def has(self, *intents: str) -> bool:
+        """Check whether any of the intents matched."""
+        return any(intent in self.scores for intent in intents)
+
+    def best(self, intents: Optional[Iterable[str]] = None, default: Optional[str] = None) -> Optional[str]:
+        """Highest scoring intent, optionally among `intents`; ties go to the one added first."""
+        candidates = self.scores if intents is None else [i for i in intents if i in self.scores]
+        if not candidates:
+            return default
+        return min(candidates, key=lambda i: (-self.scores[i], self._order.get(i, 0)))
+
+    def ranked(self) -> list[tuple[str, float]]:
+        """All matched intents, highest score first."""
+        return sorted(self.scores.items(), key=lambda item: (-item[1], self._order.get(item[0], 0)))
+
+
+class IntentIndex:
+    """
+    Map words and phrases to intents with one dictionary lookup per token.
+
+    Terms are registered once; a message is tokenized once and each token
+    (plus a few suffix-stripped forms, so "brakes" and "overheating" match
+    "brake" and "overheat") is looked up in a term->intent map. Phrases are
+    indexed by their first word and confirmed against the following tokens.
+    Matching cost depends on the message length, not the number of intents.
+    Unlike substring search, terms only match whole words ("ac" does not
+    match "back").
+    """
+
+    def __init__(self):
+        self._words: dict[str, list[tuple[str, str, float]]] = {}
+        self._phrases: dict[str, list[tuple[tuple[str, ...], str, str, float]]] = {}
+        self._order: dict[str, int] = {}
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        return _TOKEN_PATTERN.findall(text.lower())
+
+    @staticmethod
+    def variants(token: str) -> tuple[str, ...]:
+        """The token and its likely base forms."""
+        forms = [token]
+        if len(token) > 4 and token.endswith("ies"):
+            forms.append(token[:-3] + "y")
+        elif len(token) > 3 and token.endswith("es"):
+            forms += [token[:-1], token[:-2]]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            forms.append(token[:-1])
+        for suffix in ("ing", "ed"):
+            base = token[:-len(suffix)]
+            if token.endswith(suffix) and len(base) >= 3:
+                forms += [base, base + "e"]
+                if base[-1] == base[-2]:
+                    forms.append(base[:-1])  # stopping -> stop
+        return tuple(forms)
+
+    def add(self, intent: str, terms: Iterable[str], weight: float = 1.0):
+        """Register words or phrases for an intent."""
+        self._order.setdefault(intent, len(self._order))
+        for term in terms:
+            tokens = tuple(self.tokenize(term))
+            if not tokens:
+                continue
+            if len(tokens) == 1:
+                self._words.setdefault(tokens[0], []).append((intent, term, weight))
+            else:
+                self._phrases.setdefault(tokens[0], []).append((tokens[1:], intent, term, weight))
+
+    def add_all(self, intents: dict[str, Iterable[str]], weight: float = 1.0):
+        """Register several intents at once."""
+        for intent, terms in intents.items():
+            self.add(intent, terms, weight)
+
+    def match(self, text: str) -> IntentMatch:
+        """Find every intent in `text` in a single pass over its tokens."""
+        forms = [self.variants(token) for token in self.tokenize(text)]
+        found: dict[str, dict[str, float]] = {}
+
+        for i, token_forms in enumerate(forms):
+            for form in token_forms:
+                for intent, term, weight in self._words.get(form, ()):
+                    found.setdefault(intent, {})[term] = weight
+                for rest, intent, term, weight in self._phrases.get(form, ()):
+                    following = forms[i + 1:i + 1 + len(rest)]
+                    if len(following) == len(rest) and all(
+                        word in candidates for word, candidates in zip(rest, following)
+                    ):
+                        found.setdefault(intent, {})[term] = weight
+
+        return IntentMatch(
+            scores={intent: sum(terms.values()) for intent, terms in found.items()},
+            terms={intent: list(terms) for intent, terms in found.items()},
+            _order=self._order
+        )
+
+    def __len__(self) -> int:
+        """Number of registered intents."""
+        return len(self._order)
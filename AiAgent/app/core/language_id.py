@@ -0,0 +1,261 @@
+"""Character n-gram language identification."""
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_PROFILES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "resources", "language_profiles.json"
+)
+
+SCRIPTS = ["other", "latin", "cyrillic", "hebrew", "arabic", "hangul", "kana", "han"]
+
+# (first, last code point, script)
+_SCRIPT_RANGES = [
+    (0x0041, 0x005A, "latin"),
+    (0x0061, 0x007A, "latin"),
+    (0x00C0, 0x00D6, "latin"),
+    (0x00D8, 0x00F6, "latin"),
+    (0x00F8, 0x024F, "latin"),
+    (0x0400, 0x04FF, "cyrillic"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x3040, 0x30FF, "kana"),
+    (0x3130, 0x318F, "hangul"),
+    (0x3400, 0x4DBF, "han"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "hangul"),
+]
+
+# Scripts used by exactly one supported language
+SCRIPT_LANGUAGES = {
+    "cyrillic": "ru",
+    "hebrew": "he",
+    "arabic": "ar",
+    "hangul": "ko",
+}
+
+# Latin-1 and Latin Extended-A/B; everything above maps to a word boundary
+_LATIN_LIMIT = 0x250
+
+
+@dataclass
+class LanguagePrediction:
+    language: str
+    confidence: float
+    script: str
+
+
+class LanguageIdentifier:
+    """
+    Identify the language of texts from their script and character n-grams.
+
+    Each text is converted to code points once. From that array the script of
+    every character and the 1- to 3-gram ids of the Latin letters are computed
+    with vectorized numpy operations, and the n-grams are scored against
+    per-language log-probability profiles. Non-Latin languages are decided by
+    their script (kana marks Japanese, Han without kana Chinese); Latin-script
+    languages by the n-gram scores. A batch of texts is scored in one pass
+    over their concatenation.
+
+    Lookups go through a dense gram id -> profile row table built once, and
+    ASCII text is read as bytes. Still, every call pays a fixed cost per
+    numpy operation, so `detect` on a single short text is several times
+    slower than a plain Python scorer; `detect_batch` amortizes that cost
+    and is the path to use for throughput (translator.detect_language_batch
+    does).
+    """
+
+    def __init__(self, profiles_path: str = "", default_language: str = "en"):
+        self.default_language = default_language
+        with open(profiles_path or DEFAULT_PROFILES_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.max_order: int = data["max_order"]
+        self.languages: list[str] = list(data["profiles"])
+
+        # Code 0 is a word boundary, then the profile alphabet, then any other Latin letter
+        alphabet = data["alphabet"]
+        self._base = len(alphabet) + 2
+        other_letter = len(alphabet) + 1
+        codes = {ch: i + 1 for i, ch in enumerate(alphabet)}
+        # One extra entry, a boundary, for every code point past the Latin range
+        self._char_codes = np.zeros(_LATIN_LIMIT + 1, dtype=np.int64)
+        for cp in range(_LATIN_LIMIT):
+            ch = chr(cp)
+            if ch in codes:
+                self._char_codes[cp] = codes[ch]
+            elif ch.isalpha():
+                self._char_codes[cp] = other_letter
+
+        edges: dict[int, int] = {}
+        for first, last, script in _SCRIPT_RANGES:
+            edges.setdefault(last + 1, 0)
+        for first, last, script in _SCRIPT_RANGES:
+            edges[first] = SCRIPTS.index(script)
+        edges.setdefault(0, 0)
+        self._script_edges = np.array(sorted(edges), dtype=np.int64)
+        self._edge_scripts = np.array([edges[e] for e in sorted(edges)], dtype=np.int64)
+
+        # One row per distinct n-gram, one column per language; row 0 stays zero
+        # for n-grams outside the profiles, which would add the same floor to
+        # every language
+        floor = {int(order): value for order, value in data["floor"].items()}
+        grams = sorted({gram for profile in data["profiles"].values() for gram in profile})
+        self._weights = np.zeros((len(grams) + 1, len(self.languages)), dtype=np.float32)
+        for column, lang in enumerate(self.languages):
+            profile = data["profiles"][lang]
+            for row, gram in enumerate(grams, start=1):
+                self._weights[row, column] = profile.get(gram, floor[len(gram)])
+
+        # Dense n-gram id -> row table, so scoring is one gather per order
+        self._rows = np.zeros(sum(self._base ** n for n in range(1, self.max_order + 1)), dtype=np.int32)
+        for row, gram in enumerate(grams, start=1):
+            self._rows[self._gram_id([codes[ch] if ch != " " else 0 for ch in gram])] = row
+
+    def _gram_id(self, codes: list[int]) -> int:
+        """Unique id of an n-gram; ids of different lengths never collide."""
+        base = self._base
+        offset = sum(base ** n for n in range(1, len(codes)))
+        value = 0
+        for code in codes:
+            value = value * base + code
+        return offset + value
+
+    def _to_points(self, text: str) -> np.ndarray:
+        """Code points of a text framed by word boundaries (bytes when it is ASCII)."""
+        if text.isascii():
+            return np.frombuffer(("\x00" + text + "\x00").encode("ascii"), dtype=np.uint8)
+        return np.frombuffer(("\x00" + text + "\x00").encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+    def _scripts(self, points: np.ndarray) -> np.ndarray:
+        return self._edge_scripts[np.searchsorted(self._script_edges, points, side="right") - 1]
+
+    def _codes(self, points: np.ndarray) -> np.ndarray:
+        """Alphabet code of every code point; 0 for boundaries and non-Latin characters."""
+        if points.dtype == np.uint8:
+            return self._char_codes[points]
+        return self._char_codes[np.minimum(points, _LATIN_LIMIT)]
+
+    def _gram_rows(self, codes: np.ndarray) -> list[np.ndarray]:
+        """
+        Profile rows (0 if unknown) of every n-gram, one array per order.
+
+        Element i of the array for order n is the n-gram ending at position
+        i + n - 1.
+        """
+        base = self._base
+        rows = [self._rows[codes]]
+        value = codes
+        offset = 0
+        for n in range(2, self.max_order + 1):
+            offset += base ** (n - 1)
+            value = value[:-1] * base + codes[n - 1:]
+            rows.append(self._rows[offset + value])
+        return rows
+
+    def detect(self, text: str) -> LanguagePrediction:
+        """Identify the language of one text."""
+        points = self._to_points(text.lower())
+        codes = self._codes(points)
+        if points.dtype == np.uint8:
+            # ASCII: every letter is Latin
+            if not codes.any():
+                return LanguagePrediction(self.default_language, 0.0, "other")
+            share = 1.0
+        else:
+            script_counts = np.bincount(self._scripts(points), minlength=len(SCRIPTS)).tolist()
+            prediction = self._decide_by_script(script_counts)
+            if prediction is not None:
+                return prediction
+            share = script_counts[1] / sum(script_counts[1:])
+        rows = np.concatenate(self._gram_rows(codes))
+        if not rows.any():
+            return LanguagePrediction(self.default_language, 0.0, "latin")
+        best, probability = self._posteriors(self._weights[rows].sum(axis=0, keepdims=True))
+        return LanguagePrediction(self.languages[int(best[0])], round(float(probability[0] * share), 4), "latin")
+
+    def detect_batch(self, texts: list[str]) -> list[LanguagePrediction]:
+        """Identify the language of many texts in one vectorized pass."""
+        if len(texts) < 2:
+            # The batch bookkeeping costs more than it saves for a single text
+            return [self.detect(text) for text in texts]
+        count = len(texts)
+        lowered = [text.lower() for text in texts]
+
+        # Texts share the boundary between them; each belongs to the text before it
+        points = self._to_points("\x00".join(lowered))
+        bounds = np.concatenate(([0], 1 + np.cumsum([len(text) + 1 for text in lowered])))
+        codes = self._codes(points)
+
+        if points.dtype == np.uint8:
+            letters = np.concatenate(([0], np.cumsum(codes > 0)))
+            script_counts = np.zeros((count, len(SCRIPTS)), dtype=np.int64)
+            script_counts[:, 1] = letters[bounds[1:]] - letters[bounds[:-1]]
+        else:
+            segments = np.repeat(np.arange(count), np.diff(bounds))
+            script_counts = np.bincount(
+                segments * len(SCRIPTS) + self._scripts(points), minlength=count * len(SCRIPTS)
+            ).reshape(count, len(SCRIPTS))
+
+        # Per-position totals of the n-grams ending there, then per-text sums from
+        # a running total (float64, so long batches keep their precision)
+        totals = np.zeros((len(points) + 1, len(self.languages)), dtype=np.float64)
+        known = np.zeros(len(points) + 1, dtype=np.int64)
+        for n, rows in enumerate(self._gram_rows(codes), start=1):
+            totals[n:] += self._weights[rows]
+            known[n:] += rows > 0
+        np.cumsum(totals, axis=0, out=totals)
+        np.cumsum(known, out=known)
+        scores = totals[bounds[1:]] - totals[bounds[:-1]]
+        gram_counts = known[bounds[1:]] - known[bounds[:-1]]
+        best, probability = self._posteriors(scores)
+        share = script_counts[:, 1] / np.maximum(script_counts[:, 1:].sum(axis=1), 1)
+
+        # Python lists from here on: indexing numpy scalars per text is slow
+        counts, gram_counts = script_counts.tolist(), gram_counts.tolist()
+        best, confidence = best.tolist(), (probability * share).tolist()
+        predictions = []
+        for i in range(count):
+            prediction = self._decide_by_script(counts[i])
+            if prediction is None:
+                prediction = (
+                    LanguagePrediction(self.languages[best[i]], round(confidence[i], 4), "latin")
+                    if gram_counts[i] else LanguagePrediction(self.default_language, 0.0, "latin")
+                )
+            predictions.append(prediction)
+        return predictions
+
+    def _decide_by_script(self, script_counts: list[int]) -> Optional[LanguagePrediction]:
+        """Decide from the script alone, or return None for Latin-script text."""
+        latin, cyrillic, hebrew, arabic, hangul, kana, han = script_counts[1:]
+        letters = latin + cyrillic + hebrew + arabic + hangul + kana + han
+        if letters == 0:
+            return LanguagePrediction(self.default_language, 0.0, "other")
+
+        # Japanese mixes kana with Han characters, so weigh them together
+        cjk = kana + han
+        others = {"cyrillic": cyrillic, "hebrew": hebrew, "arabic": arabic, "hangul": hangul}
+        dominant = max(others, key=others.get)
+        top = max(cjk, others[dominant])
+        if latin >= top:
+            return None
+        if cjk == top:
+            return LanguagePrediction("ja" if kana else "zh", round(cjk / letters, 4), "kana" if kana else "han")
+        return LanguagePrediction(SCRIPT_LANGUAGES[dominant], round(top / letters, 4), dominant)
+
+    def _posteriors(self, scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Best Latin-script language per row of n-gram scores and its probability."""
+        # Overlapping 1-, 2- and 3-grams count each character about three times,
+        # so temper the naive Bayes posterior before normalizing
+        tempered = scores / self.max_order
+        probabilities = np.exp(tempered - tempered.max(axis=1, keepdims=True))
+        best = probabilities.argmax(axis=1)
+        return best, probabilities[np.arange(len(best)), best] / probabilities.sum(axis=1)
+
+
+language_identifier = LanguageIdentifier()
@@ -0,0 +1,183 @@
+"""Central registry for loaded ML models."""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class _LoadedModel:
+    model: Any
+    size_bytes: int
+    load_seconds: float
+    last_used: float
+
+
+def _current_rss() -> int:
+    """Resident set size of this process in bytes (Linux), or 0."""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except Exception:
+        return 0
+
+
+def _estimate_size(model: Any) -> int:
+    """Estimate a model's memory from its torch parameters and buffers."""
+    module = getattr(model, "model", model)
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Load each model once and keep resident models within a memory budget.
+
+    Models are keyed by name (usually the HuggingFace model id), so services
+    asking for the same model share one instance. Concurrent requests for a
+    model that is still loading wait for that load instead of starting their
+    own. When the resident total exceeds the budget, the least recently used
+    models are dropped and will be reloaded on next use. Failed loads are
+    remembered for `retry_seconds` so a missing model is not retried on every
+    request.
+    """
+
+    def __init__(self, memory_budget_mb: int = 4096, retry_seconds: int = 300):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.retry_seconds = retry_seconds
+
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._models: OrderedDict[str, _LoadedModel] = OrderedDict()
+        self._failed: dict[str, float] = {}
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register how to load a model without loading it."""
+        self._loaders.setdefault(name, loader)
+
+    def get(self, name: str, loader: Optional[Callable[[], Any]] = None) -> Optional[Any]:
+        """
+        Get a loaded model, loading it if needed (blocking).
+
+        Args:
+            name: Model key
+            loader: Loader to use if `name` was not registered
+
+        Returns None if the model cannot be loaded.
+        """
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                entry.last_used = time.time()
+                self._hits += 1
+                return entry.model
+            if time.time() - self._failed.get(name, 0) < self.retry_seconds:
+                return None
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+            if loader is not None:
+                self._loaders.setdefault(name, loader)
+            loader = self._loaders.get(name)
+
+        if loader is None:
+            return None
+
+        with load_lock:
+            # Another thread may have finished the load while we waited
+            with self._lock:
+                entry = self._models.get(name)
+                if entry is not None:
+                    self._models.move_to_end(name)
+                    entry.last_used = time.time()
+                    self._hits += 1
+                    return entry.model
+
+            rss_before = _current_rss()
+            started = time.perf_counter()
+            try:
+                model = loader()
+            except Exception:
+                model = None
+            if model is None:
+                with self._lock:
+                    self._failed[name] = time.time()
+                return None
+
+            size = _estimate_size(model) or max(0, _current_rss() - rss_before)
+            with self._lock:
+                self._failed.pop(name, None)
+                self._models[name] = _LoadedModel(
+                    model=model,
+                    size_bytes=size,
+                    load_seconds=time.perf_counter() - started,
+                    last_used=time.time()
+                )
+                self._loads += 1
+                self._evict(keep=name)
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a model is currently resident."""
+        return name in self._models
+
+    def _evict(self, keep: str):
+        """Drop least recently used models until within budget. Caller holds the lock."""
+        total = sum(m.size_bytes for m in self._models.values())
+        for name in list(self._models):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            evicted = self._models.pop(name)
+            total -= evicted.size_bytes
+            self._evictions += 1
+
+    def unload(self, name: str):
+        """Drop a model from memory."""
+        with self._lock:
+            self._models.pop(name, None)
+
+    def warm_up(self, names: list[str]) -> dict[str, bool]:
+        """Load registered models ahead of the first request (blocking)."""
+        return {name: self.get(name) is not None for name in names}
+
+    def get_metrics(self) -> dict:
+        """Get resident models and memory usage."""
+        with self._lock:
+            models = {
+                name: {
+                    "size_mb": round(m.size_bytes / 1024 / 1024, 1),
+                    "load_seconds": round(m.load_seconds, 2),
+                    "last_used": m.last_used,
+                }
+                for name, m in self._models.items()
+            }
+            total = sum(m.size_bytes for m in self._models.values())
+        return {
+            "models": models,
+            "resident_mb": round(total / 1024 / 1024, 1),
+            "budget_mb": round(self.memory_budget / 1024 / 1024, 1),
+            "hits": self._hits,
+            "loads": self._loads,
+            "evictions": self._evictions,
+            "failed": sorted(self._failed),
+        }
+
+
+model_registry = ModelRegistry(
+    memory_budget_mb=settings.model_memory_budget_mb,
+    retry_seconds=settings.model_load_retry_seconds
+)
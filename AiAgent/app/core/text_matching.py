@@ -0,0 +1,135 @@
+"""Multi-keyword text matching."""
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+def _is_word_char(ch: str) -> bool:
+    """Match the regex definition of a word character."""
+    return ch.isalnum() or ch == "_"
+
+
+@dataclass
+class KeywordScan:
+    """Result of scanning a text with a `KeywordAutomaton`."""
+    matches: dict[str, list[tuple[int, int]]] = field(default_factory=dict)  # category -> (start, end) spans
+    upper_count: int = 0
+    counted_chars: int = 0
+
+    def has(self, category: str) -> bool:
+        return bool(self.matches.get(category))
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton for finding many keywords in one pass.
+
+    Keywords are matched case-insensitively and grouped into categories. A
+    whole-word keyword only matches between word boundaries (like `\\bword\\b`);
+    other keywords match anywhere as substrings. Scanning costs one step per
+    character regardless of how many keywords are loaded.
+    """
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Per state: (category, keyword length, whole_word) for every keyword ending here
+        self._output: list[list[tuple[str, int, bool]]] = [[]]
+        self._built = False
+
+    def add(self, keyword: str, category: str, whole_word: bool = False):
+        """Add a keyword under a category."""
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((category, len(keyword), whole_word))
+        self._built = False
+
+    def add_all(self, keywords: Iterable[str], category: str, whole_word: bool = False):
+        """Add several keywords under one category."""
+        for keyword in keywords:
+            self.add(keyword, category, whole_word)
+
+    def build(self):
+        """Compute failure links. Called automatically before the first scan."""
+        queue = []
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                # Inherit matches that end at the suffix state
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+
+    def scan(self, text: str, count_chars: str = "") -> KeywordScan:
+        """
+        Find every keyword in `text` in a single traversal.
+
+        The same loop also counts uppercase characters and occurrences of any
+        character in `count_chars`, so callers needing those statistics do not
+        have to walk the text again.
+        """
+        if not self._built:
+            self.build()
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Some characters expand when lowercased; keep offsets aligned
+            lowered = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+        goto, fail, output = self._goto, self._fail, self._output
+        root = goto[0]
+        matches: dict[str, list[tuple[int, int]]] = {}
+        upper_count = 0
+        counted = 0
+        state = 0
+        n = len(text)
+
+        for i, (ch, original) in enumerate(zip(lowered, text)):
+            # Cheap path for ASCII: only characters changed by lower() can be uppercase
+            if ch != original:
+                if original.isupper():
+                    upper_count += 1
+            elif original > "\x7f" and original.isupper():
+                upper_count += 1
+            if original in count_chars:
+                counted += 1
+
+            if state == 0:
+                state = root.get(ch, 0)
+            else:
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+
+            if output[state]:
+                for category, length, whole_word in output[state]:
+                    start = i - length + 1
+                    if whole_word and (
+                        (start > 0 and _is_word_char(text[start - 1]))
+                        or (i + 1 < n and _is_word_char(text[i + 1]))
+                    ):
+                        continue
+                    matches.setdefault(category, []).append((start, i + 1))
+
+        return KeywordScan(matches=matches, upper_count=upper_count, counted_chars=counted)
+
+    def __len__(self) -> int:
+        """Number of automaton states."""
+        return len(self._goto)
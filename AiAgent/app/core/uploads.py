@@ -0,0 +1,72 @@
+"""Bounded upload handling: early size checks and spooling to disk."""
+import json
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds its size limit; surfaced as HTTP 413."""
+
+
+class UploadLimitMiddleware:
+    """
+    Reject requests whose declared body size exceeds a per-path limit.
+
+    `limits` maps path prefixes to a maximum `Content-Length` in bytes; the
+    longest matching prefix applies. The check runs before the body is read, so an oversize upload is refused
+    without being received or spooled. Chunked requests carry no length and
+    pass through; `spool_upload` still caps each file.
+    """
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            prefix = max(
+                (prefix for prefix in self.limits if scope["path"].startswith(prefix)), key=len, default=None
+            )
+            if prefix is not None:
+                limit = self.limits[prefix]
+                length = dict(scope["headers"]).get(b"content-length")
+                if length is not None and length.isdigit() and int(length) > limit:
+                    body = json.dumps({"detail": f"Request too large (max {limit // (1024 * 1024)}MB)"}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 413,
+                        "headers": [(b"content-type", b"application/json"), (b"connection", b"close")],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+        await self.app(scope, receive, send)
+
+
+def spool_upload(source: BinaryIO, max_bytes: int, directory: Optional[str] = None) -> tuple[str, int]:
+    """
+    Copy a file object to a temporary file in fixed-size chunks (blocking).
+
+    At most one chunk is held in memory. Returns the temp file path and its
+    size; the caller deletes the file.
+
+    Raises:
+        UploadTooLargeError: If the data exceeds `max_bytes` (nothing is left on disk)
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=directory or None)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, size
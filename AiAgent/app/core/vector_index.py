@@ -0,0 +1,619 @@
+"""In-memory vector indexes for cosine similarity search."""
+import json
+import os
+import threading
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+# (entity_type, entity_id, score)
+SearchHit = tuple[str, str, float]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the `k` highest scores in each row, best first."""
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.intp)
+    if k == scores.shape[1]:
+        return np.argsort(-scores, axis=1, kind="stable")
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _write_index(path: str, vectors: np.ndarray, sidecar: dict, arrays: Optional[dict[str, np.ndarray]] = None):
+    """
+    Write an index as `path` (.npy matrix), `path`.json and `path`.<name>.npy extras.
+
+    Every file is written under a temporary name before any is replaced, and
+    `load_index` checks that the matrix and sidecar agree.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    files = {path: vectors, **{f"{path}.{name}.npy": array for name, array in (arrays or {}).items()}}
+    for target, array in files.items():
+        with open(target + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(array, dtype=np.float32))
+    with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+        json.dump(sidecar, f)
+    for target in files:
+        os.replace(target + ".tmp", target)
+    os.replace(path + ".json.tmp", path + ".json")
+
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: unit-length centroids that maximize cosine similarity."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(vectors, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[np.argsort(assignment, kind="stable")], starts[filled])
+        # Re-seed empty clusters from random points
+        empty = np.flatnonzero(~filled)
+        sums[empty] = vectors[rng.choice(len(vectors), size=len(empty))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+    """Nearest centroid of each vector, in chunks to bound memory."""
+    assignment = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), chunk_size):
+        assignment[start:start + chunk_size] = np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+    return assignment
+
+
+class ExactIndex:
+    """
+    Brute-force cosine search over one contiguous float32 matrix.
+
+    Rows are L2-normalized on insert, so a query is a single matrix-vector
+    product followed by a partial sort. Each row is keyed by
+    (entity_type, entity_id); re-adding a key overwrites its row and removing
+    one moves the last row into its place, so the matrix never has holes.
+    `save` writes the matrix as a `.npy` file with a JSON sidecar of keys, and
+    `load` memory-maps it read-only: the first write copies it into a growable
+    in-memory buffer.
+    """
+
+    kind = "exact"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._types = np.empty(0, dtype=np.int32)
+        self._keys: list[tuple[str, str]] = []
+        self._positions: dict[tuple[str, str], int] = {}
+        self._type_codes: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._positions
+
+    def _type_code(self, entity_type: str) -> int:
+        return self._type_codes.setdefault(entity_type, len(self._type_codes))
+
+    def _reserve(self, extra: int):
+        """Make room for `extra` more rows in a writable buffer."""
+        size = len(self._keys)
+        needed = size + extra
+        if self._vectors.flags.writeable and needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), 1024)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[:size] = self._vectors[:size]
+        types = np.empty(capacity, dtype=np.int32)
+        types[:size] = self._types[:size]
+        self._vectors, self._types = vectors, types
+
+    def add(self, keys: list[tuple[str, str]], vectors: np.ndarray):
+        """Insert or overwrite rows."""
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(keys), self.dim):
+            raise ValueError(f"expected {len(keys)} vectors of dimension {self.dim}")
+        with self._lock:
+            # Re-adding identical rows is a no-op, so a memory-mapped index stays mapped
+            changed = [
+                (key, vector) for key, vector in zip(keys, vectors)
+                if key not in self._positions
+                or not np.array_equal(self._vectors[self._positions[key]], vector)
+            ]
+            if not changed:
+                return
+            self._reserve(len(changed))
+            for key, vector in changed:
+                row = self._positions.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    self._keys.append(key)
+                    self._positions[key] = row
+                self._vectors[row] = vector
+                self._types[row] = self._type_code(key[0])
+            self.dirty = True
+
+    def remove(self, keys: Iterable[tuple[str, str]]) -> int:
+        """Delete rows, returning how many existed."""
+        removed = 0
+        with self._lock:
+            for key in keys:
+                row = self._positions.pop(key, None)
+                if row is None:
+                    continue
+                if not removed:
+                    self._reserve(0)
+                last = len(self._keys) - 1
+                if row != last:
+                    moved = self._keys[last]
+                    self._vectors[row] = self._vectors[last]
+                    self._types[row] = self._types[last]
+                    self._keys[row] = moved
+                    self._positions[moved] = row
+                self._keys.pop()
+                removed += 1
+            self.dirty = self.dirty or bool(removed)
+        return removed
+
+    def get(self, key: tuple[str, str]) -> Optional[np.ndarray]:
+        """The stored (normalized) vector for a key."""
+        with self._lock:
+            row = self._positions.get(key)
+            return None if row is None else np.array(self._vectors[row])
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        entity_type: Optional[str] = None
+    ) -> list[list[SearchHit]]:
+        """
+        Find the `k` most similar rows for each query vector.
+
+        Args:
+            queries: One vector or a (n, dim) matrix
+            k: Results per query
+            entity_type: Only return rows of this type
+
+        Returns one list of (entity_type, entity_id, score) per query.
+        """
+        queries = normalize_rows(queries)
+        with self._lock:
+            size = len(self._keys)
+            if size == 0 or (entity_type is not None and entity_type not in self._type_codes):
+                return [[] for _ in queries]
+            scores = queries @ self._vectors[:size].T
+            if entity_type is not None:
+                scores[:, self._types[:size] != self._type_codes[entity_type]] = -np.inf
+            hits = top_k(scores, k)
+            hit_scores = np.take_along_axis(scores, hits, axis=1)
+            return [
+                [
+                    (*self._keys[i], score)
+                    for i, score in zip(row_hits.tolist(), row_scores.tolist())
+                    if score != -np.inf
+                ]
+                for row_hits, row_scores in zip(hits, hit_scores)
+            ]
+
+    def save(self, path: str, meta: Optional[dict] = None):
+        """Write the matrix to `path` (.npy) and keys plus `meta` to `path`.json."""
+        with self._lock:
+            _write_index(path, self._vectors[:len(self._keys)], {
+                "kind": self.kind,
+                "dim": self.dim,
+                "keys": self._keys,
+                "meta": meta or {},
+            })
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> tuple[Optional["ExactIndex"], dict]:
+        """Memory-map an index written by `save`. Returns (None, {}) if missing or unreadable."""
+        index, meta = load_index(path)
+        return (index, meta) if isinstance(index, cls) else (None, {})
+
+    @classmethod
+    def _restore(cls, sidecar: dict, vectors: np.ndarray, **params) -> "ExactIndex":
+        keys = [tuple(key) for key in sidecar["keys"]]
+        index = cls(sidecar["dim"])
+        index._vectors = vectors
+        index._keys = keys
+        index._positions = {key: row for row, key in enumerate(keys)}
+        index._types = np.fromiter(
+            (index._type_code(entity_type) for entity_type, _ in keys),
+            dtype=np.int32, count=len(keys)
+        )
+        return index
+
+    def get_metrics(self) -> dict:
+        """Get index size."""
+        return {
+            "kind": self.kind,
+            "vectors": len(self),
+            "dim": self.dim,
+            "memory_mapped": isinstance(self._vectors, np.memmap),
+            "size_mb": round(len(self) * self.dim * 4 / 1024 / 1024, 1),
+        }
+
+
+class _InvertedList:
+    """The vectors of one IVF cluster, with their keys, types and tombstones."""
+
+    def __init__(self, dim: int, vectors: Optional[np.ndarray] = None,
+                 keys: Optional[list] = None, types: Optional[np.ndarray] = None):
+        self.vectors = vectors if vectors is not None else np.empty((0, dim), dtype=np.float32)
+        self.keys: list[Optional[tuple[str, str]]] = keys if keys is not None else []
+        self.types = types if types is not None else np.empty(0, dtype=np.int32)
+        self.alive = np.ones(len(self.keys), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def append(self, key: tuple[str, str], vector: np.ndarray, type_code: int) -> int:
+        """Add a row, copying a memory-mapped or full buffer first. Returns its slot."""
+        slot = len(self.keys)
+        if not self.vectors.flags.writeable or slot >= len(self.vectors):
+            capacity = max(2 * len(self.vectors), 16)
+            vectors = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:slot] = self.vectors[:slot]
+            types = np.empty(capacity, dtype=np.int32)
+            types[:slot] = self.types[:slot]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:slot] = self.alive[:slot]
+            self.vectors, self.types, self.alive = vectors, types, alive
+        self.vectors[slot] = vector
+        self.types[slot] = type_code
+        self.alive[slot] = True
+        self.keys.append(key)
+        return slot
+
+
+class IVFIndex:
+    """
+    Approximate cosine search with an inverted file of k-means clusters (IVF-flat).
+
+    Vectors are grouped by their nearest of `nlist` centroids, each cluster in
+    its own contiguous matrix. A query is compared with the centroids and only
+    the vectors of the `nprobe` closest clusters are scored, so latency grows
+    with nprobe * n / nlist instead of n. Until `train_threshold` vectors
+    are stored there is a single cluster and search is exact; the centroids
+    are trained then and retrained whenever the index has grown fourfold.
+
+    Inserts go straight into their nearest cluster. Deletes (and overwrites)
+    only mark the old row as a tombstone; clusters are compacted once a
+    quarter of the rows are dead. `save` writes the clusters back to back
+    with the centroids alongside; `load` memory-maps them and copies a
+    cluster into memory only when it is written to.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim: int, nlist: int = 0, nprobe: int = 32, train_threshold: int = 10000):
+        self.dim = dim
+        self.nlist = nlist  # 0 = about 4 * sqrt(n) at training time
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._lists = [_InvertedList(dim)]
+        self._locations: dict[tuple[str, str], tuple[int, int]] = {}
+        self._type_codes: dict[str, int] = {}
+        self._tombstones = 0
+        self._training = False
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._locations
+
+    def _type_code(self, entity_type: str) -> int:
+        return self._type_codes.setdefault(entity_type, len(self._type_codes))
+
+    def _kill(self, key: tuple[str, str]):
+        """Tombstone a key's row. Caller holds the lock."""
+        cluster, slot = self._locations.pop(key)
+        inverted = self._lists[cluster]
+        inverted.alive[slot] = False
+        inverted.keys[slot] = None
+        self._tombstones += 1
+
+    def add(self, keys: list[tuple[str, str]], vectors: np.ndarray):
+        """Insert or overwrite rows."""
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(keys), self.dim):
+            raise ValueError(f"expected {len(keys)} vectors of dimension {self.dim}")
+        with self._lock:
+            # Re-adding identical rows is a no-op, so memory-mapped clusters stay mapped
+            changed = [
+                i for i, key in enumerate(keys)
+                if key not in self._locations or not np.array_equal(self._vector(key), vectors[i])
+            ]
+            if not changed:
+                return
+            clusters = (
+                _assign(vectors[changed], self._centroids)
+                if self._centroids is not None else np.zeros(len(changed), dtype=np.intp)
+            )
+            for i, cluster in zip(changed, clusters.tolist()):
+                key = keys[i]
+                if key in self._locations:
+                    self._kill(key)
+                slot = self._lists[cluster].append(key, vectors[i], self._type_code(key[0]))
+                self._locations[key] = (cluster, slot)
+            self.dirty = True
+            self._maybe_compact()
+            size = len(self._locations)
+            retrain = size >= self.train_threshold and not self._training and (
+                self._centroids is None or size >= 4 * self._trained_size
+            )
+        if retrain:
+            self.train()
+
+    def remove(self, keys: Iterable[tuple[str, str]]) -> int:
+        """Tombstone rows, returning how many existed."""
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if key in self._locations:
+                    self._kill(key)
+                    removed += 1
+            if removed:
+                self.dirty = True
+                self._maybe_compact()
+        return removed
+
+    def _maybe_compact(self):
+        """Rebuild the clusters without tombstones once they are a quarter of all rows."""
+        if self._tombstones > 0.25 * (len(self._locations) + self._tombstones):
+            vectors, keys = self._alive_rows()
+            self._build(self._centroids, vectors, keys)
+
+    def _alive_rows(self) -> tuple[np.ndarray, list[tuple[str, str]]]:
+        vectors, keys = [], []
+        for inverted in self._lists:
+            alive = inverted.alive[:len(inverted)]
+            vectors.append(inverted.vectors[:len(inverted)][alive])
+            keys += [key for key in inverted.keys if key is not None]
+        return np.concatenate(vectors) if vectors else np.empty((0, self.dim), np.float32), keys
+
+    def train(self):
+        """
+        Cluster the stored vectors and rebuild the inverted lists (blocking).
+
+        K-means runs on a sample without holding the lock, so searches and
+        writes continue meanwhile; rows added during training are assigned
+        with the new centroids.
+        """
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+            vectors, _ = self._alive_rows()
+        try:
+            if not len(vectors):
+                return
+            nlist = self.nlist or int(4 * np.sqrt(len(vectors)))
+            nlist = max(1, min(nlist, len(vectors)))
+            sample = vectors
+            if len(vectors) > 64 * nlist:
+                rng = np.random.default_rng(0)
+                sample = vectors[rng.choice(len(vectors), size=64 * nlist, replace=False)]
+            centroids = _kmeans(sample, nlist)
+            with self._lock:
+                vectors, keys = self._alive_rows()
+                self._build(centroids, vectors, keys)
+                self._trained_size = len(vectors)
+        finally:
+            self._training = False
+
+    def _build(self, centroids: Optional[np.ndarray], vectors: np.ndarray, keys: list[tuple[str, str]]):
+        """Lay out rows cluster by cluster. Caller holds the lock."""
+        assignment = _assign(vectors, centroids) if centroids is not None else np.zeros(len(vectors), dtype=np.intp)
+        nlist = len(centroids) if centroids is not None else 1
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        types = np.fromiter((self._type_code(key[0]) for key in keys), dtype=np.int32, count=len(keys))
+        self._restore_lists(centroids, vectors[order], [keys[i] for i in order], types[order], offsets)
+        self.dirty = True
+
+    def _restore_lists(self, centroids, vectors, keys, types, offsets):
+        self._centroids = centroids
+        self._lists = [
+            _InvertedList(self.dim, vectors[start:end], keys[start:end], types[start:end])
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        self._locations = {
+            key: (cluster, slot)
+            for cluster, inverted in enumerate(self._lists)
+            for slot, key in enumerate(inverted.keys)
+        }
+        self._tombstones = 0
+
+    def _vector(self, key: tuple[str, str]) -> np.ndarray:
+        cluster, slot = self._locations[key]
+        return self._lists[cluster].vectors[slot]
+
+    def get(self, key: tuple[str, str]) -> Optional[np.ndarray]:
+        """The stored (normalized) vector for a key."""
+        with self._lock:
+            return np.array(self._vector(key)) if key in self._locations else None
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        entity_type: Optional[str] = None,
+        nprobe: Optional[int] = None
+    ) -> list[list[SearchHit]]:
+        """
+        Find approximately the `k` most similar rows for each query vector.
+
+        Args:
+            queries: One vector or a (n, dim) matrix
+            k: Results per query
+            entity_type: Only return rows of this type
+            nprobe: Clusters scanned per query (default `self.nprobe`)
+
+        Returns one list of (entity_type, entity_id, score) per query.
+        """
+        queries = normalize_rows(queries)
+        with self._lock:
+            if not self._locations or (entity_type is not None and entity_type not in self._type_codes):
+                return [[] for _ in queries]
+            type_code = self._type_codes.get(entity_type)
+            if self._centroids is None:
+                probes = np.zeros((len(queries), 1), dtype=np.intp)
+            else:
+                probes = top_k(queries @ self._centroids.T, nprobe or self.nprobe)
+
+            # Score each probed cluster once for all the queries that probe it
+            candidates: list[list[tuple[int, np.ndarray, np.ndarray]]] = [[] for _ in queries]
+            for cluster in np.unique(probes).tolist():
+                inverted = self._lists[cluster]
+                size = len(inverted)
+                if not size:
+                    continue
+                rows = np.flatnonzero((probes == cluster).any(axis=1))
+                scores = queries[rows] @ inverted.vectors[:size].T
+                valid = inverted.alive[:size]
+                if type_code is not None:
+                    valid = valid & (inverted.types[:size] == type_code)
+                scores[:, ~valid] = -np.inf
+                slots = top_k(scores, k)
+                for row, row_slots, row_scores in zip(
+                    rows.tolist(), slots, np.take_along_axis(scores, slots, axis=1)
+                ):
+                    candidates[row].append((cluster, row_slots, row_scores))
+
+            results = []
+            for found in candidates:
+                if not found:
+                    results.append([])
+                    continue
+                clusters = np.concatenate([np.full(len(s), c) for c, s, _ in found])
+                slots = np.concatenate([s for _, s, _ in found])
+                scores = np.concatenate([sc for _, _, sc in found])
+                best = top_k(scores, k)[0]
+                results.append([
+                    (*self._lists[c].keys[s], score)
+                    for c, s, score in zip(clusters[best].tolist(), slots[best].tolist(), scores[best].tolist())
+                    if score != -np.inf
+                ])
+            return results
+
+    def save(self, path: str, meta: Optional[dict] = None):
+        """Write the live rows cluster by cluster, the centroids and a JSON sidecar."""
+        with self._lock:
+            vectors, keys, offsets = [], [], [0]
+            for inverted in self._lists:
+                alive = inverted.alive[:len(inverted)]
+                vectors.append(inverted.vectors[:len(inverted)][alive])
+                keys += [key for key in inverted.keys if key is not None]
+                offsets.append(len(keys))
+            arrays = {"centroids": self._centroids} if self._centroids is not None else {}
+            _write_index(path, np.concatenate(vectors), {
+                "kind": self.kind,
+                "dim": self.dim,
+                "keys": keys,
+                "offsets": offsets,
+                "params": {
+                    "nlist": self.nlist,
+                    "nprobe": self.nprobe,
+                    "train_threshold": self.train_threshold,
+                    "trained_size": self._trained_size,
+                },
+                "meta": meta or {},
+            }, arrays)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> tuple[Optional["IVFIndex"], dict]:
+        """Memory-map an index written by `save`. Returns (None, {}) if missing or unreadable."""
+        index, meta = load_index(path)
+        return (index, meta) if isinstance(index, cls) else (None, {})
+
+    @classmethod
+    def _restore(cls, sidecar: dict, vectors: np.ndarray, path: str = "", **params) -> "IVFIndex":
+        saved = sidecar.get("params", {})
+        index = cls(
+            sidecar["dim"],
+            nlist=params.get("nlist", saved.get("nlist", 0)),
+            nprobe=params.get("nprobe", saved.get("nprobe", 32)),
+            train_threshold=params.get("train_threshold", saved.get("train_threshold", 10000))
+        )
+        index._trained_size = saved.get("trained_size", 0)
+        centroids = np.load(path + ".centroids.npy") if len(sidecar["offsets"]) > 2 else None
+        keys = [tuple(key) for key in sidecar["keys"]]
+        types = np.fromiter((index._type_code(key[0]) for key in keys), dtype=np.int32, count=len(keys))
+        index._restore_lists(centroids, vectors, keys, types, sidecar["offsets"])
+        return index
+
+    def get_metrics(self) -> dict:
+        """Get index size and cluster balance."""
+        sizes = [len(inverted) for inverted in self._lists]
+        return {
+            "kind": self.kind,
+            "vectors": len(self),
+            "dim": self.dim,
+            "lists": len(self._lists),
+            "nprobe": self.nprobe,
+            "largest_list": max(sizes, default=0),
+            "tombstones": self._tombstones,
+            "memory_mapped_lists": sum(isinstance(inverted.vectors, np.memmap) for inverted in self._lists),
+            "size_mb": round(sum(sizes) * self.dim * 4 / 1024 / 1024, 1),
+        }
+
+
+VectorIndex = Union[ExactIndex, IVFIndex]
+INDEX_TYPES = {ExactIndex.kind: ExactIndex, IVFIndex.kind: IVFIndex}
+
+
+def create_index(kind: str, dim: int, **params) -> VectorIndex:
+    """Create an empty index of the given kind ("exact" or "ivf")."""
+    if kind == ExactIndex.kind:
+        return ExactIndex(dim)
+    if kind == IVFIndex.kind:
+        return IVFIndex(dim, **params)
+    raise ValueError(f"Unknown vector index type: {kind}")
+
+
+def load_index(path: str, **params) -> tuple[Optional[VectorIndex], dict]:
+    """
+    Memory-map an index written by `save`, whatever its kind.
+
+    Returns (index, meta), or (None, {}) if the files are missing, unreadable
+    or inconsistent. `params` override the saved search parameters of an IVF
+    index.
+    """
+    try:
+        with open(path + ".json", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        vectors = np.load(path, mmap_mode="r")
+        index_type = INDEX_TYPES.get(sidecar.get("kind"))
+        if index_type is None or vectors.shape != (len(sidecar["keys"]), sidecar["dim"]):
+            return None, {}
+        return index_type._restore(sidecar, vectors, path=path, **params), sidecar.get("meta", {})
+    except (OSError, ValueError, KeyError):
+        return None, {}
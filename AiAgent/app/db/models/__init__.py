@@ -8,3 +8,4 @@ from .training import TrainingDataset, TrainingSample
 from .user import UserPreference
 from .embedding import ModelEmbedding
 from .logs import AIRequestLog
+from .translation import TranslationMemoryEntry
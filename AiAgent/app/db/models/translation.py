@@ -0,0 +1,33 @@
+"""Translation memory model."""
+from sqlalchemy import Column, String, Text, Integer, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+import uuid
+
+from . import Base
+
+
+def generate_uuid():
+    return str(uuid.uuid4())
+
+
+class TranslationMemoryEntry(Base):
+    """Store translated sentences for reuse across requests."""
+    __tablename__ = "translation_memory"
+    __table_args__ = (
+        UniqueConstraint(
+            "source_language", "target_language", "model_used", "sentence_hash", name="uq_translation_memory_route_hash"
+        ),
+    )
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    source_language = Column(String(10), nullable=False)
+    target_language = Column(String(10), nullable=False)
+    sentence_hash = Column(String(64), index=True, nullable=False)
+    
+    source_text = Column(Text, nullable=False)
+    translated_text = Column(Text, nullable=False)
+    model_used = Column(String(255), nullable=False)  # route models joined by "+"
+    
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=func.now())
+    last_used_at = Column(DateTime, default=func.now(), index=True)
@@ -9,3 +9,4 @@ from .content_generator import content_generator_service
 from .backend_client import backend_client
 from .voice_assistant import voice_assistant_service
 from .damage_detection import damage_detection_service
+from .embeddings import embedding_service
@@ -1,8 +1,13 @@
 """Text and Sentiment Analysis Service."""
 from transformers import pipeline
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, AsyncIterator
 import re
+from app.core.batching import BatchScheduler
+from app.core.cache import result_cache
+from app.core.inference import QueueFullError, inference_executor
+from app.core.model_registry import model_registry
+from app.core.config import settings
 
 
 class AnalysisResult(BaseModel):
@@ -21,22 +26,44 @@ class SentimentResult(BaseModel):
 
 class AnalyzerService:
     def __init__(self):
-        self._sentiment_pipeline = None
+        model_registry.register(
+            settings.sentiment_model,
+            lambda: pipeline("sentiment-analysis", model=settings.sentiment_model)
+        )
+        self._sentiment_batcher = BatchScheduler(
+            "sentiment",
+            self._predict_sentiment_batch,
+            max_batch_size=settings.sentiment_batch_size,
+            max_wait_ms=settings.sentiment_batch_wait_ms,
+            max_queue_size=settings.sentiment_queue_size
+        )
     
     def _get_sentiment_pipeline(self):
-        if self._sentiment_pipeline is None:
-            try:
-                self._sentiment_pipeline = pipeline(
-                    "sentiment-analysis",
-                    model="distilbert-base-uncased-finetuned-sst-2-english"
-                )
-            except Exception:
-                self._sentiment_pipeline = None
-        return self._sentiment_pipeline
+        return model_registry.get(settings.sentiment_model)
+    
+    def _predict_sentiment_batch(self, texts: list[str]) -> list[Optional[SentimentResult]]:
+        """Run one forward pass over a batch of texts (blocking)."""
+        pipeline_model = self._get_sentiment_pipeline()
+        if not pipeline_model:
+            return [None] * len(texts)
+        
+        results = pipeline_model(
+            [text[:512] for text in texts],
+            batch_size=len(texts),
+            truncation=True
+        )
+        return [
+            SentimentResult(label=r["label"].lower(), score=round(r["score"], 4))
+            for r in results
+        ]
     
     async def analyze_text(self, text: str) -> AnalysisResult:
         """Perform comprehensive text analysis."""
         sentiment_result = await self.analyze_sentiment(text)
+        return self._build_analysis(text, sentiment_result)
+    
+    def _build_analysis(self, text: str, sentiment_result: SentimentResult) -> AnalysisResult:
+        """Combine a sentiment result with keyword and length statistics."""
         keywords = self._extract_keywords(text)
         
         return AnalysisResult(
@@ -50,20 +77,87 @@ class AnalyzerService:
     
     async def analyze_sentiment(self, text: str) -> SentimentResult:
         """Analyze sentiment of text."""
-        pipeline_model = self._get_sentiment_pipeline()
+        key = result_cache.make_key("sentiment", settings.sentiment_model, text[:512])
+        cached = result_cache.get(key)
+        if cached is not None:
+            return SentimentResult(**cached)
+        
+        try:
+            # Concurrent callers share one forward pass
+            result = await self._sentiment_batcher.submit(text)
+            if result:
+                result_cache.set(key, result.model_dump())
+                return result
+        except QueueFullError:
+            raise
+        except Exception:
+            pass
         
-        if pipeline_model:
+        # Fallback: simple keyword-based sentiment
+        return self._simple_sentiment(text)
+    
+    async def analyze_stream(
+        self,
+        items: AsyncIterator[dict],
+        mode: str = "analyze",
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Analyze a stream of items in model-sized batches.
+        
+        Args:
+            items: Dicts with `id` and `text` (or `error` for unparseable input)
+            mode: "analyze" for full analysis, "sentiment" for sentiment only
+            batch_size: Texts per forward pass
+        
+        Yields one result dict per input item, in input order, as each batch
+        finishes.
+        """
+        batch_size = batch_size or settings.analyzer_bulk_batch_size
+        batch: list[dict] = []
+        
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                for result in await self._analyze_bulk_batch(batch, mode):
+                    yield result
+                batch = []
+        
+        if batch:
+            for result in await self._analyze_bulk_batch(batch, mode):
+                yield result
+    
+    async def _analyze_bulk_batch(self, batch: list[dict], mode: str) -> list[dict]:
+        """Score one bulk batch with a single pipeline call."""
+        valid = [item for item in batch if "error" not in item and item.get("text", "").strip()]
+        texts = [item["text"] for item in valid]
+        
+        sentiments: list[Optional[SentimentResult]] = [None] * len(texts)
+        if texts:
             try:
-                result = pipeline_model(text[:512])[0]
-                return SentimentResult(
-                    label=result["label"].lower(),
-                    score=round(result["score"], 4)
+                # Already batched - bypass the micro-batcher
+                sentiments = await inference_executor.run(
+                    "sentiment", self._predict_sentiment_batch, texts
                 )
+            except QueueFullError:
+                raise
             except Exception:
                 pass
+        scored = {
+            id(item): sentiment or self._simple_sentiment(item["text"])
+            for item, sentiment in zip(valid, sentiments)
+        }
         
-        # Fallback: simple keyword-based sentiment
-        return self._simple_sentiment(text)
+        results = []
+        for item in batch:
+            if id(item) not in scored:
+                results.append({"id": item.get("id"), "error": item.get("error", "Text cannot be empty")})
+            elif mode == "sentiment":
+                results.append({"id": item.get("id"), **scored[id(item)].model_dump()})
+            else:
+                analysis = self._build_analysis(item["text"], scored[id(item)])
+                results.append({"id": item.get("id"), **analysis.model_dump()})
+        return results
     
     def _simple_sentiment(self, text: str) -> SentimentResult:
         """Simple keyword-based sentiment analysis fallback."""
@@ -97,6 +191,14 @@ class AnalyzerService:
         
         sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
         return [word for word, _ in sorted_words[:max_keywords]]
+    
+    def get_metrics(self) -> dict:
+        """Get sentiment batching metrics."""
+        return self._sentiment_batcher.get_metrics()
+    
+    async def close(self):
+        """Stop background batching."""
+        await self._sentiment_batcher.close()
 
 
 analyzer_service = AnalyzerService()
@@ -2,6 +2,7 @@
 from pydantic import BaseModel
 from typing import Optional
 import re
+from app.core.intents import IntentIndex, IntentMatch
 
 
 class CarQuery(BaseModel):
@@ -60,8 +61,14 @@ class CarAssistantService:
         "ac": ["Repairs", "Maintenance"]
     }
     
+    URGENT_TERMS = ["smoke", "leak", "overheat", "won't start", "grinding", "warning light"]
+    
     def __init__(self):
         self._knowledge_base = self._load_knowledge_base()
+        # Categories and urgency signals are matched together in one pass
+        self._intents = IntentIndex()
+        self._intents.add_all(self.ISSUE_PATTERNS)
+        self._intents.add("urgent", self.URGENT_TERMS)
     
     def _load_knowledge_base(self) -> dict:
         """Load car knowledge base."""
@@ -110,10 +117,11 @@ class CarAssistantService:
     
     async def get_advice(self, query: CarQuery) -> CarAdvice:
         """Get AI-powered car advice."""
-        category = self._detect_category(query.question)
+        matches = self._intents.match(query.question)
+        category = self._detect_category(query.question, matches)
         answer = self._generate_answer(query, category)
         services = self.SERVICES.get(category, ["Expert", "Maintenance"])
-        urgency = self._assess_urgency(query.question, category)
+        urgency = self._assess_urgency(query.question, category, matches)
         cost = self._estimate_cost(category)
         
         return CarAdvice(
@@ -178,14 +186,13 @@ class CarAssistantService:
         """Diagnose potential car issues based on symptoms."""
         possible_issues = []
         
-        symptom_text = " ".join(symptoms).lower()
+        matches = self._intents.match(" ".join(symptoms))
         
-        for category, keywords in self.ISSUE_PATTERNS.items():
-            matches = sum(1 for kw in keywords if kw in symptom_text)
-            if matches > 0:
+        for category, score in matches.ranked():
+            if category in self.ISSUE_PATTERNS:
                 possible_issues.append({
                     "category": category,
-                    "likelihood": min(matches * 0.3, 0.9),
+                    "likelihood": min(score * 0.3, 0.9),
                     "description": self._get_issue_description(category),
                     "recommended_action": self._get_recommended_action(category),
                     "services": self.SERVICES.get(category, ["Expert"])
@@ -193,15 +200,10 @@ class CarAssistantService:
         
         return sorted(possible_issues, key=lambda x: x["likelihood"], reverse=True)
     
-    def _detect_category(self, question: str) -> str:
+    def _detect_category(self, question: str, matches: Optional[IntentMatch] = None) -> str:
         """Detect the category of a car question."""
-        question_lower = question.lower()
-        
-        for category, keywords in self.ISSUE_PATTERNS.items():
-            if any(kw in question_lower for kw in keywords):
-                return category
-        
-        return "general"
+        matches = matches or self._intents.match(question)
+        return matches.best(self.ISSUE_PATTERNS, default="general")
     
     def _generate_answer(self, query: CarQuery, category: str) -> str:
         """Generate an answer based on the query."""
@@ -222,12 +224,11 @@ class CarAssistantService:
         
         return answers.get(category, answers["general"])
     
-    def _assess_urgency(self, question: str, category: str) -> str:
+    def _assess_urgency(self, question: str, category: str, matches: Optional[IntentMatch] = None) -> str:
         """Assess the urgency of an issue."""
-        urgent_keywords = ["smoke", "leak", "overheat", "won't start", "grinding", "warning light"]
-        question_lower = question.lower()
+        matches = matches or self._intents.match(question)
         
-        if any(kw in question_lower for kw in urgent_keywords):
+        if matches.has("urgent"):
             return "high"
         
         high_urgency_categories = ["brakes", "cooling", "engine"]
@@ -1,9 +1,20 @@
 """Car Damage Detection Service - Analyze car images for damage."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import BinaryIO, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import base64
 import io
+import multiprocessing
+import os
+import time
+import numpy as np
 from PIL import Image
+from app.core.config import settings
+from app.core.damage_heuristics import CUE_DAMAGE_TYPES, connected_regions, find_damage_regions
+from app.core.image_cache import damage_result_cache, dhash
+from app.core.inference import QueueFullError, inference_executor
+from app.core.model_registry import model_registry
 
 
 class DamageArea(BaseModel):
@@ -14,6 +25,7 @@ class DamageArea(BaseModel):
     confidence: float
     description: str
     estimated_repair_cost: Optional[str] = None
+    bbox: Optional[list[float]] = None  # [x0, y0, x1, y1] as fractions of the image, from tiled scans or image analysis
 
 
 class DamageDetectionResult(BaseModel):
@@ -25,6 +37,32 @@ class DamageDetectionResult(BaseModel):
     total_estimated_cost: Optional[str] = None
     recommendations: list[str]
     confidence: float
+    timing: Optional[dict[str, float]] = None  # ms per stage
+    heatmap: Optional[list[list[float]]] = None  # per-tile damage scores, rows top to bottom
+
+
+def _decode_image(source: Union[bytes, str, BinaryIO], size: int) -> Optional[np.ndarray]:
+    """
+    Decode image bytes or a file to RGB pixels with its shorter side at most `size`.
+    
+    JPEGs are decoded at a reduced scale (1/2 to 1/8) straight from the file
+    with `draft`, so a 12 MP photo never exists at full resolution in memory.
+    Runs in worker processes, so it returns a plain array (cheap to pickle)
+    and None for unreadable data instead of raising.
+    """
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+            image.draft("RGB", (size, size))
+            image = image.convert("RGB")
+    except Exception:
+        return None
+    scale = size / min(image.size)
+    if scale < 1:
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.BILINEAR
+        )
+    return np.asarray(image)
 
 
 class DamageDetectionService:
@@ -59,58 +97,67 @@ class DamageDetectionService:
         "missing": {"minor": "$200-500", "moderate": "$500-1000", "severe": "$1000-2000"},
     }
     
+    # Classifier labels that indicate damage
+    DAMAGE_WORDS = ["damage", "broken", "crack", "dent"]
+    
     def __init__(self):
-        self._model = None
-        self._model_loaded = False
+        model_registry.register(settings.damage_model, self._load_model)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # Metrics
+        self._images = 0
+        self._invalid = 0
+        self._decoded_bytes = 0
+        self._max_request_decoded_bytes = 0
     
     def _load_model(self):
         """Load the damage detection model."""
-        if self._model_loaded:
-            return
-        
-        try:
-            # Try to load a vision model for damage detection
-            from transformers import pipeline
-            self._model = pipeline(
-                "image-classification",
-                model="microsoft/resnet-50"  # Base model, would use fine-tuned for production
-            )
-            self._model_loaded = True
-        except Exception:
-            self._model = None
-            self._model_loaded = True
+        # Try to load a vision model for damage detection
+        from transformers import pipeline
+        return pipeline("image-classification", model=settings.damage_model)
     
     async def detect_damage(
         self, 
-        image_data: bytes,
-        car_part: Optional[str] = None
+        image_data: Union[bytes, str, BinaryIO],
+        car_part: Optional[str] = None,
+        quality: str = "fast"
     ) -> DamageDetectionResult:
         """
         Detect damage in a car image.
         
         Args:
-            image_data: Image bytes (JPEG, PNG)
+            image_data: Image bytes (JPEG, PNG), or the path or file object of a spooled upload
             car_part: Optional specific part to analyze
+            quality: Key of `settings.damage_scan_grids`. A grid of 1 classifies
+                the whole frame; larger grids scan overlapping tiles to locate damage.
         """
-        # Validate image
-        try:
-            image = Image.open(io.BytesIO(image_data))
-            image_valid = True
-        except Exception:
-            return DamageDetectionResult(
-                image_analyzed=False,
-                has_damage=False,
-                overall_condition="unknown",
-                damage_areas=[],
-                recommendations=["Please upload a valid image file (JPEG, PNG)"],
-                confidence=0.0
-            )
+        grid = settings.damage_scan_grids.get(quality, 1)
+        size = settings.damage_decode_size if grid == 1 else settings.damage_scan_decode_size
+        timing: dict[str, float] = {}
+        started = time.perf_counter()
+        pixels = (await self._decode_images([image_data], size))[0]
+        timing["decode"] = (time.perf_counter() - started) * 1000
+        if pixels is None:
+            return self._invalid_image_result()
         
-        # Load model
-        self._load_model()
+        # Re-uploads and near-duplicates of an analyzed photo skip inference
+        if settings.damage_cache_enabled:
+            started = time.perf_counter()
+            image_hash = dhash(pixels)
+            variant = f"{settings.damage_model}|{quality}|{car_part or ''}"
+            cached = await asyncio.to_thread(damage_result_cache.get, image_hash, variant)
+            timing["cache"] = (time.perf_counter() - started) * 1000
+            if cached is not None:
+                result = DamageDetectionResult(**cached[0])
+                result.timing = {stage: round(ms, 2) for stage, ms in timing.items()}
+                return result
         
         # Analyze image
-        damage_areas = await self._analyze_image(image, car_part)
+        heatmap = None
+        if grid == 1:
+            damage_areas = (await self._analyze_images([Image.fromarray(pixels)], [car_part], timing))[0]
+        else:
+            damage_areas, heatmap = await self._scan_image(pixels, car_part, grid, timing)
         
         # Calculate overall condition
         has_damage = len(damage_areas) > 0
@@ -122,52 +169,208 @@ class DamageDetectionService:
         # Generate recommendations
         recommendations = self._generate_recommendations(damage_areas, overall_condition)
         
-        return DamageDetectionResult(
+        result = DamageDetectionResult(
             image_analyzed=True,
             has_damage=has_damage,
             overall_condition=overall_condition,
             damage_areas=damage_areas,
             total_estimated_cost=total_cost,
             recommendations=recommendations,
-            confidence=0.75 if damage_areas else 0.85
+            confidence=0.75 if damage_areas else 0.85,
+            timing={stage: round(ms, 2) for stage, ms in timing.items()},
+            heatmap=heatmap
+        )
+        # Heuristic results from a missing model would outlive its recovery
+        if settings.damage_cache_enabled and model_registry.is_loaded(settings.damage_model):
+            await asyncio.to_thread(
+                damage_result_cache.set, image_hash, variant, result.model_dump(exclude={"timing"})
+            )
+        return result
+    
+    def _invalid_image_result(self) -> DamageDetectionResult:
+        return DamageDetectionResult(
+            image_analyzed=False,
+            has_damage=False,
+            overall_condition="unknown",
+            damage_areas=[],
+            recommendations=["Please upload a valid image file (JPEG, PNG)"],
+            confidence=0.0
         )
     
-    async def _analyze_image(
+    def _get_pool(self) -> tuple[ProcessPoolExecutor, int]:
+        """Get or create the image decoding worker pool."""
+        workers = settings.damage_decode_workers or min(os.cpu_count() or 1, 8)
+        if self._pool is None:
+            # Fork would copy the event loop, its threads and any loaded model into
+            # each worker; forkserver starts them from a clean interpreter
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method)
+            )
+        return self._pool, workers
+    
+    async def _decode_images(
+        self, images: list[Union[bytes, str, BinaryIO]], size: Optional[int] = None
+    ) -> list[Optional[np.ndarray]]:
+        """
+        Decode and downscale images, in parallel processes when there are several.
+
+        File objects can't be sent to a worker process; pass them one at a time.
+        """
+        size = size or settings.damage_decode_size
+        workers = settings.damage_decode_workers or min(os.cpu_count() or 1, 8)
+        if len(images) == 1 or workers == 1:
+            # Nothing to parallelize; skip copying the data to another process
+            decoded = await asyncio.to_thread(lambda: [_decode_image(source, size) for source in images])
+        else:
+            loop = asyncio.get_running_loop()
+            pool, _ = self._get_pool()
+            decoded = list(await asyncio.gather(*(
+                loop.run_in_executor(pool, _decode_image, source, size) for source in images
+            )))
+        
+        decoded_bytes = sum(pixels.nbytes for pixels in decoded if pixels is not None)
+        self._images += len(images)
+        self._invalid += sum(pixels is None for pixels in decoded)
+        self._decoded_bytes += decoded_bytes
+        self._max_request_decoded_bytes = max(self._max_request_decoded_bytes, decoded_bytes)
+        return decoded
+    
+    async def _analyze_images(
         self, 
-        image: Image.Image, 
-        car_part: Optional[str]
-    ) -> list[DamageArea]:
-        """Analyze image for damage using ML model or heuristics."""
-        damage_areas = []
+        images: list[Image.Image], 
+        car_parts: list[Optional[str]],
+        timing: dict[str, float]
+    ) -> list[list[DamageArea]]:
+        """Analyze images for damage using ML model or heuristics, in one batch."""
+        started = time.perf_counter()
+        try:
+            # Use ML model for classification
+            results = await inference_executor.run("damage", self._classify_sync, images)
+        except QueueFullError:
+            raise
+        except Exception:
+            results = None
+        timing["infer"] = (time.perf_counter() - started) * 1000
         
-        if self._model:
-            try:
-                # Use ML model for classification
-                results = self._model(image)
+        all_damage_areas = []
+        for i, (image, car_part) in enumerate(zip(images, car_parts)):
+            damage_areas = []
+            # Process results (this would be more sophisticated with a fine-tuned model)
+            for result in (results[i] if results else [])[:3]:
+                label = result["label"].lower()
+                score = result["score"]
                 
-                # Process results (this would be more sophisticated with a fine-tuned model)
-                for result in results[:3]:
-                    label = result["label"].lower()
-                    score = result["score"]
-                    
-                    # Map generic labels to damage types
-                    if any(word in label for word in ["damage", "broken", "crack", "dent"]):
-                        damage_areas.append(DamageArea(
-                            location=car_part or "unspecified",
-                            damage_type="damage",
-                            severity=self._score_to_severity(score),
-                            confidence=score,
-                            description=f"Detected: {label}",
-                            estimated_repair_cost=self.REPAIR_COSTS.get("dent", {}).get("moderate")
-                        ))
-            except Exception:
-                pass
-        
-        # If no ML results, use image analysis heuristics
-        if not damage_areas:
-            damage_areas = self._heuristic_analysis(image, car_part)
+                # Map generic labels to damage types
+                if any(word in label for word in self.DAMAGE_WORDS):
+                    damage_areas.append(DamageArea(
+                        location=car_part or "unspecified",
+                        damage_type="damage",
+                        severity=self._score_to_severity(score),
+                        confidence=score,
+                        description=f"Detected: {label}",
+                        estimated_repair_cost=self.REPAIR_COSTS.get("dent", {}).get("moderate")
+                    ))
+            
+            # Without a model, fall back to image analysis heuristics; the
+            # model's "no damage" stands, as the cues cannot tell damage from parts
+            if results is None:
+                started = time.perf_counter()
+                damage_areas = self._heuristic_analysis(image, car_part)
+                timing["heuristic"] = timing.get("heuristic", 0.0) + (time.perf_counter() - started) * 1000
+            all_damage_areas.append(damage_areas)
         
-        return damage_areas
+        return all_damage_areas
+    
+    @staticmethod
+    def _tile_boxes(height: int, width: int, grid: int) -> list[tuple[int, int, int, int]]:
+        """(y0, x0, y1, x1) of a grid x grid scan with tiles overlapping by half, row by row."""
+        tile_h, tile_w = 2 * height // (grid + 1), 2 * width // (grid + 1)
+        ys = np.linspace(0, height - tile_h, grid).round().astype(int)
+        xs = np.linspace(0, width - tile_w, grid).round().astype(int)
+        return [(y, x, y + tile_h, x + tile_w) for y in ys for x in xs]
+    
+    @staticmethod
+    def _describe_position(bbox: list[float]) -> str:
+        """Coarse position of a box in the photo, e.g. "top left"."""
+        x, y = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+        vertical = "top" if y < 1 / 3 else "bottom" if y > 2 / 3 else ""
+        horizontal = "left" if x < 1 / 3 else "right" if x > 2 / 3 else ""
+        return " ".join(filter(None, [vertical, horizontal])) or "center"
+    
+    async def _scan_image(
+        self,
+        pixels: np.ndarray,
+        car_part: Optional[str],
+        grid: int,
+        timing: dict[str, float]
+    ) -> tuple[list[DamageArea], Optional[list[list[float]]]]:
+        """
+        Classify overlapping tiles in one batch and turn damaged tiles into regions.
+        
+        Returns the damage areas, each with a bounding box, and the per-tile
+        damage scores as a grid x grid heatmap (None without a model).
+        """
+        started = time.perf_counter()
+        height, width = pixels.shape[:2]
+        boxes = self._tile_boxes(height, width, grid)
+        tiles = [Image.fromarray(pixels[y0:y1, x0:x1]) for y0, x0, y1, x1 in boxes]
+        timing["tile"] = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        try:
+            results = await inference_executor.run("damage", self._classify_sync, tiles)
+        except QueueFullError:
+            raise
+        except Exception:
+            results = None
+        timing["infer"] = (time.perf_counter() - started) * 1000
+        if results is None:
+            started = time.perf_counter()
+            damage_areas = self._heuristic_analysis(Image.fromarray(pixels), car_part)
+            timing["heuristic"] = (time.perf_counter() - started) * 1000
+            return damage_areas, None
+        
+        started = time.perf_counter()
+        scores = np.zeros(len(tiles), dtype=np.float32)
+        labels = [""] * len(tiles)
+        for i, tile_results in enumerate(results):
+            for result in tile_results:
+                label = result["label"].lower()
+                if any(word in label for word in self.DAMAGE_WORDS) and result["score"] > scores[i]:
+                    scores[i], labels[i] = result["score"], label
+        heatmap = scores.reshape(grid, grid)
+        
+        damage_areas = []
+        for region in connected_regions(heatmap >= settings.damage_scan_threshold):
+            indices = [row * grid + col for row, col in region]
+            best = max(indices, key=lambda i: scores[i])
+            bbox = [
+                round(min(boxes[i][1] for i in indices) / width, 4),
+                round(min(boxes[i][0] for i in indices) / height, 4),
+                round(max(boxes[i][3] for i in indices) / width, 4),
+                round(max(boxes[i][2] for i in indices) / height, 4),
+            ]
+            score = float(scores[best])
+            damage_areas.append(DamageArea(
+                location=car_part or "unspecified",
+                damage_type="damage",
+                severity=self._score_to_severity(score),
+                confidence=round(score, 4),
+                description=f"Detected: {labels[best]} ({self._describe_position(bbox)} of photo)",
+                estimated_repair_cost=self.REPAIR_COSTS.get("dent", {}).get("moderate"),
+                bbox=bbox
+            ))
+        damage_areas.sort(key=lambda area: area.confidence, reverse=True)
+        timing["aggregate"] = (time.perf_counter() - started) * 1000
+        return damage_areas, heatmap.astype(float).round(4).tolist()
+    
+    def _classify_sync(self, images: list[Image.Image]) -> Optional[list[list[dict]]]:
+        """Classify images in one forward pass (blocking). Returns None if no model is available."""
+        model = model_registry.get(settings.damage_model)
+        if not model:
+            return None
+        return model(images, batch_size=len(images))
     
     def _heuristic_analysis(
         self, 
@@ -175,24 +378,29 @@ class DamageDetectionService:
         car_part: Optional[str]
     ) -> list[DamageArea]:
         """
-        Fallback heuristic analysis based on image properties.
-        In production, this would be replaced with a proper CV model.
+        Fallback analysis from classical image cues, used only when the model
+        is unavailable.
+        
+        Spots whose edge density, contrast or color variance stands out from
+        the rest of the photo become damage areas with a bounding box. The
+        cues cannot tell damage from dirt, stickers, reflections or parts such
+        as wheels and badges, so confidence stays at or below 0.6.
         """
         damage_areas = []
-        
-        # Analyze image properties
-        width, height = image.size
-        
-        # Convert to RGB if needed
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        # Simple edge detection simulation
-        # In production, use OpenCV or similar for actual damage detection
-        
-        # For demo purposes, return a sample analysis
-        # A real implementation would use computer vision
-        
+        threshold = settings.damage_heuristic_threshold
+        for region in find_damage_regions(image, settings.damage_heuristic_size, threshold):
+            damage_type = CUE_DAMAGE_TYPES[region["cue"]]
+            confidence = round(0.3 + 0.3 * (1 - threshold / region["score"]), 4)
+            severity = self._score_to_severity(confidence)
+            damage_areas.append(DamageArea(
+                location=car_part or "unspecified",
+                damage_type=damage_type,
+                severity=severity,
+                confidence=confidence,
+                description=f"Possible {damage_type} ({self._describe_position(region['bbox'])} of photo, image analysis)",
+                estimated_repair_cost=self.REPAIR_COSTS.get(damage_type, {}).get(severity),
+                bbox=region["bbox"]
+            ))
         return damage_areas
     
     def _score_to_severity(self, score: float) -> str:
@@ -283,27 +491,75 @@ class DamageDetectionService:
         
         return recommendations
     
+    def _merge_damage_areas(self, damage_areas: list[DamageArea]) -> list[DamageArea]:
+        """
+        Merge damage reported for the same part in several photos.
+        
+        Each (location, damage_type) is kept once with its most confident
+        detection. Areas without a known location cannot be matched across
+        photos and are kept as they are.
+        """
+        merged: dict[tuple[str, str], tuple[DamageArea, int]] = {}
+        unmatched = []
+        for area in damage_areas:
+            if area.location == "unspecified":
+                unmatched.append(area)
+                continue
+            key = (area.location, area.damage_type)
+            best, views = merged.get(key, (area, 0))
+            merged[key] = (area if area.confidence > best.confidence else best, views + 1)
+        
+        results = []
+        for area, views in merged.values():
+            if views > 1:
+                area = area.model_copy(update={"description": f"{area.description} (seen in {views} photos)"})
+            results.append(area)
+        return results + unmatched
+    
     async def analyze_multiple_images(
         self, 
-        images: list[tuple[bytes, str]]
+        images: list[tuple[Union[bytes, str], Optional[str]]]
     ) -> DamageDetectionResult:
         """
         Analyze multiple images of the same car.
         
+        Images are decoded in parallel worker processes, downscaled, and
+        classified in a single batch; damage seen in several photos of the
+        same part is reported once.
+        
         Args:
-            images: List of (image_data, car_part) tuples
+            images: List of (image bytes or spooled upload path, car_part) tuples
         """
-        all_damage_areas = []
+        timing: dict[str, float] = {}
+        started = time.perf_counter()
+        decoded = await self._decode_images([image_data for image_data, _ in images])
+        timing["decode"] = (time.perf_counter() - started) * 1000
         
-        for image_data, car_part in images:
-            result = await self.detect_damage(image_data, car_part)
-            all_damage_areas.extend(result.damage_areas)
+        started = time.perf_counter()
+        valid = [
+            (Image.fromarray(pixels), car_part)
+            for pixels, (_, car_part) in zip(decoded, images) if pixels is not None
+        ]
+        timing["preprocess"] = (time.perf_counter() - started) * 1000
+        if not valid:
+            return self._invalid_image_result()
+        
+        per_image = await self._analyze_images(
+            [image for image, _ in valid], [car_part for _, car_part in valid], timing
+        )
         
         # Deduplicate and merge results
+        started = time.perf_counter()
+        all_damage_areas = self._merge_damage_areas([area for areas in per_image for area in areas])
         has_damage = len(all_damage_areas) > 0
         overall_condition = self._calculate_condition(all_damage_areas)
         total_cost = self._calculate_total_cost(all_damage_areas)
         recommendations = self._generate_recommendations(all_damage_areas, overall_condition)
+        timing["aggregate"] = (time.perf_counter() - started) * 1000
+        
+        skipped = len(images) - len(valid)
+        if skipped:
+            recommendations.append(f"{skipped} file(s) could not be read as images and were skipped")
         
         return DamageDetectionResult(
             image_analyzed=True,
@@ -312,8 +568,24 @@ class DamageDetectionService:
             damage_areas=all_damage_areas,
             total_estimated_cost=total_cost,
             recommendations=recommendations,
-            confidence=0.8
+            confidence=0.8,
+            timing={stage: round(ms, 2) for stage, ms in timing.items()}
         )
-
+    
+    def close(self):
+        """Shut down the decoding worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def get_metrics(self) -> dict:
+        """Get image counts and decoded pixel memory."""
+        return {
+            "images": self._images,
+            "invalid_images": self._invalid,
+            "avg_decoded_kb": round(self._decoded_bytes / 1024 / self._images, 1) if self._images else 0.0,
+            "max_request_decoded_mb": round(self._max_request_decoded_bytes / (1024 * 1024), 2),
+            "result_cache": damage_result_cache.get_metrics(),
+        }
 
 damage_detection_service = DamageDetectionService()
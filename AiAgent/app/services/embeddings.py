@@ -0,0 +1,374 @@
+"""Embedding Service - Sentence embeddings and semantic search."""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.batching import BatchScheduler
+from app.core.config import settings
+from app.core.model_registry import model_registry
+from app.core.vector_index import VectorIndex, create_index, load_index, normalize_rows
+from app.db import SessionLocal
+from app.db.models import ModelEmbedding
+
+
+class _SentenceEncoder:
+    """Mean-pooled, L2-normalized sentence embeddings from a transformer encoder."""
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.dim = model.config.hidden_size
+
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        """Encode texts in padded batches (blocking)."""
+        import torch
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            tokens = self.tokenizer(
+                chunk,
+                padding=True,
+                truncation=True,
+                max_length=settings.embedding_max_tokens,
+                return_tensors="pt"
+            )
+            with torch.inference_mode():
+                hidden = self.model(**tokens).last_hidden_state
+            # Average the token vectors, ignoring padding
+            mask = tokens["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            vectors[start:start + len(chunk)] = pooled.float().numpy()
+        return normalize_rows(vectors)
+
+
+def _load_encoder() -> _SentenceEncoder:
+    from transformers import AutoModel, AutoTokenizer
+    model = AutoModel.from_pretrained(settings.model_name, token=settings.huggingface_token or None)
+    model.eval()
+    return _SentenceEncoder(
+        AutoTokenizer.from_pretrained(settings.model_name, token=settings.huggingface_token or None),
+        model
+    )
+
+
+class EmbeddingService:
+    """
+    Encode content with `settings.model_name` and search it by cosine similarity.
+
+    Texts from concurrent requests are micro-batched, de-duplicated and sorted
+    by length before each forward pass. Stored embeddings live in the
+    `model_embeddings` table; an item whose content hash is unchanged is not
+    re-encoded. Search runs against an in-memory vector index (exact, or IVF
+    with `VECTOR_INDEX_TYPE=ivf`) that is saved to `EMBEDDING_INDEX_DIR` on
+    shutdown and memory-mapped on the next start, then topped up with rows
+    written since (including by other workers) every `EMBEDDING_SYNC_INTERVAL`
+    seconds.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        model_registry.register(settings.model_name, _load_encoder)
+        self._batcher = BatchScheduler(
+            "embedding",
+            self._encode_batch_sync,
+            max_batch_size=settings.embedding_batch_max_texts,
+            max_wait_ms=settings.embedding_batch_wait_ms,
+            max_queue_size=settings.embedding_queue_size
+        )
+        self._index: Optional[VectorIndex] = None
+        self._index_lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self._last_sync = 0.0
+
+        # Metrics
+        self._encoded = 0
+        self._unchanged = 0
+        self._searches = 0
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(settings.embedding_index_dir, settings.model_name.replace("/", "__") + ".npy")
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """SHA-256 of the whitespace-normalized text."""
+        return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+    def _encode_batch_sync(self, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """Encode one flush of texts (blocking)."""
+        encoder = model_registry.get(settings.model_name)
+        if encoder is None:
+            return [None] * len(texts)
+        # Identical texts share a row; similar lengths share padding
+        unique = sorted(set(texts), key=len)
+        vectors = encoder.encode(unique, settings.embedding_batch_size)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[text] for text in texts]
+
+    async def encode(self, texts: list[str]) -> Optional[np.ndarray]:
+        """Encode texts into a (n, dim) float32 matrix, or None if the model is unavailable."""
+        if not texts:
+            return None
+        vectors = await asyncio.gather(*(self._batcher.submit(text) for text in texts))
+        if any(vector is None for vector in vectors):
+            return None
+        return np.stack(vectors)
+
+    async def index_items(self, items: list[dict]) -> Optional[list[dict]]:
+        """
+        Encode and store embeddings for content items.
+
+        Args:
+            items: Dicts with `entity_type`, `entity_id` and `text`
+
+        Returns one `{"entity_type", "entity_id", "status", "embedding"}` dict
+        per item, with status `encoded` or `unchanged`, or None if the model
+        is unavailable.
+        """
+        # Later duplicates of a key win
+        latest = {(item["entity_type"], item["entity_id"]): item["text"] for item in items}
+        hashes = {key: self.content_hash(text) for key, text in latest.items()}
+        stored = await asyncio.to_thread(self._load_stored, list(latest))
+
+        changed = [key for key in latest if stored.get(key, (None, None))[0] != hashes[key]]
+        vectors: dict[tuple[str, str], np.ndarray] = {}
+        if changed:
+            encoded = await self.encode([latest[key] for key in changed])
+            if encoded is None:
+                return None
+            vectors = dict(zip(changed, encoded))
+            await asyncio.to_thread(self._store, vectors, latest, hashes)
+        self._encoded += len(changed)
+        self._unchanged += len(latest) - len(changed)
+
+        results = []
+        for item in items:
+            key = (item["entity_type"], item["entity_id"])
+            vector = vectors.get(key)
+            if vector is None:
+                vector = stored[key][1]
+            results.append({
+                "entity_type": key[0],
+                "entity_id": key[1],
+                "status": "encoded" if key in vectors else "unchanged",
+                "embedding": vector,
+            })
+        return results
+
+    def _load_stored(self, keys: list[tuple[str, str]]) -> dict[tuple[str, str], tuple[str, np.ndarray]]:
+        """Current content hash and vector of stored items for this model (blocking)."""
+        wanted = set(keys)
+        found = {}
+        db = self.session_factory()
+        try:
+            rows = db.query(ModelEmbedding).filter(
+                ModelEmbedding.entity_id.in_({entity_id for _, entity_id in keys}),
+                ModelEmbedding.embedding_model == settings.model_name
+            )
+            for row in rows:
+                key = (row.entity_type, row.entity_id)
+                if key in wanted:
+                    found[key] = (row.content_hash, np.frombuffer(row.embedding, dtype=np.float32))
+        except Exception:
+            pass
+        finally:
+            db.close()
+        return found
+
+    def _store(
+        self,
+        vectors: dict[tuple[str, str], np.ndarray],
+        texts: dict[tuple[str, str], str],
+        hashes: dict[tuple[str, str], str]
+    ):
+        """Upsert embedding rows and add them to the index (blocking)."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # naive UTC like the column
+        db = self.session_factory()
+        try:
+            existing = {
+                (row.entity_type, row.entity_id): row
+                for row in db.query(ModelEmbedding).filter(
+                    ModelEmbedding.entity_id.in_({entity_id for _, entity_id in vectors})
+                )
+                if (row.entity_type, row.entity_id) in vectors
+            }
+            for key, vector in vectors.items():
+                row = existing.get(key)
+                if row is None:
+                    row = ModelEmbedding(entity_type=key[0], entity_id=key[1])
+                    db.add(row)
+                row.embedding = vector.astype(np.float32).tobytes()
+                row.embedding_model = settings.model_name
+                row.embedding_dim = len(vector)
+                row.content_hash = hashes[key]
+                row.content_preview = texts[key][:500]
+                row.updated_at = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        index = self.get_index()
+        if index is not None:
+            index.add(list(vectors), np.stack(list(vectors.values())))
+
+    @staticmethod
+    def _index_params() -> dict:
+        """Search parameters for approximate indexes, taken from settings."""
+        if settings.vector_index_type != "ivf":
+            return {}
+        return {
+            "nlist": settings.vector_index_nlist,
+            "nprobe": settings.vector_index_nprobe,
+            "train_threshold": settings.vector_index_train_threshold,
+        }
+
+    def get_index(self) -> Optional[VectorIndex]:
+        """
+        Load the index on first use and pick up rows written elsewhere (blocking).
+
+        Returns None while nothing is stored and the model cannot be loaded.
+        """
+        with self._index_lock:
+            if self._index is None:
+                index, meta = load_index(self.index_path, **self._index_params())
+                if (
+                    index is not None
+                    and index.kind == settings.vector_index_type
+                    and meta.get("model") == settings.model_name
+                ):
+                    self._index = index
+                    watermark = meta.get("watermark")
+                    self._watermark = datetime.fromisoformat(watermark) if watermark else None
+            if self._index is None or time.monotonic() - self._last_sync >= settings.embedding_sync_interval:
+                self._sync()
+                self._last_sync = time.monotonic()
+            return self._index
+
+    def _sync(self, chunk_size: int = 1000):
+        """Add rows updated since the last sync to the index. Caller holds the index lock."""
+        db = self.session_factory()
+        try:
+            query = db.query(
+                ModelEmbedding.entity_type,
+                ModelEmbedding.entity_id,
+                ModelEmbedding.embedding,
+                ModelEmbedding.embedding_dim,
+                ModelEmbedding.updated_at
+            ).filter(ModelEmbedding.embedding_model == settings.model_name)
+            if self._watermark is not None:
+                # Rows sharing the watermark timestamp are read again; adding them is idempotent
+                query = query.filter(ModelEmbedding.updated_at >= self._watermark)
+
+            keys, vectors = [], []
+            for row in query.order_by(ModelEmbedding.updated_at).yield_per(chunk_size):
+                if self._index is None:
+                    self._index = create_index(settings.vector_index_type, row.embedding_dim, **self._index_params())
+                if row.embedding_dim == self._index.dim:
+                    keys.append((row.entity_type, row.entity_id))
+                    vectors.append(np.frombuffer(row.embedding, dtype=np.float32))
+                if row.updated_at is not None:
+                    self._watermark = max(self._watermark or row.updated_at, row.updated_at)
+                if len(keys) >= chunk_size:
+                    self._index.add(keys, np.stack(vectors))
+                    keys, vectors = [], []
+            if keys:
+                self._index.add(keys, np.stack(vectors))
+        except Exception:
+            pass
+        finally:
+            db.close()
+
+        if self._index is None:
+            # Nothing stored yet; the encoder decides the dimension
+            encoder = model_registry.get(settings.model_name)
+            if encoder is not None:
+                self._index = create_index(settings.vector_index_type, encoder.dim, **self._index_params())
+
+    async def delete_items(self, keys: list[tuple[str, str]]) -> int:
+        """Delete stored embeddings and drop them from the index."""
+        return await asyncio.to_thread(self._delete, keys)
+
+    def _delete(self, keys: list[tuple[str, str]]) -> int:
+        """Delete embedding rows and their index entries (blocking)."""
+        wanted = set(keys)
+        db = self.session_factory()
+        try:
+            rows = [
+                row for row in db.query(ModelEmbedding).filter(
+                    ModelEmbedding.entity_id.in_({entity_id for _, entity_id in wanted})
+                )
+                if (row.entity_type, row.entity_id) in wanted
+            ]
+            for row in rows:
+                db.delete(row)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        index = self.get_index()
+        if index is not None:
+            index.remove(wanted)
+        return len({(row.entity_type, row.entity_id) for row in rows})
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        entity_type: Optional[str] = None
+    ) -> Optional[list[dict]]:
+        """Find the stored items most similar to `query`, or None if the model is unavailable."""
+        vectors = await self.encode([query])
+        if vectors is None:
+            return None
+        self._searches += 1
+        index = await asyncio.to_thread(self.get_index)
+        if index is None:
+            return []
+        hits = await asyncio.to_thread(index.search, vectors, limit, entity_type)
+        return [
+            {"entity_type": entity_type, "entity_id": entity_id, "score": round(score, 4)}
+            for entity_type, entity_id, score in hits[0]
+        ]
+
+    def save_index(self):
+        """Write the index to disk if it changed (blocking)."""
+        with self._index_lock:
+            if self._index is not None and self._index.dirty:
+                self._index.save(self.index_path, {
+                    "model": settings.model_name,
+                    "watermark": self._watermark.isoformat() if self._watermark else None,
+                })
+
+    async def close(self):
+        """Stop the encoding batcher and persist the index."""
+        await self._batcher.close()
+        try:
+            await asyncio.to_thread(self.save_index)
+        except Exception:
+            pass
+
+    def get_metrics(self) -> dict:
+        """Get encoding and index metrics."""
+        return {
+            "encoded": self._encoded,
+            "unchanged": self._unchanged,
+            "searches": self._searches,
+            "batching": self._batcher.get_metrics(),
+            "index": self._index.get_metrics() if self._index is not None else None,
+        }
+
+
+embedding_service = EmbeddingService()
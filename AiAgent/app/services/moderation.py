@@ -1,7 +1,17 @@
 """Content Moderation Service."""
 from pydantic import BaseModel
 from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
 import re
+import time
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.core.text_matching import KeywordAutomaton, KeywordScan
 
 
 class ModerationResult(BaseModel):
@@ -13,29 +23,75 @@ class ModerationResult(BaseModel):
     details: dict[str, bool]
 
 
+class BatchModerationItem(BaseModel):
+    id: str
+    text: str
+
+
+class BatchModerationResult(BaseModel):
+    results: list[dict]
+    summary: dict
+    timing: dict
+
+
 class ModerationService:
-    def __init__(self):
+    # Keyword categories and whether keywords must match as whole words
+    KEYWORD_CATEGORIES = {
+        "profanity": True,
+        "hate_speech": False,
+        "violence": False,
+    }
+    
+    def __init__(self, lexicon: Optional[dict[str, list[str]]] = None):
         # Profanity and inappropriate content patterns
-        self._profanity_patterns = self._load_profanity_patterns()
+        self._lexicon = lexicon or self._load_lexicon()
         self._spam_patterns = self._load_spam_patterns()
         self._pii_patterns = self._load_pii_patterns()
+        
+        # Compiled matchers: one automaton for every keyword list and one
+        # alternation for every regex, so each text is scanned twice in total
+        self._keywords = self._build_keyword_automaton()
+        self._combined_pattern = self._build_combined_pattern()
+        
+        # Cached verdicts are invalidated whenever the word lists change
+        self._cache_version = hashlib.sha256(
+            json.dumps(self._lexicon, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        
+        self._pool: Optional[ProcessPoolExecutor] = None
     
-    def _load_profanity_patterns(self) -> list[re.Pattern]:
-        """Load profanity detection patterns."""
-        # Basic patterns - in production, use a comprehensive list
-        words = ["badword1", "badword2"]  # Placeholder
-        return [re.compile(rf'\b{word}\b', re.IGNORECASE) for word in words]
+    def _load_lexicon(self) -> dict[str, list[str]]:
+        """Load keyword lists, merging in an optional JSON lexicon file."""
+        lexicon = {
+            # Basic patterns - in production, use a comprehensive list
+            "profanity": ["badword1", "badword2"],  # Placeholder
+            # In production, use ML model for better detection
+            "hate_speech": ["hate", "kill all", "death to"],
+            "violence": ["murder", "assault", "attack", "bomb", "shoot"],
+        }
+        
+        if settings.moderation_lexicon_path:
+            try:
+                with open(settings.moderation_lexicon_path, encoding="utf-8") as f:
+                    extra = json.load(f)
+                for category, words in extra.items():
+                    if category in lexicon:
+                        lexicon[category].extend(words)
+            except (OSError, ValueError):
+                pass
+        
+        return lexicon
     
     def _load_spam_patterns(self) -> list[re.Pattern]:
         """Load spam detection patterns."""
         patterns = [
-            r'(?i)buy\s+now',
-            r'(?i)click\s+here',
-            r'(?i)free\s+money',
-            r'(?i)act\s+now',
-            r'(?i)limited\s+time\s+offer',
-            r'(?i)congratulations.*won',
-            r'(?i)earn\s+\$?\d+',
+            r'(?i:buy\s+now)',
+            r'(?i:click\s+here)',
+            r'(?i:free\s+money)',
+            r'(?i:act\s+now)',
+            r'(?i:limited\s+time\s+offer)',
+            r'(?i:congratulations.*won)',
+            r'(?i:earn\s+\$?\d+)',
             r'https?://\S+\s*https?://\S+',  # Multiple URLs
         ]
         return [re.compile(p) for p in patterns]
@@ -49,9 +105,61 @@ class ModerationService:
             "credit_card": re.compile(r'\b(?:\d{4}[-\s]?){3}\d{4}\b'),
         }
     
+    def _build_keyword_automaton(self) -> KeywordAutomaton:
+        """Compile every keyword list into one automaton."""
+        automaton = KeywordAutomaton()
+        for category, whole_word in self.KEYWORD_CATEGORIES.items():
+            automaton.add_all(self._lexicon.get(category, []), category, whole_word)
+        automaton.build()
+        return automaton
+    
+    def _build_combined_pattern(self) -> re.Pattern:
+        """Merge spam and PII regexes into one alternation with named groups."""
+        groups = [f"(?P<spam_{i}>{p.pattern})" for i, p in enumerate(self._spam_patterns)]
+        groups += [f"(?P<pii_{name}>{p.pattern})" for name, p in self._pii_patterns.items()]
+        return re.compile("|".join(groups))
+    
+    def _match_patterns(self, text: str, check_pii: bool) -> tuple[int, bool]:
+        """
+        Count matching spam patterns and check for PII in one regex pass.
+        
+        A single alternation reports non-overlapping matches only, so a match
+        can hide a different pattern overlapping it. Clean text (no match at
+        all) is exact after one pass; otherwise patterns that did not show up
+        are re-checked individually when they could still change the verdict.
+        """
+        found = {m.lastgroup for m in self._combined_pattern.finditer(text)}
+        if not found:
+            return 0, False
+        
+        spam_hits = {name for name in found if name.startswith("spam_")}
+        for i, pattern in enumerate(self._spam_patterns):
+            if f"spam_{i}" not in spam_hits and pattern.search(text):
+                spam_hits.add(f"spam_{i}")
+        
+        has_pii = False
+        if check_pii:
+            has_pii = any(name.startswith("pii_") for name in found) or any(
+                pattern.search(text) for pattern in self._pii_patterns.values()
+            )
+        
+        return len(spam_hits), has_pii
+    
     async def moderate(self, text: str, check_pii: bool = True, 
                        auto_clean: bool = False) -> ModerationResult:
         """Moderate content for safety."""
+        key = result_cache.make_key("moderation", self._cache_version, text, check_pii, auto_clean)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return ModerationResult(**cached)
+        
+        result = self._moderate_sync(text, check_pii, auto_clean)
+        result_cache.set(key, result.model_dump())
+        return result
+    
+    def _moderate_sync(self, text: str, check_pii: bool = True,
+                       auto_clean: bool = False) -> ModerationResult:
+        """Run every moderation check on one text."""
         flagged_categories = []
         details = {
             "profanity": False,
@@ -61,28 +169,32 @@ class ModerationService:
             "violence": False,
         }
         
+        # One traversal finds all keywords and collects caps/punctuation stats
+        scan = self._keywords.scan(text, count_chars="!?")
+        spam_count, has_pii = self._match_patterns(text, check_pii)
+        
         # Check profanity
-        if self._check_profanity(text):
+        if scan.has("profanity"):
             flagged_categories.append("profanity")
             details["profanity"] = True
         
         # Check spam
-        if self._check_spam(text):
+        if self._check_spam(text, scan, spam_count):
             flagged_categories.append("spam")
             details["spam"] = True
         
         # Check PII
-        if check_pii and self._check_pii(text):
+        if has_pii:
             flagged_categories.append("pii")
             details["pii"] = True
         
         # Check hate speech (basic keyword check)
-        if self._check_hate_speech(text):
+        if scan.has("hate_speech"):
             flagged_categories.append("hate_speech")
             details["hate_speech"] = True
         
         # Check violence
-        if self._check_violence(text):
+        if scan.has("violence"):
             flagged_categories.append("violence")
             details["violence"] = True
         
@@ -102,53 +214,22 @@ class ModerationService:
             details=details
         )
     
-    def _check_profanity(self, text: str) -> bool:
-        """Check for profanity."""
-        for pattern in self._profanity_patterns:
-            if pattern.search(text):
-                return True
-        return False
-    
-    def _check_spam(self, text: str) -> bool:
+    def _check_spam(self, text: str, scan: KeywordScan, pattern_count: int) -> bool:
         """Check for spam patterns."""
-        spam_score = 0
-        for pattern in self._spam_patterns:
-            if pattern.search(text):
-                spam_score += 1
+        spam_score = pattern_count
         
         # Check for excessive caps
         if len(text) > 10:
-            caps_ratio = sum(1 for c in text if c.isupper()) / len(text)
+            caps_ratio = scan.upper_count / len(text)
             if caps_ratio > 0.5:
                 spam_score += 1
         
         # Check for excessive punctuation
-        punct_count = sum(1 for c in text if c in "!?")
-        if punct_count > 5:
+        if scan.counted_chars > 5:
             spam_score += 1
         
         return spam_score >= 2
     
-    def _check_pii(self, text: str) -> bool:
-        """Check for personally identifiable information."""
-        for pattern in self._pii_patterns.values():
-            if pattern.search(text):
-                return True
-        return False
-    
-    def _check_hate_speech(self, text: str) -> bool:
-        """Basic hate speech detection."""
-        # In production, use ML model for better detection
-        hate_indicators = ["hate", "kill all", "death to"]
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in hate_indicators)
-    
-    def _check_violence(self, text: str) -> bool:
-        """Basic violence detection."""
-        violence_words = ["murder", "assault", "attack", "bomb", "shoot"]
-        text_lower = text.lower()
-        return any(word in text_lower for word in violence_words)
-    
     def _clean_text(self, text: str) -> str:
         """Clean text by removing/masking flagged content."""
         cleaned = text
@@ -158,11 +239,142 @@ class ModerationService:
             cleaned = pattern.sub(f"[{pii_type.upper()}_REDACTED]", cleaned)
         
         # Remove profanity
-        for pattern in self._profanity_patterns:
-            cleaned = pattern.sub("****", cleaned)
+        merged: list[list[int]] = []
+        for start, end in sorted(self._keywords.scan(cleaned).matches.get("profanity", [])):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        for start, end in reversed(merged):
+            cleaned = cleaned[:start] + "****" + cleaned[end:]
         
         return cleaned
     
+    async def moderate_batch(
+        self,
+        items: list[BatchModerationItem],
+        check_pii: bool = True,
+        auto_clean: bool = False
+    ) -> BatchModerationResult:
+        """
+        Moderate many items, spreading large batches across worker processes.
+        
+        Checks are pure-Python CPU work, so threads would serialize on the GIL;
+        batches above `moderation_parallel_threshold` are split into chunks
+        and run on a process pool instead.
+        """
+        started = time.perf_counter()
+        
+        # Serve repeated texts from the cache and check each distinct text once
+        keys = [
+            result_cache.make_key("moderation", self._cache_version, item.text, check_pii, auto_clean)
+            for item in items
+        ]
+        verdicts: dict[str, dict] = {}
+        pending: dict[str, tuple[str, str]] = {}
+        cache_hits = 0
+        for key, item in zip(keys, items):
+            if key in verdicts or key in pending:
+                continue
+            cached = result_cache.get(key)
+            if cached is not None:
+                verdicts[key] = self._to_batch_result(key, ModerationResult(**cached))
+                cache_hits += 1
+            else:
+                pending[key] = (key, item.text)
+        
+        pairs = list(pending.values())
+        if not pairs:
+            workers = 0
+            computed = []
+        elif len(pairs) < settings.moderation_parallel_threshold:
+            workers = 1
+            computed = await asyncio.to_thread(self._moderate_items, pairs, check_pii, auto_clean)
+        else:
+            pool, workers = self._get_pool()
+            chunk_size = max(1, -(-len(pairs) // (workers * 4)))
+            chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+            loop = asyncio.get_running_loop()
+            chunk_results = await asyncio.gather(*[
+                loop.run_in_executor(pool, _moderate_in_worker, chunk, check_pii, auto_clean)
+                for chunk in chunks
+            ])
+            computed = [result for chunk in chunk_results for result in chunk]
+        
+        for (key, text), verdict in zip(pairs, computed):
+            verdicts[key] = verdict
+            result_cache.set(key, {
+                "text": text[:200] + "..." if len(text) > 200 else text,
+                **{k: v for k, v in verdict.items() if k != "id"}
+            })
+        
+        results = [{**verdicts[key], "id": item.id} for key, item in zip(keys, items)]
+        
+        elapsed = time.perf_counter() - started
+        by_category: dict[str, int] = {}
+        for result in results:
+            for category in result["flagged_categories"]:
+                by_category[category] = by_category.get(category, 0) + 1
+        flagged = sum(1 for result in results if not result["is_safe"])
+        
+        return BatchModerationResult(
+            results=results,
+            summary={
+                "total": len(results),
+                "safe": len(results) - flagged,
+                "flagged": flagged,
+                "by_category": by_category
+            },
+            timing={
+                "total_ms": round(elapsed * 1000, 2),
+                "avg_item_ms": round(elapsed * 1000 / len(results), 4) if results else 0.0,
+                "items_per_second": round(len(results) / elapsed) if elapsed > 0 else 0,
+                "workers": workers,
+                "unique_texts": len(verdicts),
+                "cache_hits": cache_hits
+            }
+        )
+    
+    def _get_pool(self) -> tuple[ProcessPoolExecutor, int]:
+        """Get or create the moderation worker pool."""
+        workers = settings.moderation_workers or os.cpu_count() or 1
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                # Not fork: the workers must not inherit the event loop and its threads
+                mp_context=multiprocessing.get_context(
+                    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                ),
+                initializer=_init_worker,
+                initargs=(self._lexicon,)
+            )
+        return self._pool, workers
+    
+    def _moderate_items(self, items: list[tuple[str, str]], check_pii: bool,
+                        auto_clean: bool) -> list[dict]:
+        """Moderate (id, text) pairs into per-item verdicts."""
+        return [
+            self._to_batch_result(item_id, self._moderate_sync(text, check_pii, auto_clean))
+            for item_id, text in items
+        ]
+    
+    def _to_batch_result(self, item_id: str, result: ModerationResult) -> dict:
+        """Per-item verdict for batch responses (without the echoed text)."""
+        return {
+            "id": item_id,
+            "is_safe": result.is_safe,
+            "flagged_categories": result.flagged_categories,
+            "confidence": result.confidence,
+            "cleaned_text": result.cleaned_text,
+            "details": result.details,
+        }
+    
+    def close(self):
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
     async def check_safe(self, text: str) -> bool:
         """Quick check if content is safe."""
         result = await self.moderate(text, check_pii=False)
@@ -170,3 +382,18 @@ class ModerationService:
 
 
 moderation_service = ModerationService()
+
+
+# Per-process service used by batch workers
+_worker_service: Optional[ModerationService] = None
+
+
+def _init_worker(lexicon: dict[str, list[str]]):
+    """Compile the matchers once per worker process."""
+    global _worker_service
+    _worker_service = ModerationService(lexicon=lexicon)
+
+
+def _moderate_in_worker(items: list[tuple[str, str]], check_pii: bool, auto_clean: bool) -> list[dict]:
+    """Moderate a chunk of (id, text) pairs in a worker process."""
+    return _worker_service._moderate_items(items, check_pii, auto_clean)
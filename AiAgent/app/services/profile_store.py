@@ -0,0 +1,366 @@
+"""User preference profiles with write-behind persistence."""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.db.models import UserPreference
+
+
+@dataclass
+class Profile:
+    """A user's hot profile: interests in insertion order plus bounded item histories."""
+    user_id: str
+    interests: dict[str, None]
+    viewed_items: deque
+    liked_items: deque
+    purchased_items: deque
+    location: Optional[str] = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class _Delta:
+    """Updates to one profile that have not been written yet, in arrival order."""
+    interests: list[str] = field(default_factory=list)
+    viewed_items: list[str] = field(default_factory=list)
+    liked_items: list[str] = field(default_factory=list)
+    purchased_items: list[str] = field(default_factory=list)
+    location: Optional[str] = None
+
+    def merge(self, other: "_Delta"):
+        self.interests += other.interests
+        self.viewed_items += other.viewed_items
+        self.liked_items += other.liked_items
+        self.purchased_items += other.purchased_items
+        self.location = other.location or self.location
+
+
+class ProfileStore:
+    """
+    Keep hot user profiles in memory and persist them to `UserPreference`.
+
+    Viewed, liked and purchased items are ring buffers of the latest
+    `history_size` entries; liked and purchased items are kept once each.
+    Updates are applied to the cached profile immediately and queued as
+    deltas per user, so a burst of events for one user becomes a single row
+    write. A background task upserts all queued users in one transaction
+    every `flush_interval_ms`, or as soon as `flush_batch_size` users are
+    waiting. Deltas are merged into the stored row rather than overwriting
+    it, so workers sharing a database do not lose each other's updates. If
+    the transaction fails, rows are retried one by one and any the database
+    refuses are dropped.
+
+    Profiles are loaded lazily on first use and reloaded after `ttl`
+    seconds, which is when changes written by other workers become visible.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        history_size: int = 100,
+        max_profiles: int = 10000,
+        ttl: int = 300,
+        flush_interval_ms: float = 1000.0,
+        flush_batch_size: int = 500,
+        max_pending: int = 50000
+    ):
+        self.session_factory = session_factory
+        self.history_size = history_size
+        self.max_profiles = max_profiles
+        self.ttl = ttl
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_batch_size = flush_batch_size
+        self.max_pending = max_pending
+
+        self._profiles: OrderedDict[str, Profile] = OrderedDict()
+        self._pending: dict[str, _Delta] = {}
+        self._in_flight: dict[str, _Delta] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._hits = 0
+        self._loads = 0
+        self._updates = 0
+        self._flushes = 0
+        self._written = 0
+        self._dropped = 0
+
+    def _ensure_worker(self):
+        """Start the flush loop on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    def _empty(self, user_id: str) -> Profile:
+        return Profile(
+            user_id=user_id,
+            interests={},
+            viewed_items=deque(maxlen=self.history_size),
+            liked_items=deque(maxlen=self.history_size),
+            purchased_items=deque(maxlen=self.history_size)
+        )
+
+    def _apply(self, profile: Profile, delta: _Delta):
+        """Apply a delta to a profile in place."""
+        for interest in delta.interests:
+            profile.interests.pop(interest, None)
+            profile.interests[interest] = None
+        profile.viewed_items.extend(delta.viewed_items)
+        for items, added in (
+            (profile.liked_items, delta.liked_items),
+            (profile.purchased_items, delta.purchased_items)
+        ):
+            for item in added:
+                if item in items:
+                    items.remove(item)
+                items.append(item)
+        if delta.location:
+            profile.location = delta.location
+
+    def _from_row(self, user_id: str, row: Optional[dict]) -> Profile:
+        profile = self._empty(user_id)
+        if row:
+            self._apply(profile, _Delta(
+                interests=row.get("interests") or [],
+                viewed_items=row.get("viewed_items") or [],
+                liked_items=row.get("liked_items") or [],
+                purchased_items=row.get("purchased_items") or [],
+                location=row.get("location")
+            ))
+        return profile
+
+    async def get(self, user_id: str) -> Profile:
+        """Get a user's profile, loading it from the database on a miss."""
+        now = time.time()
+        profile = self._profiles.get(user_id)
+        if profile is not None and now - profile.loaded_at <= self.ttl:
+            self._profiles.move_to_end(user_id)
+            self._hits += 1
+            return profile
+
+        self._loads += 1
+        if self._flush_lock is not None and (user_id in self._in_flight or user_id in self._pending):
+            # A flush committing this user's deltas mid-read would apply them twice;
+            # while it can't run, nothing of theirs is in flight
+            async with self._flush_lock:
+                profile = await self._load(user_id)
+        else:
+            profile = await self._load(user_id)
+        self._profiles[user_id] = profile
+        self._profiles.move_to_end(user_id)
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return profile
+
+    async def _load(self, user_id: str) -> Profile:
+        """Read a profile and apply the updates this worker has not written yet."""
+        rows = await asyncio.to_thread(self._load_rows, [user_id])
+        profile = self._from_row(user_id, rows.get(user_id))
+        for unwritten in (self._in_flight, self._pending):
+            if user_id in unwritten:
+                self._apply(profile, unwritten[user_id])
+        return profile
+
+    async def update(
+        self,
+        user_id: str,
+        interests: Optional[list[str]] = None,
+        viewed_item: Optional[str] = None,
+        liked_item: Optional[str] = None,
+        purchased_item: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> Profile:
+        """
+        Apply an update to the cached profile and queue it for persistence.
+
+        Raises:
+            ValueError: If the user id does not fit the `user_preferences` table
+        """
+        # A row the database refuses would fail every flush it is part of
+        if len(user_id) > UserPreference.user_id.type.length:
+            raise ValueError(f"User ID is too long (max {UserPreference.user_id.type.length} characters)")
+        if location:
+            location = location[:UserPreference.location.type.length]
+        self._ensure_worker()
+        delta = _Delta(
+            interests=list(interests or []),
+            viewed_items=[viewed_item] if viewed_item else [],
+            liked_items=[liked_item] if liked_item else [],
+            purchased_items=[purchased_item] if purchased_item else [],
+            location=location
+        )
+        profile = await self.get(user_id)
+        self._apply(profile, delta)
+        self._updates += 1
+
+        if user_id in self._pending:
+            self._pending[user_id].merge(delta)
+        else:
+            self._pending[user_id] = delta
+        if len(self._pending) >= self.flush_batch_size:
+            self._wakeup.set()
+        return profile
+
+    @staticmethod
+    def _values(row: UserPreference) -> dict:
+        return {
+            "interests": row.interests,
+            "viewed_items": row.viewed_items,
+            "liked_items": row.liked_items,
+            "purchased_items": row.purchased_items,
+            "location": row.location,
+        }
+
+    def _load_rows(self, user_ids: list[str]) -> dict[str, dict]:
+        """Read stored profiles by user id (blocking)."""
+        db = self.session_factory()
+        try:
+            rows = db.query(UserPreference).filter(UserPreference.user_id.in_(user_ids)).all()
+            return {row.user_id: self._values(row) for row in rows}
+        except Exception:
+            return {}
+        finally:
+            db.close()
+
+    async def _run(self):
+        """Flush queued updates periodically or when a batch is full."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Upsert every queued profile in one transaction."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._in_flight, self._pending = self._pending, {}
+            written = await asyncio.to_thread(self._write, self._in_flight)
+            if written is not None:
+                self._flushes += 1
+                # Pick up changes other workers made to the same rows
+                for user_id, stored in written.items():
+                    if stored is None:
+                        self._dropped += 1
+                        continue
+                    self._written += 1
+                    if user_id in self._profiles:
+                        profile = self._from_row(user_id, stored)
+                        if user_id in self._pending:
+                            self._apply(profile, self._pending[user_id])
+                        self._profiles[user_id] = profile
+            else:
+                # Retry with the next flush, keeping newer deltas after older ones
+                for user_id, delta in self._pending.items():
+                    if user_id in self._in_flight:
+                        self._in_flight[user_id].merge(delta)
+                    else:
+                        self._in_flight[user_id] = delta
+                self._pending = self._in_flight
+                overflow = len(self._pending) - self.max_pending
+                for user_id in list(self._pending)[:max(0, overflow)]:
+                    del self._pending[user_id]
+                    self._dropped += 1
+            self._in_flight = {}
+
+    def _write(self, deltas: dict[str, _Delta]) -> Optional[dict[str, Optional[dict]]]:
+        """
+        Merge deltas into UserPreference rows (blocking).
+
+        Returns the stored rows, with None for users whose row the database
+        refused, or None if nothing could be written.
+        """
+        stored = self._write_rows(deltas)
+        if stored is not None or len(deltas) == 1:
+            return stored
+        # One bad row fails the whole transaction; write rows one by one so it
+        # can't hold back everyone else, and drop it unless all of them fail
+        stored = {user_id: (self._write_rows({user_id: delta}) or {}).get(user_id) for user_id, delta in deltas.items()}
+        return stored if any(values is not None for values in stored.values()) else None
+
+    def _write_rows(self, deltas: dict[str, _Delta]) -> Optional[dict[str, dict]]:
+        """Merge deltas into UserPreference rows in one transaction (blocking)."""
+        db = self.session_factory()
+        try:
+            rows = {
+                row.user_id: row for row in db.query(UserPreference).filter(
+                    UserPreference.user_id.in_(list(deltas))
+                ).all()
+            }
+            stored = {}
+            for user_id, delta in deltas.items():
+                row = rows.get(user_id)
+                profile = self._from_row(user_id, self._values(row) if row is not None else None)
+                self._apply(profile, delta)
+                values = {
+                    "interests": list(profile.interests),
+                    "viewed_items": list(profile.viewed_items),
+                    "liked_items": list(profile.liked_items),
+                    "purchased_items": list(profile.purchased_items),
+                    "location": profile.location,
+                }
+                if row is None:
+                    db.add(UserPreference(user_id=user_id, **values))
+                else:
+                    for key, value in values.items():
+                        setattr(row, key, value)
+                stored[user_id] = values
+            db.commit()
+            return stored
+        except Exception:
+            # e.g. another worker inserted the same user first; merge again next time
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    async def close(self):
+        """Stop the flush loop and write any queued updates."""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        await self.flush()
+
+    def get_metrics(self) -> dict:
+        """Get cache and write-behind metrics."""
+        lookups = self._hits + self._loads
+        return {
+            "profiles": len(self._profiles),
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "loads": self._loads,
+            "updates": self._updates,
+            "pending_writes": len(self._pending),
+            "flushes": self._flushes,
+            "written": self._written,
+            "dropped": self._dropped,
+        }
+
+
+profile_store = ProfileStore(
+    history_size=settings.profile_history_size,
+    max_profiles=settings.profile_cache_size,
+    ttl=settings.profile_ttl,
+    flush_interval_ms=settings.profile_flush_interval_ms,
+    flush_batch_size=settings.profile_flush_batch_size
+)
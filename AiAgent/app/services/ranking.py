@@ -0,0 +1,189 @@
+"""Ranking pipeline for personalized recommendations."""
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.vector_index import top_k
+from app.services.profile_store import Profile
+from app.services.similar_items import ItemKey, SimilarItemsIndex, similar_items_index
+from app.services.trending import TrendingEngine, trending_engine
+
+FEATURES = ("trending", "similarity", "category", "seen")
+
+
+class RankingPipeline:
+    """
+    Rank items for a user in four stages.
+
+    1. candidates: trending items, neighbours of the user's latest liked and
+       purchased items, and trending items in the user's interests; excluded
+       and already liked or purchased items are dropped here.
+    2. features: one row per candidate in a float32 matrix (see FEATURES).
+    3. score: a linear model, `features @ weights`.
+    4. rerank: greedy selection of `limit` items, penalizing each pick by
+       `diversity` times the number of picks already in its type/category.
+
+    Only the selected items are turned into result objects. `rank` returns
+    each stage's duration in milliseconds alongside the results.
+    """
+
+    def __init__(
+        self,
+        trending: TrendingEngine = trending_engine,
+        similar: SimilarItemsIndex = similar_items_index,
+        weights: Optional[dict[str, float]] = None,
+        candidates_per_source: int = 100,
+        seed_items: int = 10,
+        diversity: float = 0.15
+    ):
+        self.trending = trending
+        self.similar = similar
+        weights = weights or {}
+        self.weights = np.array([weights.get(name, 0.0) for name in FEATURES], dtype=np.float32)
+        self.candidates_per_source = candidates_per_source
+        self.seed_items = seed_items
+        self.diversity = diversity
+
+        # Metrics
+        self._requests = 0
+        self._candidate_count = 0
+
+    def _candidates(
+        self, profile: Profile, item_type: Optional[str], exclude: set[str]
+    ) -> tuple[list[ItemKey], dict[ItemKey, str], dict[str, dict[ItemKey, float]], dict[ItemKey, str]]:
+        """Gather candidate keys with raw per-source scores."""
+        n = self.candidates_per_source
+        titles: dict[ItemKey, str] = {}
+        sources: dict[str, dict[ItemKey, float]] = {"trending": {}, "similarity": {}, "category": {}}
+        categories: dict[ItemKey, str] = {}
+
+        for item in self.trending.trending(item_type, None, n):
+            key = (item["item_type"], item["item_id"])
+            if key[1] not in exclude:
+                sources["trending"][key] = item["score"]
+                titles[key] = item["title"]
+
+        # Most recent interests first
+        for category in list(profile.interests)[::-1][:5]:
+            items = self.trending.trending(item_type, category, n)
+            if not items:
+                continue
+            best = items[0]["score"] or 1.0
+            for item in items:
+                key = (item["item_type"], item["item_id"])
+                score = item["score"] / best
+                if key[1] not in exclude and score > sources["category"].get(key, 0.0):
+                    sources["category"][key] = score
+                    categories[key] = category
+                    titles[key] = item["title"]
+
+        seeds = list(profile.liked_items)[-self.seed_items:] + list(profile.purchased_items)[-self.seed_items:]
+        for seed in self.similar.keys_for(dict.fromkeys(seeds)):
+            for key, title, score in self.similar.similar(seed, n, exclude):
+                if item_type and key[0] != item_type:
+                    continue
+                if score > sources["similarity"].get(key, 0.0):
+                    sources["similarity"][key] = score
+                    titles[key] = title
+
+        keys = list(dict.fromkeys(key for scores in sources.values() for key in scores))
+        return keys, titles, sources, categories
+
+    @staticmethod
+    def _features(
+        keys: list[ItemKey], sources: dict[str, dict[ItemKey, float]], viewed: set[str]
+    ) -> np.ndarray:
+        """Assemble the candidate feature matrix, columns in FEATURES order."""
+        features = np.zeros((len(keys), len(FEATURES)), dtype=np.float32)
+        for column, name in enumerate(FEATURES[:3]):
+            features[:, column] = [sources[name].get(key, 0.0) for key in keys]
+        # Decayed engagement is heavy-tailed; compress it to [0, 1]
+        trending = np.log1p(features[:, 0])
+        if trending.max() > 0:
+            features[:, 0] = trending / trending.max()
+        features[:, 3] = [key[1] in viewed for key in keys]
+        return features
+
+    def _rerank(self, scores: np.ndarray, groups: np.ndarray, limit: int) -> np.ndarray:
+        """Pick `limit` rows greedily, discounting groups that are already represented."""
+        adjusted = scores.astype(np.float64)
+        picked_per_group = np.zeros(groups.max() + 1 if len(groups) else 0)
+        picks = []
+        for _ in range(min(limit, len(scores))):
+            best = int(np.argmax(adjusted - self.diversity * picked_per_group[groups]))
+            picks.append(best)
+            picked_per_group[groups[best]] += 1
+            adjusted[best] = -np.inf
+        return np.array(picks, dtype=np.intp)
+
+    def rank(
+        self,
+        profile: Profile,
+        item_type: Optional[str] = None,
+        limit: int = 10,
+        exclude_ids: Iterable[str] = ()
+    ) -> tuple[list[dict], dict[str, float]]:
+        """Rank items for a profile. Returns results and stage timings in ms."""
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+
+        def lap(stage: str):
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = (now - started) * 1000
+            started = now
+
+        exclude = set(exclude_ids) | set(profile.liked_items) | set(profile.purchased_items)
+        keys, titles, sources, categories = self._candidates(profile, item_type, exclude)
+        lap("candidates")
+        self._requests += 1
+        self._candidate_count += len(keys)
+        if not keys:
+            return [], timings
+
+        features = self._features(keys, sources, set(profile.viewed_items))
+        lap("features")
+
+        scores = features @ self.weights
+        # Only the best few times `limit` can be picked, whatever the penalties
+        shortlist = top_k(scores, 4 * limit)[0]
+        lap("score")
+
+        group_names = [f"{keys[i][0]}|{categories.get(keys[i], '')}" for i in shortlist]
+        _, groups = np.unique(group_names, return_inverse=True)
+        selected = shortlist[self._rerank(scores[shortlist], groups, limit)]
+        lap("rerank")
+
+        contributions = features[selected] * self.weights
+        results = []
+        for row, strongest in zip(selected, contributions.argmax(axis=1)):
+            key = keys[row]
+            reason = FEATURES[strongest]
+            if reason == "category":
+                reason = f"category:{categories[key]}"
+            results.append({
+                "item_id": key[1],
+                "item_type": key[0],
+                "title": titles.get(key, ""),
+                "score": float(scores[row]),
+                "reason": reason,
+            })
+        return results, timings
+
+    def get_metrics(self) -> dict:
+        """Get request and candidate counts."""
+        return {
+            "requests": self._requests,
+            "avg_candidates": round(self._candidate_count / self._requests, 1) if self._requests else 0.0,
+            "weights": {name: round(w, 4) for name, w in zip(FEATURES, self.weights.tolist())},
+        }
+
+
+ranking_pipeline = RankingPipeline(
+    weights=settings.ranking_weights,
+    candidates_per_source=settings.ranking_candidates_per_source,
+    seed_items=settings.ranking_seed_items,
+    diversity=settings.ranking_diversity
+)
@@ -1,7 +1,11 @@
 """Recommendation Service - AI-powered content and product recommendations."""
 from pydantic import BaseModel
 from typing import Optional
-import random
+import time
+from app.services.profile_store import Profile, profile_store
+from app.services.ranking import ranking_pipeline
+from app.services.similar_items import similar_items_index
+from app.services.trending import trending_engine
 
 
 class RecommendationResult(BaseModel):
@@ -17,6 +21,7 @@ class UserPreferences(BaseModel):
     interests: list[str] = []
     viewed_items: list[str] = []
     liked_items: list[str] = []
+    purchased_items: list[str] = []
     location: Optional[str] = None
 
 
@@ -31,59 +36,66 @@ class RecommendationService:
     ]
     
     def __init__(self):
-        self._user_profiles: dict[str, UserPreferences] = {}
+        self.profiles = profile_store
+        self.ranking = ranking_pipeline
     
     async def get_recommendations(
         self, 
         user_id: str, 
         item_type: Optional[str] = None,
-        limit: int = 10
-    ) -> list[RecommendationResult]:
-        """Get personalized recommendations for a user."""
-        preferences = self._user_profiles.get(user_id, UserPreferences(user_id=user_id))
+        limit: int = 10,
+        exclude_ids: Optional[list[str]] = None
+    ) -> tuple[list[RecommendationResult], dict[str, float]]:
+        """
+        Get personalized recommendations for a user.
         
-        # In production, this would query your backend and use ML models
-        recommendations = []
+        Returns the results and the ranking pipeline's per-stage timings in
+        milliseconds. Users with no history get trending items only. Neighbour
+        candidates come from whatever similar-item lists are built so far;
+        requests never wait for the background build.
+        """
+        profile = await self.profiles.get(user_id)
+        ranked, timings = self.ranking.rank(profile, item_type, limit, exclude_ids or ())
         
-        item_types = [item_type] if item_type else [
-            "post", "product", "event", "group", "guide", "video"
-        ]
-        
-        for i in range(limit):
-            selected_type = item_types[i % len(item_types)]
-            recommendations.append(
-                RecommendationResult(
-                    item_id=f"{selected_type}_{i+1}",
-                    item_type=selected_type,
-                    title=f"Recommended {selected_type.title()} #{i+1}",
-                    score=round(random.uniform(0.7, 0.99), 2),
-                    reason=self._generate_reason(selected_type, preferences)
-                )
+        started = time.perf_counter()
+        results = [
+            RecommendationResult(
+                item_id=item["item_id"],
+                item_type=item["item_type"],
+                title=item["title"],
+                score=round(item["score"], 4),
+                reason=self._generate_reason(item["reason"], item["item_type"])
             )
-        
-        return sorted(recommendations, key=lambda x: x.score, reverse=True)
+            for item in ranked
+        ]
+        timings["materialize"] = (time.perf_counter() - started) * 1000
+        return results, timings
     
     async def get_similar_items(
         self, 
         item_id: str, 
         item_type: str, 
-        limit: int = 5
+        limit: int = 5,
+        exclude_ids: Optional[list[str]] = None
     ) -> list[RecommendationResult]:
-        """Get items similar to a given item."""
-        recommendations = []
+        """
+        Get items similar to a given item.
         
-        for i in range(limit):
-            recommendations.append(
-                RecommendationResult(
-                    item_id=f"similar_{item_type}_{i+1}",
-                    item_type=item_type,
-                    title=f"Similar {item_type.title()} #{i+1}",
-                    score=round(random.uniform(0.6, 0.95), 2),
-                    reason=f"Similar to {item_id} based on content and engagement"
-                )
+        Neighbours are precomputed from content embeddings (see
+        /embeddings/encode), so items that were never embedded, or not yet
+        reached by the background build, have none.
+        """
+        neighbors = similar_items_index.similar((item_type, item_id), limit, exclude_ids or ())
+        return [
+            RecommendationResult(
+                item_id=neighbor_id,
+                item_type=neighbor_type,
+                title=title,
+                score=round(score, 4),
+                reason=f"Similar to {item_id} based on content"
             )
-        
-        return sorted(recommendations, key=lambda x: x.score, reverse=True)
+            for (neighbor_type, neighbor_id), title, score in neighbors
+        ]
     
     async def get_trending(
         self, 
@@ -91,64 +103,62 @@ class RecommendationService:
         category: Optional[str] = None,
         limit: int = 10
     ) -> list[RecommendationResult]:
-        """Get trending items in the community."""
-        recommendations = []
-        
-        item_types = [item_type] if item_type else ["post", "product", "video", "event"]
-        
-        for i in range(limit):
-            selected_type = item_types[i % len(item_types)]
-            recommendations.append(
-                RecommendationResult(
-                    item_id=f"trending_{selected_type}_{i+1}",
-                    item_type=selected_type,
-                    title=f"Trending {selected_type.title()} #{i+1}",
-                    score=round(random.uniform(0.8, 0.99), 2),
-                    reason="High engagement in the last 24 hours"
-                )
+        """Get trending items in the community, ranked by decayed engagement."""
+        items = trending_engine.trending(item_type, category, limit)
+        reason = f"Trending in {category}" if category else "High engagement in the last few hours"
+        return [
+            RecommendationResult(
+                item_id=item["item_id"],
+                item_type=item["item_type"],
+                title=item["title"],
+                score=round(item["score"], 4),
+                reason=reason
             )
-        
-        return sorted(recommendations, key=lambda x: x.score, reverse=True)
+            for item in items
+        ]
     
     async def update_user_preferences(
         self, 
         user_id: str, 
         interests: Optional[list[str]] = None,
         viewed_item: Optional[str] = None,
-        liked_item: Optional[str] = None
+        liked_item: Optional[str] = None,
+        purchased_item: Optional[str] = None,
+        location: Optional[str] = None
     ) -> UserPreferences:
         """Update user preferences for better recommendations."""
-        if user_id not in self._user_profiles:
-            self._user_profiles[user_id] = UserPreferences(user_id=user_id)
-        
-        prefs = self._user_profiles[user_id]
-        
-        if interests:
-            prefs.interests = list(set(prefs.interests + interests))
-        if viewed_item:
-            prefs.viewed_items.append(viewed_item)
-            prefs.viewed_items = prefs.viewed_items[-100:]  # Keep last 100
-        if liked_item:
-            prefs.liked_items.append(liked_item)
-        
-        return prefs
+        profile = await self.profiles.update(
+            user_id, interests, viewed_item, liked_item, purchased_item, location
+        )
+        return self._to_preferences(profile)
     
-    def _generate_reason(self, item_type: str, prefs: UserPreferences) -> str:
-        """Generate recommendation reason."""
+    @staticmethod
+    def _to_preferences(profile: Profile) -> UserPreferences:
+        return UserPreferences(
+            user_id=profile.user_id,
+            interests=list(profile.interests),
+            viewed_items=list(profile.viewed_items),
+            liked_items=list(profile.liked_items),
+            purchased_items=list(profile.purchased_items),
+            location=profile.location
+        )
+    
+    def _generate_reason(self, signal: str, item_type: str) -> str:
+        """Generate recommendation reason from the feature that contributed most."""
+        if signal.startswith("category:"):
+            return f"Related to your interest in {signal.split(':', 1)[1]}"
+        if signal == "similarity":
+            return "Similar to items you liked"
+        
         reasons = {
-            "post": "Based on your community activity",
-            "product": "Matches your browsing history",
+            "post": "Popular in the community right now",
+            "product": "Popular with buyers right now",
             "event": "Popular in your area",
-            "group": "Similar to groups you've joined",
-            "guide": "Related to your interests",
+            "group": "Active in the community right now",
+            "guide": "Trending with other drivers",
             "video": "Trending in your feed",
-            "podcast": "Based on your listening history"
+            "podcast": "Trending with listeners"
         }
-        
-        if prefs.interests:
-            return f"Related to your interest in {prefs.interests[0]}"
-        
         return reasons.get(item_type, "Recommended for you")
 
-
 recommendation_service = RecommendationService()
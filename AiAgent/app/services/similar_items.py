@@ -0,0 +1,267 @@
+"""Precomputed item-item similarity for similar-item recommendations."""
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.vector_index import VectorIndex
+from app.db import SessionLocal
+from app.db.models import ModelEmbedding
+from app.services.embeddings import EmbeddingService, embedding_service
+
+ItemKey = tuple[str, str]  # (entity_type, entity_id)
+
+
+class SimilarItemsIndex:
+    """
+    Keep the top `neighbors` most similar items of the same type for every item.
+
+    Neighbour lists are stored as two fixed-width arrays (item numbers and
+    cosine scores, one row per item, best first), so answering a query is a
+    dictionary lookup and a slice. The lists are computed from the embedding
+    index by a background job every `refresh_interval` seconds, which only
+    recomputes items whose embedding changed since its last run: each changed
+    item is dropped from the lists that held its old embedding, gets a fresh
+    list, and is inserted into its new neighbours' lists where it beats their
+    weakest entry.
+    """
+
+    def __init__(
+        self,
+        embeddings: EmbeddingService = embedding_service,
+        session_factory: Callable[[], Session] = SessionLocal,
+        neighbors: int = 20,
+        refresh_interval: int = 60,
+        chunk_size: int = 256
+    ):
+        self.embeddings = embeddings
+        self.session_factory = session_factory
+        self.neighbors = neighbors
+        self.refresh_interval = refresh_interval
+        self.chunk_size = chunk_size
+
+        self._ids: dict[ItemKey, int] = {}
+        self._keys: list[ItemKey] = []
+        self._by_entity_id: dict[str, list[int]] = {}
+        self._titles: list[str] = []
+        self._neighbor_ids = np.full((0, neighbors), -1, dtype=np.int32)
+        self._neighbor_scores = np.zeros((0, neighbors), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self._pending: dict[ItemKey, str] = {}
+        self._removed: set[int] = set()
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self._lookups = 0
+        self._refreshes = 0
+        self._updated = 0
+        self._last_refresh_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _item_id(self, key: ItemKey, title: Optional[str] = None) -> int:
+        """Number an item, growing the neighbour arrays as needed. Caller holds the lock."""
+        item = self._ids.get(key)
+        if item is None:
+            item = len(self._keys)
+            self._ids[key] = item
+            self._keys.append(key)
+            self._by_entity_id.setdefault(key[1], []).append(item)
+            self._titles.append("")
+            if item >= len(self._neighbor_ids):
+                capacity = max(1024, 2 * len(self._neighbor_ids))
+                ids = np.full((capacity, self.neighbors), -1, dtype=np.int32)
+                scores = np.zeros((capacity, self.neighbors), dtype=np.float32)
+                ids[:item] = self._neighbor_ids[:item]
+                scores[:item] = self._neighbor_scores[:item]
+                self._neighbor_ids, self._neighbor_scores = ids, scores
+        if title:
+            self._titles[item] = title
+        return item
+
+    def _insert(self, item: int, neighbor: int, score: float):
+        """Put `neighbor` into `item`'s list if it ranks. Caller holds the lock."""
+        ids, scores = self._neighbor_ids[item], self._neighbor_scores[item]
+        present = np.flatnonzero(ids == neighbor)
+        if present.size:
+            scores[present[0]] = score
+        elif ids[-1] < 0 or score > scores[-1]:
+            ids[-1], scores[-1] = neighbor, score
+        else:
+            return
+        order = np.argsort(np.where(ids >= 0, -scores, np.inf), kind="stable")
+        ids[:] = ids[order]
+        scores[:] = scores[order]
+
+    def update(self, index: VectorIndex, items: Iterable[ItemKey], titles: Optional[dict[ItemKey, str]] = None):
+        """Recompute the neighbours of changed items from a vector index (blocking)."""
+        titles = titles or {}
+        by_type: dict[str, list[ItemKey]] = {}
+        for key in items:
+            if key in index:
+                by_type.setdefault(key[0], []).append(key)
+        changed = {key for keys in by_type.values() for key in keys}
+
+        with self._lock:
+            stale = [self._ids[key] for key in changed if key in self._ids]
+            if stale:
+                # Scores against the old embeddings are wrong now; drop them everywhere
+                # and let the lists below re-add the changed items where they still rank
+                ids = self._neighbor_ids[:len(self._keys)]
+                held = np.isin(ids, stale)
+                holders = np.flatnonzero(held.any(axis=1))
+                ids[held] = -1
+                self._neighbor_scores[:len(self._keys)][held] = 0.0
+                # Entries stay sorted; a stable sort moves the holes to the end
+                order = np.argsort(self._neighbor_ids[holders] < 0, axis=1, kind="stable")
+                self._neighbor_ids[holders] = np.take_along_axis(self._neighbor_ids[holders], order, axis=1)
+                self._neighbor_scores[holders] = np.take_along_axis(self._neighbor_scores[holders], order, axis=1)
+
+        for entity_type, keys in by_type.items():
+            for start in range(0, len(keys), self.chunk_size):
+                chunk = keys[start:start + self.chunk_size]
+                queries = np.stack([index.get(key) for key in chunk])
+                # One extra result because every item finds itself
+                results = index.search(queries, self.neighbors + 1, entity_type)
+                with self._lock:
+                    for key, hits in zip(chunk, results):
+                        item = self._item_id(key, titles.get(key))
+                        self._removed.discard(item)
+                        found = [
+                            (self._item_id(hit[:2], titles.get(hit[:2])), hit[2])
+                            for hit in hits if hit[:2] != key
+                        ][:self.neighbors]
+                        self._neighbor_ids[item] = -1
+                        self._neighbor_scores[item] = 0.0
+                        if found:
+                            neighbors, scores = zip(*found)
+                            self._neighbor_ids[item, :len(found)] = neighbors
+                            self._neighbor_scores[item, :len(found)] = scores
+                        # Changed items get exact lists of their own; only unchanged ones need patching
+                        for neighbor, score in found:
+                            if self._keys[neighbor] not in changed:
+                                self._insert(neighbor, item, score)
+                self._updated += len(chunk)
+
+    def refresh(self) -> int:
+        """Update items whose embeddings changed since the last refresh (blocking)."""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            index = self.embeddings.get_index()
+            if index is None:
+                return 0
+
+            # Items written before their vectors reached the embedding index are retried
+            titles: dict[ItemKey, str] = dict(self._pending)
+            watermark = self._watermark
+            db = self.session_factory()
+            try:
+                query = db.query(
+                    ModelEmbedding.entity_type,
+                    ModelEmbedding.entity_id,
+                    ModelEmbedding.content_preview,
+                    ModelEmbedding.updated_at
+                ).filter(ModelEmbedding.embedding_model == settings.model_name)
+                if watermark is not None:
+                    query = query.filter(ModelEmbedding.updated_at > watermark)
+                for row in query.yield_per(1000):
+                    titles[(row.entity_type, row.entity_id)] = (row.content_preview or "")[:120]
+                    if row.updated_at is not None:
+                        watermark = max(watermark or row.updated_at, row.updated_at)
+            except Exception:
+                return 0
+            finally:
+                db.close()
+
+            self.update(index, titles, titles)
+            self._pending = {key: title for key, title in titles.items() if key not in index}
+            self._watermark = watermark
+            self._refreshes += 1
+            self._last_refresh_ms = (time.perf_counter() - started) * 1000
+            return len(titles)
+
+    def remove(self, keys: Iterable[ItemKey]):
+        """Forget deleted items; they are skipped in other items' lists from now on."""
+        with self._lock:
+            for key in keys:
+                item = self._ids.get(key)
+                if item is not None:
+                    self._neighbor_ids[item] = -1
+                    self._removed.add(item)
+
+    def similar(self, key: ItemKey, limit: int = 5, exclude_ids: Iterable[str] = ()) -> list[tuple[ItemKey, str, float]]:
+        """Precomputed neighbours of an item as (key, title, score), best first."""
+        self._lookups += 1
+        exclude = set(exclude_ids)
+        with self._lock:
+            item = self._ids.get(key)
+            if item is None:
+                return []
+            results = []
+            for neighbor, score in zip(self._neighbor_ids[item], self._neighbor_scores[item]):
+                if neighbor < 0 or len(results) >= limit:
+                    break
+                neighbor_key = self._keys[neighbor]
+                if neighbor_key[1] not in exclude and neighbor not in self._removed:
+                    results.append((neighbor_key, self._titles[neighbor], float(score)))
+            return results
+
+    def keys_for(self, item_ids: Iterable[str]) -> list[ItemKey]:
+        """Resolve bare entity ids (e.g. from a user's history) to known item keys."""
+        with self._lock:
+            return [
+                self._keys[item]
+                for item_id in item_ids
+                for item in self._by_entity_id.get(item_id, ())
+                if item not in self._removed
+            ]
+
+    def start(self):
+        """Start the refresh loop on the running event loop (at application startup)."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """Refresh neighbour lists periodically."""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                pass
+            await asyncio.sleep(self.refresh_interval)
+
+    async def close(self):
+        """Stop the refresh loop."""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def get_metrics(self) -> dict:
+        """Get index size and refresh metrics."""
+        return {
+            "items": len(self),
+            "neighbors": self.neighbors,
+            "size_mb": round(len(self) * self.neighbors * 8 / 1024 / 1024, 2),
+            "lookups": self._lookups,
+            "refreshes": self._refreshes,
+            "updated_items": self._updated,
+            "last_refresh_ms": round(self._last_refresh_ms, 1),
+        }
+
+
+similar_items_index = SimilarItemsIndex(
+    neighbors=settings.similar_items_neighbors,
+    refresh_interval=settings.similar_items_refresh_interval
+)
@@ -0,0 +1,170 @@
+"""Persistent sentence-level translation memory."""
+import hashlib
+import threading
+from typing import Callable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.db.models import TranslationMemoryEntry
+
+
+class TranslationMemory:
+    """
+    Reuse earlier translations of identical sentences.
+
+    Entries are keyed by (source, target, route, SHA-256 of the
+    whitespace-normalized sentence), where the route names the models that
+    produced the translation, so direct, pivot and multilingual results are
+    kept apart and a model change starts a fresh set of entries. Lookups
+    accept any of a pair's current routes, preferring the cheapest. They are
+    stored in the application database, so they survive
+    restarts and are shared by every worker using the same database. The
+    table is capped at `max_entries`; the least recently used rows are
+    pruned every `prune_interval` inserts.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 max_entries: int = 100000, prune_interval: int = 500):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._inserts_since_prune = 0
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._stored = 0
+
+    @staticmethod
+    def normalize(sentence: str) -> str:
+        """Collapse whitespace so formatting differences share an entry."""
+        return " ".join(sentence.split())
+
+    @staticmethod
+    def _hash(sentence: str) -> str:
+        return hashlib.sha256(sentence.encode("utf-8")).hexdigest()
+
+    def lookup(self, source: str, target: str, routes: list[str], sentences: list[str]) -> dict[str, str]:
+        """
+        Find stored translations for normalized sentences in one query.
+
+        `routes` lists the acceptable routes in order of preference; a sentence
+        stored under several gets the translation of the earliest. Returns a
+        mapping of sentence to translation for the hits only.
+        """
+        if not sentences or not routes:
+            return {}
+        by_hash = {self._hash(s): s for s in sentences}
+        rank = {route: i for i, route in enumerate(routes)}
+        best: dict[str, TranslationMemoryEntry] = {}
+        found: dict[str, str] = {}
+        db = self.session_factory()
+        try:
+            rows = db.query(TranslationMemoryEntry).filter(
+                TranslationMemoryEntry.source_language == source,
+                TranslationMemoryEntry.target_language == target,
+                TranslationMemoryEntry.model_used.in_(routes),
+                TranslationMemoryEntry.sentence_hash.in_(list(by_hash))
+            ).all()
+            for row in rows:
+                sentence = by_hash.get(row.sentence_hash)
+                # Guard against hash collisions
+                if sentence is None or row.source_text != sentence:
+                    continue
+                if sentence not in best or rank[row.model_used] < rank[best[sentence].model_used]:
+                    best[sentence] = row
+            found = {sentence: row.translated_text for sentence, row in best.items()}
+            if best:
+                db.query(TranslationMemoryEntry).filter(
+                    TranslationMemoryEntry.id.in_([row.id for row in best.values()])
+                ).update(
+                    {
+                        TranslationMemoryEntry.hit_count: TranslationMemoryEntry.hit_count + 1,
+                        TranslationMemoryEntry.last_used_at: func.now(),
+                    },
+                    synchronize_session=False
+                )
+                db.commit()
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._hits += len(found)
+            self._misses += len(sentences) - len(found)
+        return found
+
+    def store(self, source: str, target: str, route: str, translations: dict[str, str]):
+        """Save new sentence translations, skipping ones another request stored first."""
+        if not translations:
+            return
+        by_hash = {self._hash(s): (s, t) for s, t in translations.items()}
+        db = self.session_factory()
+        try:
+            existing = {
+                row.sentence_hash for row in db.query(TranslationMemoryEntry.sentence_hash).filter(
+                    TranslationMemoryEntry.source_language == source,
+                    TranslationMemoryEntry.target_language == target,
+                    TranslationMemoryEntry.model_used == route,
+                    TranslationMemoryEntry.sentence_hash.in_(list(by_hash))
+                )
+            }
+            new_entries = [
+                TranslationMemoryEntry(
+                    source_language=source,
+                    target_language=target,
+                    sentence_hash=sentence_hash,
+                    source_text=sentence,
+                    translated_text=translated,
+                    model_used=route
+                )
+                for sentence_hash, (sentence, translated) in by_hash.items()
+                if sentence_hash not in existing
+            ]
+            db.add_all(new_entries)
+            db.commit()
+
+            with self._lock:
+                self._stored += len(new_entries)
+                self._inserts_since_prune += len(new_entries)
+                prune = self._inserts_since_prune >= self.prune_interval
+                if prune:
+                    self._inserts_since_prune = 0
+            if prune:
+                self._prune(db)
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+    def _prune(self, db: Session):
+        """Delete the least recently used rows above the size cap."""
+        total = db.query(func.count(TranslationMemoryEntry.id)).scalar() or 0
+        if total <= self.max_entries:
+            return
+        stale = db.query(TranslationMemoryEntry.id).order_by(
+            TranslationMemoryEntry.last_used_at.asc()
+        ).limit(total - self.max_entries).subquery()
+        db.query(TranslationMemoryEntry).filter(
+            TranslationMemoryEntry.id.in_(stale.select())
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def get_metrics(self) -> dict:
+        """Get sentence hit rate."""
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "stored": self._stored,
+            "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            "max_entries": self.max_entries,
+        }
+
+
+translation_memory = TranslationMemory(max_entries=settings.translation_memory_max_entries)
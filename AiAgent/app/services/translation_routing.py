@@ -0,0 +1,139 @@
+"""Translation route planning across direct, pivot and multilingual models."""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core.config import settings
+from app.core.model_registry import model_registry
+
+DEFAULT_MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "resources", "translation_pairs.json"
+)
+
+
+@dataclass
+class TranslationHop:
+    """One model call within a route."""
+    model: str
+    source: str
+    target: str
+    size_mb: float
+    relative_latency: float
+    prefix: str = ""  # target-language token required by multi-target models
+    pipeline_kwargs: dict = field(default_factory=dict)
+
+
+@dataclass
+class TranslationRoute:
+    kind: str  # "direct", "pivot" or "multilingual"
+    hops: list[TranslationHop]
+    cost: float = 0.0
+
+    @property
+    def models(self) -> list[str]:
+        return [hop.model for hop in self.hops]
+
+
+class TranslationRouter:
+    """
+    Choose how to translate a language pair.
+
+    The manifest lists which direct opus-mt models exist, so no network
+    lookup is needed to know a pair is missing. Each candidate route (direct
+    model, two-hop pivot through English, shared multilingual model) is
+    scored as the memory of the models it would still have to load plus
+    `latency_weight` times its per-sentence latency, so resident models are
+    preferred and the large multilingual model is only loaded when nothing
+    smaller can serve the pair.
+    """
+
+    def __init__(self, manifest_path: str = "", latency_weight: float = 200.0):
+        self.latency_weight = latency_weight
+        with open(manifest_path or DEFAULT_MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.pivot_language: str = manifest.get("pivot_language", "en")
+        pair_model = manifest.get("pair_model", {})
+        self._pair_size = pair_model.get("size_mb", 300)
+        self._pair_latency = pair_model.get("relative_latency", 1.0)
+
+        self.pairs: dict[str, dict] = {}
+        for pair, entry in manifest.get("pairs", {}).items():
+            if isinstance(entry, str):
+                entry = {"model": entry}
+            self.pairs[pair] = entry
+            model_registry.register(entry["model"], self._loader(entry["model"]))
+
+        self.multilingual: dict = manifest.get("multilingual", {})
+        if self.multilingual:
+            model_registry.register(self.multilingual["model"], self._loader(self.multilingual["model"]))
+
+    @staticmethod
+    def _loader(model_name: str):
+        def load():
+            from transformers import pipeline
+            return pipeline("translation", model=model_name)
+        return load
+
+    def _direct_hop(self, source: str, target: str) -> Optional[TranslationHop]:
+        entry = self.pairs.get(f"{source}-{target}")
+        if entry is None:
+            return None
+        return TranslationHop(
+            model=entry["model"],
+            source=source,
+            target=target,
+            size_mb=entry.get("size_mb", self._pair_size),
+            relative_latency=entry.get("relative_latency", self._pair_latency),
+            prefix=entry.get("prefix", "")
+        )
+
+    def _multilingual_hop(self, source: str, target: str) -> Optional[TranslationHop]:
+        codes = self.multilingual.get("language_codes", {})
+        if source not in codes or target not in codes:
+            return None
+        return TranslationHop(
+            model=self.multilingual["model"],
+            source=source,
+            target=target,
+            size_mb=self.multilingual.get("size_mb", 2450),
+            relative_latency=self.multilingual.get("relative_latency", 6.0),
+            pipeline_kwargs={"src_lang": codes[source], "tgt_lang": codes[target]}
+        )
+
+    def _cost(self, hops: list[TranslationHop]) -> float:
+        load_mb = sum(
+            hop.size_mb for hop in {hop.model: hop for hop in hops}.values()
+            if not model_registry.is_loaded(hop.model)
+        )
+        return load_mb + self.latency_weight * sum(hop.relative_latency for hop in hops)
+
+    def routes(self, source: str, target: str) -> list[TranslationRoute]:
+        """All usable routes for a pair, cheapest first."""
+        candidates = []
+
+        direct = self._direct_hop(source, target)
+        if direct:
+            candidates.append(TranslationRoute("direct", [direct]))
+
+        pivot = self.pivot_language
+        if pivot not in (source, target):
+            first = self._direct_hop(source, pivot)
+            second = self._direct_hop(pivot, target)
+            if first and second:
+                candidates.append(TranslationRoute("pivot", [first, second]))
+
+        multilingual = self._multilingual_hop(source, target)
+        if multilingual:
+            candidates.append(TranslationRoute("multilingual", [multilingual]))
+
+        for route in candidates:
+            route.cost = self._cost(route.hops)
+        return sorted(candidates, key=lambda route: route.cost)
+
+
+translation_router = TranslationRouter(
+    manifest_path=settings.translation_pairs_path,
+    latency_weight=settings.translation_route_latency_weight
+)
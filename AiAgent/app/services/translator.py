@@ -1,8 +1,16 @@
 """Translation Service."""
-from transformers import pipeline, AutoModelForSeq2SeqLM, AutoTokenizer
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import re
+from app.core.batching import BatchScheduler
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.core.inference import QueueFullError
+from app.core.language_id import language_identifier
+from app.core.model_registry import model_registry
+from app.services.translation_memory import translation_memory
+from app.services.translation_routing import TranslationRoute, translation_router
 
 
 class TranslationResult(BaseModel):
@@ -36,33 +44,18 @@ class TranslatorService:
         "he": "Hebrew",
     }
     
+    DETECTOR_VERSION = "ngram-1"
+    
     def __init__(self):
-        self._translation_pipelines: dict[str, any] = {}
-        self._language_detector = None
+        self._batchers: dict[str, BatchScheduler] = {}
     
-    def _get_translation_pipeline(self, source: str, target: str):
-        """Get or create translation pipeline for language pair."""
-        key = f"{source}-{target}"
-        
-        if key not in self._translation_pipelines:
-            try:
-                # Use Helsinki-NLP models for translation
-                model_name = f"Helsinki-NLP/opus-mt-{source}-{target}"
-                self._translation_pipelines[key] = pipeline(
-                    "translation",
-                    model=model_name
-                )
-            except Exception:
-                # Fallback to multilingual model
-                try:
-                    self._translation_pipelines[key] = pipeline(
-                        "translation",
-                        model="facebook/mbart-large-50-many-to-many-mmt"
-                    )
-                except Exception:
-                    self._translation_pipelines[key] = None
-        
-        return self._translation_pipelines.get(key)
+    def _get_route(self, source: str, target: str) -> Optional[tuple[TranslationRoute, list]]:
+        """Load the cheapest route whose models are all available (blocking)."""
+        for route in translation_router.routes(source, target):
+            pipelines = [model_registry.get(model) for model in route.models]
+            if all(p is not None for p in pipelines):
+                return route, pipelines
+        return None
     
     async def translate(self, text: str, source_language: str, 
                         target_language: str) -> TranslationResult:
@@ -83,29 +76,21 @@ class TranslatorService:
                 confidence=1.0
             )
         
-        pipeline_model = self._get_translation_pipeline(source_language, target_language)
+        try:
+            translated_text = await self._translate_text(text, source_language, target_language)
+        except QueueFullError:
+            raise
+        except Exception:
+            translated_text = None
         
-        if pipeline_model:
-            try:
-                # Split long text into chunks
-                chunks = self._split_text(text, max_length=500)
-                translated_chunks = []
-                
-                for chunk in chunks:
-                    result = pipeline_model(chunk, max_length=512)
-                    translated_chunks.append(result[0]["translation_text"])
-                
-                translated_text = " ".join(translated_chunks)
-                
-                return TranslationResult(
-                    source_text=text,
-                    translated_text=translated_text,
-                    source_language=source_language,
-                    target_language=target_language,
-                    confidence=0.85
-                )
-            except Exception as e:
-                pass
+        if translated_text is not None:
+            return TranslationResult(
+                source_text=text,
+                translated_text=translated_text,
+                source_language=source_language,
+                target_language=target_language,
+                confidence=0.85
+            )
         
         # Fallback: return original with low confidence
         return TranslationResult(
@@ -116,83 +101,141 @@ class TranslatorService:
             confidence=0.0
         )
     
+    async def translate_batch(self, texts: list[str], source_language: str,
+                              target_language: str) -> list[TranslationResult]:
+        """Translate many documents; their sentences share model batches."""
+        return list(await asyncio.gather(*(
+            self.translate(text, source_language, target_language) for text in texts
+        )))
+    
+    async def _translate_text(self, text: str, source: str, target: str) -> Optional[str]:
+        """
+        Translate text sentence by sentence. Returns None if no model is available.
+        
+        Sentences found in the translation memory under any of the pair's
+        routes are reused; the remaining distinct sentences are queued on the
+        language pair's batch scheduler, where they share forward passes with
+        other documents and requests. Line breaks and the whitespace between
+        sentences are kept.
+        """
+        pieces = self._split_sentences(text)
+        sentences = [translation_memory.normalize(s) for s in pieces[::2]]
+        if not any(sentences):
+            return text
+        
+        unique = list(dict.fromkeys(s for s in sentences if s))
+        known = {}
+        if settings.translation_memory_enabled:
+            # A sentence may have been served by a fallback route when the
+            # preferred models failed to load; its translation is still reusable
+            routes = ["+".join(route.models) for route in translation_router.routes(source, target)]
+            known = await asyncio.to_thread(translation_memory.lookup, source, target, routes, unique)
+        misses = [s for s in unique if s not in known]
+        
+        if misses:
+            batcher = self._get_batcher(source, target)
+            translated = await asyncio.gather(*(batcher.submit(s) for s in misses))
+            if any(t is None for t in translated):
+                return None
+            known.update(zip(misses, translated))
+        
+        pieces[::2] = [known[s] if s else piece for s, piece in zip(sentences, pieces[::2])]
+        return "".join(pieces)
+    
+    def _get_batcher(self, source: str, target: str) -> BatchScheduler:
+        """Get the batch scheduler for a language pair."""
+        pair = f"{source}-{target}"
+        batcher = self._batchers.get(pair)
+        if batcher is None:
+            batcher = BatchScheduler(
+                "translation",
+                lambda sentences: self._translate_batch_sync(sentences, source, target),
+                max_batch_size=settings.translation_batch_max_sentences,
+                max_wait_ms=settings.translation_batch_wait_ms,
+                max_queue_size=settings.translation_queue_size
+            )
+            self._batchers[pair] = batcher
+        return batcher
+    
+    def _translate_batch_sync(self, sentences: list[str], source: str,
+                              target: str) -> list[Optional[str]]:
+        """
+        Translate a batch of sentences along the cheapest route (blocking).
+        
+        Distinct sentences are sorted by length so each padded forward pass
+        holds similar lengths, then returned in input order and saved to the
+        translation memory.
+        """
+        loaded = self._get_route(source, target)
+        if not loaded:
+            return [None] * len(sentences)
+        route, pipelines = loaded
+        
+        # Documents in one batch often share sentences; translate each once
+        unique = sorted(set(sentences), key=len)
+        texts = unique
+        for hop, pipeline_model in zip(route.hops, pipelines):
+            results = pipeline_model(
+                [hop.prefix + text for text in texts],
+                batch_size=settings.translation_batch_size,
+                max_length=512,
+                **hop.pipeline_kwargs
+            )
+            texts = [r["translation_text"] for r in results]
+        translations = dict(zip(unique, texts))
+        
+        if settings.translation_memory_enabled:
+            translation_memory.store(source, target, "+".join(route.models), translations)
+        return [translations[s] for s in sentences]
+    
     async def detect_language(self, text: str) -> LanguageDetectionResult:
         """Detect the language of text."""
-        # Simple heuristic-based detection
-        detected = self._detect_language_heuristic(text)
-        
-        return LanguageDetectionResult(
-            text=text[:100] + "..." if len(text) > 100 else text,
-            detected_language=detected,
-            confidence=0.7
-        )
+        return (await self.detect_language_batch([text]))[0]
     
-    def _detect_language_heuristic(self, text: str) -> str:
-        """Simple language detection based on character patterns."""
-        # Check for specific scripts
-        if re.search(r'[\u4e00-\u9fff]', text):
-            return "zh"
-        if re.search(r'[\u3040-\u309f\u30a0-\u30ff]', text):
-            return "ja"
-        if re.search(r'[\uac00-\ud7af]', text):
-            return "ko"
-        if re.search(r'[\u0600-\u06ff]', text):
-            return "ar"
-        if re.search(r'[\u0590-\u05ff]', text):
-            return "he"
-        if re.search(r'[\u0400-\u04ff]', text):
-            return "ru"
-        
-        # For Latin scripts, use common word detection
-        text_lower = text.lower()
-        
-        spanish_words = {"el", "la", "de", "que", "es", "en", "un", "por", "con"}
-        french_words = {"le", "la", "de", "et", "est", "un", "une", "que", "pour"}
-        german_words = {"der", "die", "und", "ist", "ein", "eine", "nicht", "mit"}
-        italian_words = {"il", "la", "di", "che", "è", "un", "una", "per", "con"}
-        portuguese_words = {"o", "a", "de", "que", "é", "um", "uma", "para", "com"}
-        
-        words = set(text_lower.split())
-        
-        scores = {
-            "es": len(words & spanish_words),
-            "fr": len(words & french_words),
-            "de": len(words & german_words),
-            "it": len(words & italian_words),
-            "pt": len(words & portuguese_words),
-        }
-        
-        max_score = max(scores.values())
-        if max_score >= 2:
-            return max(scores, key=scores.get)
-        
-        return "en"  # Default to English
+    async def detect_language_batch(self, texts: list[str]) -> list[LanguageDetectionResult]:
+        """Detect the language of many texts, scoring cache misses in one pass."""
+        keys = [result_cache.make_key("language", self.DETECTOR_VERSION, text) for text in texts]
+        detected = [result_cache.get(key) for key in keys]
+        
+        misses = [i for i, value in enumerate(detected) if value is None]
+        if misses:
+            predictions = language_identifier.detect_batch([texts[i] for i in misses])
+            for i, prediction in zip(misses, predictions):
+                detected[i] = {"language": prediction.language, "confidence": prediction.confidence}
+                result_cache.set(keys[i], detected[i])
+        
+        return [
+            LanguageDetectionResult(
+                text=text[:100] + "..." if len(text) > 100 else text,
+                detected_language=value["language"],
+                confidence=value["confidence"]
+            )
+            for text, value in zip(texts, detected)
+        ]
     
-    def _split_text(self, text: str, max_length: int = 500) -> list[str]:
-        """Split text into chunks for translation."""
-        if len(text) <= max_length:
-            return [text]
-        
-        chunks = []
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_length:
-                current_chunk += " " + sentence if current_chunk else sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks
+    def _split_sentences(self, text: str) -> list[str]:
+        """
+        Split text into sentences, the unit of translation and reuse.
+        
+        Returns [sentence, separator, sentence, ..., sentence], where the
+        separators are the whitespace after sentence ends, line breaks and
+        leading or trailing whitespace, so joining the pieces restores the text.
+        Sentences may be empty (e.g. before a leading separator).
+        """
+        return re.split(r'(^\s+|\s*\n\s*|(?<=[.!?])\s+|\s+$)', text)
     
     def get_supported_languages(self) -> dict[str, str]:
         """Get list of supported languages."""
         return self.SUPPORTED_LANGUAGES.copy()
+    
+    def get_metrics(self) -> dict:
+        """Get translation batching metrics per language pair."""
+        return {pair: batcher.get_metrics() for pair, batcher in self._batchers.items()}
+    
+    async def close(self):
+        """Stop background batching."""
+        for batcher in self._batchers.values():
+            await batcher.close()
 
 
 translator_service = TranslatorService()
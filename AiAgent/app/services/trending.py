@@ -0,0 +1,382 @@
+"""Trending items from time-decayed engagement counts."""
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+ALL = "*"
+
+
+class CountMinSketch:
+    """
+    Approximate counts for an unbounded set of keys in `depth` x `width` cells.
+
+    Each key is hashed to one cell per row; adding adds to all of them and
+    the estimate is the smallest, so collisions can only overestimate.
+    Hashes come from BLAKE2b rather than `hash()`, so they are stable across
+    restarts and a saved table stays valid.
+    """
+
+    def __init__(self, width: int = 16384, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def cells(self, keys: list[str]) -> np.ndarray:
+        """Column of each key in each row, shape (len(keys), depth)."""
+        digests = b"".join(
+            hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest() for key in keys
+        )
+        return np.frombuffer(digests, dtype=np.uint32).reshape(len(keys), self.depth) % self.width
+
+    def add(self, cells: np.ndarray, amounts: np.ndarray):
+        """Add `amounts` to the keys at `cells`."""
+        np.add.at(self.table, (np.broadcast_to(self._rows, cells.shape), cells), amounts[:, None])
+
+    def estimate(self, cells: np.ndarray) -> np.ndarray:
+        return self.table[self._rows, cells].min(axis=1)
+
+
+class TopK:
+    """The `k` keys with the highest scores, with O(log k) updates."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def _min(self) -> tuple[float, str]:
+        """Lowest current entry, dropping outdated heap entries on the way."""
+        while self._heap[0][1] not in self.scores or self.scores[self._heap[0][1]] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def offer(self, key: str, score: float):
+        """Track `key` at `score` if it ranks among the top k."""
+        if key not in self.scores and len(self.scores) >= self.k:
+            lowest_score, lowest = self._min()
+            if score <= lowest_score:
+                return
+            del self.scores[lowest]
+        self.scores[key] = score
+        heapq.heappush(self._heap, (score, key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(s, key) for key, s in self.scores.items()]
+            heapq.heapify(self._heap)
+
+    def scale(self, factor: float):
+        """Multiply every score; order is unchanged."""
+        self.scores = {key: score * factor for key, score in self.scores.items()}
+        self._heap = [(s, key) for key, s in self.scores.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, limit: int) -> list[tuple[str, float]]:
+        return heapq.nlargest(limit, self.scores.items(), key=lambda item: item[1])
+
+
+class TrendingEngine:
+    """
+    Rank items and categories by exponentially decayed engagement.
+
+    Every event adds its weight (a purchase counts more than a view) to a
+    Count-Min sketch keyed by item and by category, and the updated estimate
+    is offered to a top-k list for each scope: all items, the item's type,
+    its category, and its type within its category. Scores decay with a
+    half-life of `half_life_hours`. Decay is applied "forward": an event at
+    time t is stored as weight * e^((t - landmark) / tau), so stored scores
+    never need to be touched as time passes and rankings stay valid. When
+    the multiplier grows large, everything is rescaled to a new landmark.
+    State is snapshotted to `snapshot_path` periodically and on shutdown.
+    """
+
+    def __init__(
+        self,
+        half_life_hours: float = 6.0,
+        width: int = 16384,
+        depth: int = 4,
+        top_k: int = 200,
+        weights: Optional[dict[str, float]] = None,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: int = 60
+    ):
+        self.tau = half_life_hours * 3600 / math.log(2)
+        self.top_k = top_k
+        self.weights = weights or {"view": 1.0}
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+
+        self.sketch = CountMinSketch(width, depth)
+        self._landmark = time.time()
+        self._items: dict[str, TopK] = {}
+        self._categories = TopK(top_k)
+        self._titles: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._loaded = snapshot_path is None
+        self._dirty = False
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._events = 0
+        self._rejected = 0
+        self._snapshots = 0
+
+    @staticmethod
+    def item_key(item_type: str, item_id: str) -> str:
+        return f"{item_type}:{item_id}"
+
+    def _scope(self, item_type: Optional[str], category: Optional[str]) -> str:
+        return f"{item_type or ALL}|{category or ALL}"
+
+    def _decay(self, now: float) -> float:
+        """Multiplier turning stored scores into scores as of `now`."""
+        return math.exp(-(now - self._landmark) / self.tau)
+
+    def _rescale(self, now: float):
+        """Move the landmark to `now` before stored values get too large. Caller holds the lock."""
+        factor = self._decay(now)
+        self.sketch.table *= factor
+        for top in self._items.values():
+            top.scale(factor)
+        self._categories.scale(factor)
+        self._landmark = now
+
+    def ingest(self, events: Iterable[dict]) -> tuple[int, int]:
+        """
+        Add engagement events.
+
+        Args:
+            events: Dicts with `item_id`, `item_type`, `event` (view, like,
+                purchase, bid, ...), optional `category`, `title` and
+                `timestamp` (Unix seconds, default now)
+
+        Returns (accepted, rejected) counts.
+        """
+        self._ensure_loaded()
+        now = time.time()
+        parsed: list[tuple[tuple[str, str, Optional[str]], float, float]] = []
+        titles: dict[str, str] = {}
+        rejected = 0
+        for event in events:
+            name, item_id, item_type = event.get("event"), event.get("item_id"), event.get("item_type")
+            weight = self.weights.get(name) if isinstance(name, str) else None
+            try:
+                timestamp = float(event.get("timestamp") or now)
+            except (TypeError, ValueError):
+                timestamp = math.nan
+            # JSON parsing accepts NaN and Infinity; one would poison the sketch cells it touches
+            if (
+                weight is None or not math.isfinite(timestamp)
+                or not isinstance(item_id, str) or not isinstance(item_type, str) or not item_id or not item_type
+            ):
+                rejected += 1
+                continue
+            timestamp = min(timestamp, now)
+            key = (str(item_type), str(item_id), str(event["category"]) if event.get("category") else None)
+            parsed.append((key, weight, timestamp))
+            if event.get("title"):
+                titles[self.item_key(key[0], key[1])] = str(event["title"])[:200]
+
+        if parsed:
+            with self._lock:
+                if (now - self._landmark) / self.tau > 20:
+                    self._rescale(now)
+                # Forward decay: each event is weighted relative to the landmark
+                totals: dict[tuple[str, str, Optional[str]], float] = {}
+                for key, weight, timestamp in parsed:
+                    totals[key] = totals.get(key, 0.0) + weight * math.exp((timestamp - self._landmark) / self.tau)
+                self._add(totals, titles)
+                self._dirty = True
+        self._events += len(parsed)
+        self._rejected += rejected
+        return len(parsed), rejected
+
+    def _add(self, totals: dict[tuple[str, str, Optional[str]], float], titles: dict[str, str]):
+        """Update the sketch and top-k lists. Caller holds the lock."""
+        items = list(totals)
+        item_keys = [self.item_key(item_type, item_id) for item_type, item_id, _ in items]
+        amounts = np.fromiter(totals.values(), dtype=np.float64, count=len(totals))
+        categories: dict[str, float] = {}
+        for (_, _, category), amount in zip(items, amounts):
+            if category:
+                categories[category] = categories.get(category, 0.0) + amount
+
+        category_keys = [f"category:{category}" for category in categories]
+        cells = self.sketch.cells(item_keys + category_keys)
+        self.sketch.add(cells, np.concatenate([amounts, np.fromiter(categories.values(), dtype=np.float64)]))
+        estimates = self.sketch.estimate(cells).tolist()
+
+        for (item_type, _, category), key, score in zip(items, item_keys, estimates):
+            scopes = {self._scope(None, None), self._scope(item_type, None)}
+            if category:
+                scopes |= {self._scope(None, category), self._scope(item_type, category)}
+            for scope in scopes:
+                top = self._items.get(scope)
+                if top is None:
+                    top = self._items[scope] = TopK(self.top_k)
+                top.offer(key, score)
+        for category, score in zip(categories, estimates[len(items):]):
+            self._categories.offer(category, score)
+
+        self._titles.update(titles)
+        if len(self._titles) > 4 * self.top_k * max(1, len(self._items)):
+            self._prune_titles()
+
+    def _prune_titles(self):
+        """Forget titles of items no longer in any top-k list. Caller holds the lock."""
+        tracked = set().union(*(top.scores for top in self._items.values()))
+        self._titles = {key: title for key, title in self._titles.items() if key in tracked}
+
+    def trending(
+        self,
+        item_type: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 10
+    ) -> list[dict]:
+        """Top items in a scope with their current decayed scores."""
+        self._ensure_loaded()
+        with self._lock:
+            top = self._items.get(self._scope(item_type, category))
+            if top is None:
+                return []
+            decay = self._decay(time.time())
+            results = []
+            for key, score in top.top(limit):
+                found_type, item_id = key.split(":", 1)
+                results.append({
+                    "item_id": item_id,
+                    "item_type": found_type,
+                    "title": self._titles.get(key, ""),
+                    "score": score * decay,
+                })
+            return results
+
+    def trending_categories(self, limit: int = 10) -> list[dict]:
+        """Categories with the most decayed engagement."""
+        self._ensure_loaded()
+        with self._lock:
+            decay = self._decay(time.time())
+            return [
+                {"category": category, "score": score * decay}
+                for category, score in self._categories.top(limit)
+            ]
+
+    def save_snapshot(self):
+        """Write the sketch and top-k lists to `snapshot_path` (blocking)."""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._prune_titles()
+            state = {
+                "landmark": self._landmark,
+                "tau": self.tau,
+                "items": {scope: top.scores for scope, top in self._items.items()},
+                "categories": self._categories.scores,
+                "titles": self._titles,
+            }
+            table = self.sketch.table.copy()
+            self._dirty = False
+
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.snapshot_path + ".tmp", "wb") as f:
+            np.savez(f, sketch=table, state=np.array(json.dumps(state)))
+        os.replace(self.snapshot_path + ".tmp", self.snapshot_path)
+        self._snapshots += 1
+
+    def _ensure_loaded(self):
+        """Restore the last snapshot on first use (blocking)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with np.load(self.snapshot_path) as snapshot:
+                    table = snapshot["sketch"]
+                    state = json.loads(str(snapshot["state"]))
+            except (OSError, ValueError, KeyError):
+                return
+            # A snapshot taken with other sketch dimensions or half-life cannot be reused
+            if table.shape != self.sketch.table.shape or not math.isclose(state["tau"], self.tau):
+                return
+            self.sketch.table = table
+            self._landmark = state["landmark"]
+            for scope, scores in state["items"].items():
+                top = self._items[scope] = TopK(self.top_k)
+                for key, score in scores.items():
+                    top.offer(key, score)
+            for category, score in state["categories"].items():
+                self._categories.offer(category, score)
+            self._titles = state["titles"]
+
+    def _ensure_worker(self):
+        """Start the snapshot loop on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Snapshot periodically while there are new events."""
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await asyncio.to_thread(self.save_snapshot)
+            except Exception:
+                pass
+
+    async def ingest_async(self, events: list[dict]) -> tuple[int, int]:
+        """Ingest off the event loop and keep the snapshot loop running."""
+        self._ensure_worker()
+        return await asyncio.to_thread(self.ingest, events)
+
+    async def close(self):
+        """Stop the snapshot loop and write a final snapshot."""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        try:
+            await asyncio.to_thread(self.save_snapshot)
+        except Exception:
+            pass
+
+    def get_metrics(self) -> dict:
+        """Get ingestion and sketch metrics."""
+        return {
+            "events": self._events,
+            "rejected": self._rejected,
+            "scopes": len(self._items),
+            "tracked_items": sum(len(top.scores) for top in self._items.values()),
+            "sketch_mb": round(self.sketch.table.nbytes / 1024 / 1024, 2),
+            "snapshots": self._snapshots,
+        }
+
+
+trending_engine = TrendingEngine(
+    half_life_hours=settings.trending_half_life_hours,
+    width=settings.trending_sketch_width,
+    depth=settings.trending_sketch_depth,
+    top_k=settings.trending_top_k,
+    weights=settings.trending_event_weights,
+    snapshot_path=settings.trending_snapshot_path or None,
+    snapshot_interval=settings.trending_snapshot_interval
+)
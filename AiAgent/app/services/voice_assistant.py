@@ -5,6 +5,9 @@ import base64
 import io
 import wave
 import struct
+from app.core.config import settings
+from app.core.inference import QueueFullError, inference_executor
+from app.core.model_registry import model_registry
 
 
 class SpeechToTextResult(BaseModel):
@@ -41,42 +44,18 @@ class VoiceAssistantService:
     }
     
     def __init__(self):
-        self._stt_model = None
-        self._tts_model = None
-        self._stt_loaded = False
-        self._tts_loaded = False
+        model_registry.register(settings.whisper_model, self._load_stt_model)
+        model_registry.register(settings.tts_model, self._load_tts_model)
     
     def _load_stt_model(self):
         """Load speech-to-text model."""
-        if self._stt_loaded:
-            return
-        
-        try:
-            from transformers import pipeline
-            self._stt_model = pipeline(
-                "automatic-speech-recognition",
-                model="openai/whisper-tiny"  # Small model for demo
-            )
-            self._stt_loaded = True
-        except Exception:
-            self._stt_model = None
-            self._stt_loaded = True
+        from transformers import pipeline
+        return pipeline("automatic-speech-recognition", model=settings.whisper_model)
     
     def _load_tts_model(self):
         """Load text-to-speech model."""
-        if self._tts_loaded:
-            return
-        
-        try:
-            from transformers import pipeline
-            self._tts_model = pipeline(
-                "text-to-speech",
-                model="microsoft/speecht5_tts"
-            )
-            self._tts_loaded = True
-        except Exception:
-            self._tts_model = None
-            self._tts_loaded = True
+        from transformers import pipeline
+        return pipeline("text-to-speech", model=settings.tts_model)
     
     async def speech_to_text(
         self, 
@@ -90,23 +69,20 @@ class VoiceAssistantService:
             audio_data: Audio bytes (WAV, MP3, etc.)
             language: Expected language code
         """
-        self._load_stt_model()
+        try:
+            text = await inference_executor.run("stt", self._transcribe_sync, audio_data)
+        except QueueFullError:
+            raise
+        except Exception:
+            text = None
         
-        if self._stt_model:
-            try:
-                # Process audio
-                result = self._stt_model(audio_data)
-                
-                text = result.get("text", "")
-                
-                return SpeechToTextResult(
-                    text=text,
-                    language=language,
-                    confidence=0.85,
-                    duration_seconds=self._estimate_duration(audio_data)
-                )
-            except Exception as e:
-                pass
+        if text is not None:
+            return SpeechToTextResult(
+                text=text,
+                language=language,
+                confidence=0.85,
+                duration_seconds=self._estimate_duration(audio_data)
+            )
         
         # Fallback response
         return SpeechToTextResult(
@@ -130,31 +106,21 @@ class VoiceAssistantService:
             language: Language code
             voice: Voice style (default, male, female)
         """
-        self._load_tts_model()
+        try:
+            synthesized = await inference_executor.run("tts", self._synthesize_sync, text)
+        except QueueFullError:
+            raise
+        except Exception:
+            synthesized = None
         
-        if self._tts_model:
-            try:
-                # Generate speech
-                result = self._tts_model(text)
-                
-                # Convert to base64
-                audio_array = result["audio"]
-                sampling_rate = result.get("sampling_rate", 16000)
-                
-                # Create WAV file
-                wav_bytes = self._array_to_wav(audio_array, sampling_rate)
-                audio_base64 = base64.b64encode(wav_bytes).decode()
-                
-                duration = len(audio_array) / sampling_rate
-                
-                return TextToSpeechResult(
-                    audio_base64=audio_base64,
-                    audio_format="wav",
-                    duration_seconds=duration,
-                    text_spoken=text
-                )
-            except Exception as e:
-                pass
+        if synthesized is not None:
+            wav_bytes, duration = synthesized
+            return TextToSpeechResult(
+                audio_base64=base64.b64encode(wav_bytes).decode(),
+                audio_format="wav",
+                duration_seconds=duration,
+                text_spoken=text
+            )
         
         # Fallback: Generate simple beep or silence
         wav_bytes = self._generate_silence(1.0)
@@ -167,6 +133,28 @@ class VoiceAssistantService:
             text_spoken=text
         )
     
+    def _transcribe_sync(self, audio_data: bytes) -> Optional[str]:
+        """Run speech recognition (blocking). Returns None if no model is available."""
+        stt_model = model_registry.get(settings.whisper_model)
+        if not stt_model:
+            return None
+        
+        result = stt_model(audio_data)
+        return result.get("text", "")
+    
+    def _synthesize_sync(self, text: str) -> Optional[tuple[bytes, float]]:
+        """Run speech synthesis (blocking). Returns WAV bytes and duration, or None."""
+        tts_model = model_registry.get(settings.tts_model)
+        if not tts_model:
+            return None
+        
+        result = tts_model(text)
+        audio_array = result["audio"]
+        sampling_rate = result.get("sampling_rate", 16000)
+        
+        wav_bytes = self._array_to_wav(audio_array, sampling_rate)
+        return wav_bytes, len(audio_array) / sampling_rate
+    
     async def voice_chat(
         self, 
         audio_data: bytes,
@@ -190,11 +178,11 @@ class VoiceAssistantService:
                 "audio_response": None
             }
         
-        # Process with assistant (import here to avoid circular)
-        from app.agents.assistant import CommunityAssistant
-        assistant = CommunityAssistant()
+        # Process with the shared assistant so history carries across turns
+        # (import here to avoid circular)
+        from app.agents.assistant import community_assistant
         
-        chat_response = await assistant.chat(
+        chat_response = await community_assistant.chat(
             stt_result.text, 
             conversation_id, 
             user_id
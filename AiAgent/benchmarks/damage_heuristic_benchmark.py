@@ -0,0 +1,87 @@
+"""
+Damage heuristic benchmark.
+
+Runs the no-model fallback on synthetic paint panels (shading, sensor noise
+and a reflection band) with one injected scratch, dent or rust patch each,
+plus clean panels. Reports latency at the decode sizes the service uses,
+how often the damage is found (a returned box overlaps it), and boxes that
+overlap nothing.
+
+Run with: python -m benchmarks.damage_heuristic_benchmark
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.damage_heuristics import find_damage_regions
+
+KINDS = ["clean", "scratch", "dent", "rust"]
+
+
+def build_panel(rng: np.random.Generator, height: int, width: int, kind: str):
+    """A synthetic panel and the normalized box of its damage (None when clean)."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    shade = 0.75 + 0.35 * y / height + 0.1 * np.sin(x / width * 3 + rng.uniform(0, 6))
+    band = np.exp(-((y - rng.uniform(0.2, 0.8) * height) / (height * 0.06)) ** 2) * 60
+    pixels = rng.uniform(40, 200, 3) * shade[..., None] + band[..., None] + rng.normal(0, 4, (height, width, 3))
+
+    cy, cx = rng.uniform(0.2, 0.8) * height, rng.uniform(0.2, 0.8) * width
+    if kind == "scratch":
+        angle, half_length = rng.uniform(0, np.pi), width * 0.15
+        across = np.abs((x - cx) * np.sin(angle) - (y - cy) * np.cos(angle))
+        along = (x - cx) * np.cos(angle) + (y - cy) * np.sin(angle)
+        pixels[(across < 1.5) & (np.abs(along) < half_length)] = 230
+        extent = (abs(np.cos(angle)) * half_length + 2, abs(np.sin(angle)) * half_length + 2)
+    elif kind == "dent":
+        radius = height * 0.08
+        falloff = np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * radius ** 2))
+        pixels += ((x - cx) / radius * falloff * 60)[..., None]
+        extent = (2 * radius, 2 * radius)
+    elif kind == "rust":
+        radius = height * 0.06
+        patch = (x - cx) ** 2 + (y - cy) ** 2 < radius ** 2
+        pixels[patch] = np.array([140, 70, 30]) + rng.normal(0, 25, (int(patch.sum()), 3))
+        extent = (radius, radius)
+    else:
+        extent = None
+
+    box = None if extent is None else [
+        (cx - extent[0]) / width, (cy - extent[1]) / height, (cx + extent[0]) / width, (cy + extent[1]) / height
+    ]
+    return np.clip(pixels, 0, 255).astype(np.uint8), box
+
+
+def overlaps(a: list[float], b: list[float]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=50, help="Panels per kind")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 768], help="Decoded shorter sides")
+    parser.add_argument("--working-size", type=int, default=192)
+    parser.add_argument("--threshold", type=float, default=4.0)
+    args = parser.parse_args()
+
+    print(f"{'decode':>8}{'kind':>9}{'found':>8}{'stray/img':>11}{'p50 ms':>9}{'p95 ms':>9}")
+    for size in args.sizes:
+        rng = np.random.default_rng(0)
+        for kind in KINDS:
+            found = stray = 0
+            latencies = []
+            for _ in range(args.images):
+                pixels, box = build_panel(rng, size, size * 4 // 3, kind)
+                started = time.perf_counter()
+                regions = find_damage_regions(pixels, args.working_size, args.threshold)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits = [region for region in regions if box and overlaps(region["bbox"], box)]
+                found += bool(hits)
+                stray += len(regions) - len(hits)
+            found_text = "-" if kind == "clean" else f"{found / args.images:.0%}"
+            print(f"{size:>8}{kind:>9}{found_text:>8}{stray / args.images:>11.2f}"
+                  f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Damage upload benchmark.
+
+Compares peak memory and decode time for a batch of large JPEG uploads
+handled the old way (read fully, decode at full resolution) and through the
+spooled path (copy to a temp file in chunks, reduced-scale JPEG decode).
+Each mode runs in a fresh process so its peak RSS is measured on its own
+(Linux only, via /proc).
+
+Run with: python -m benchmarks.damage_upload_benchmark
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.core.uploads import spool_upload
+from app.services.damage_detection import _decode_image
+
+
+def build_photo(width: int, height: int, seed: int) -> bytes:
+    """A smooth synthetic photo with noise, so it compresses like a real one."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width, y / height, (x + y) / (width + height)], axis=-1) * 200
+    noise = rng.normal(0, 12, size=(height // 8, width // 8, 3)).repeat(8, 0).repeat(8, 1)
+    pixels = np.clip(base + noise[:height, :width], 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def read_fully(paths: list[str], size: int) -> list[np.ndarray]:
+    """The previous path: whole upload in memory, full-resolution decode."""
+    images = []
+    for path in paths:
+        with open(path, "rb") as upload:
+            data = upload.read()
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+        scale = size / min(image.size)
+        image = image.resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+        images.append(np.asarray(image))
+    return images
+
+
+def spooled(paths: list[str], size: int) -> list[np.ndarray]:
+    """The spooled path: chunked copy to a temp file, reduced-scale decode from disk."""
+    images = []
+    for path in paths:
+        with open(path, "rb") as upload:
+            spooled_path, _ = spool_upload(upload, 64 * 1024 * 1024)
+        try:
+            images.append(_decode_image(spooled_path, size))
+        finally:
+            os.unlink(spooled_path)
+    return images
+
+
+def _rss_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        return int(re.search(rf"{field}:\s+(\d+)", status.read()).group(1))
+
+
+def run_mode(mode: str, paths: list[str], size: int, results):
+    # Reset the peak RSS so import-time allocations do not hide the decode peak (Linux)
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    baseline = _rss_kb("VmRSS")
+    started = time.perf_counter()
+    decoded = {"read_fully": read_fully, "spooled": spooled}[mode](paths, size)
+    elapsed = time.perf_counter() - started
+    results.put((mode, elapsed, (_rss_kb("VmHWM") - baseline) / 1024, decoded[0].shape))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.images):
+            path = os.path.join(directory, f"photo-{i}.jpg")
+            with open(path, "wb") as photo:
+                photo.write(build_photo(args.width, args.height, i))
+            paths.append(path)
+        total_mb = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+        print(f"{args.images} JPEGs of {args.width}x{args.height}, {total_mb:.1f} MB total\n")
+
+        print(f"{'mode':>12}{'total ms':>10}{'ms/image':>10}{'peak RSS MB':>13}{'output':>16}")
+        context = multiprocessing.get_context("spawn")
+        for mode in ["read_fully", "spooled"]:
+            results = context.Queue()
+            process = context.Process(target=run_mode, args=(mode, paths, args.size, results))
+            process.start()
+            mode, elapsed, peak_mb, shape = results.get()
+            process.join()
+            print(f"{mode:>12}{elapsed * 1000:>10.0f}{elapsed * 1000 / args.images:>10.1f}"
+                  f"{peak_mb:>13.1f}{'x'.join(map(str, shape)):>16}")
+
+
+if __name__ == "__main__":
+    main()
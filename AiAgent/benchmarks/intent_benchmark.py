@@ -0,0 +1,77 @@
+"""
+Intent matching benchmark.
+
+Compares IntentIndex against the previous per-intent substring loops as the
+number of intents grows.
+
+Run with: python -m benchmarks.intent_benchmark
+"""
+import argparse
+import random
+import string
+import time
+
+from app.core.intents import IntentIndex
+
+
+def legacy_match(intents: dict[str, list[str]], text: str) -> list[str]:
+    """The previous approach: lowercase, then `any(kw in text)` for every intent."""
+    text_lower = text.lower()
+    return [intent for intent, keywords in intents.items() if any(kw in text_lower for kw in keywords)]
+
+
+def _random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+def build_intents(count: int, terms_per_intent: int, rng: random.Random) -> dict[str, list[str]]:
+    return {
+        f"intent_{i}": [_random_word(rng) for _ in range(terms_per_intent)]
+        for i in range(count)
+    }
+
+
+def build_messages(count: int, intents: dict[str, list[str]], rng: random.Random) -> list[str]:
+    """Chat-sized messages, each mentioning one or two known terms."""
+    vocabulary = [_random_word(rng) for _ in range(2000)]
+    terms = [term for keywords in intents.values() for term in keywords]
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(8, 30))]
+        for _ in range(rng.randint(1, 2)):
+            words.insert(rng.randrange(len(words)), rng.choice(terms))
+        messages.append(" ".join(words))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--terms-per-intent", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'intents':>8}{'legacy us/msg':>16}{'index us/msg':>16}{'speedup':>10}")
+    for intent_count in [10, 100, 500, 1000]:
+        rng = random.Random(args.seed)
+        intents = build_intents(intent_count, args.terms_per_intent, rng)
+        messages = build_messages(args.messages, intents, rng)
+
+        index = IntentIndex()
+        index.add_all(intents)
+
+        started = time.perf_counter()
+        for message in messages:
+            legacy_match(intents, message)
+        legacy = (time.perf_counter() - started) / len(messages) * 1e6
+
+        started = time.perf_counter()
+        for message in messages:
+            index.match(message)
+        indexed = (time.perf_counter() - started) / len(messages) * 1e6
+
+        print(f"{intent_count:>8}{legacy:>16.1f}{indexed:>16.1f}{legacy / indexed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Language identification accuracy and throughput benchmark.
+
+Compares the n-gram LanguageIdentifier against the previous regex and
+stop-word heuristic on short community-style sentences in every supported
+language.
+
+Run with: python -m benchmarks.language_id_benchmark
+"""
+import argparse
+import re
+import time
+from collections import defaultdict
+
+from app.core.language_id import LanguageIdentifier
+
+SAMPLES = {
+    "en": [
+        "Has anyone tried the new brake pads on a 2015 Civic?",
+        "My car makes a weird noise when I turn left at low speed.",
+        "Thanks for the tip, the battery terminal was loose after all.",
+        "Selling my winter tires, barely used, pickup only.",
+        "Meet at the parking lot near the old mall on Saturday morning.",
+        "Check engine light came on again this morning.",
+        "How often should I change the coolant?",
+        "Great photos from the track day!",
+    ],
+    "es": [
+        "¿Alguien sabe dónde puedo cambiar el aceite barato en la ciudad?",
+        "Mi coche hace un ruido extraño cuando freno en bajada.",
+        "Vendo llantas de invierno casi nuevas, solo recogida en persona.",
+        "Gracias por el consejo, ya funciona el aire acondicionado.",
+        "Nos vemos el sábado en el estacionamiento del centro comercial.",
+        "Se encendió la luz del motor otra vez.",
+        "¿Cada cuánto hay que cambiar el refrigerante?",
+        "Muy buenas fotos del evento de ayer.",
+    ],
+    "fr": [
+        "Quelqu'un connaît un bon garage pas trop cher près de Lyon ?",
+        "Ma voiture fait un bruit bizarre quand je tourne à gauche.",
+        "Je vends mes pneus d'hiver, presque neufs, à récupérer sur place.",
+        "Merci pour le conseil, la batterie était simplement mal branchée.",
+        "Rendez-vous samedi matin sur le parking du centre commercial.",
+        "Le voyant moteur s'est encore allumé ce matin.",
+        "Tous les combien faut-il changer le liquide de refroidissement ?",
+        "Superbes photos de la journée sur circuit !",
+    ],
+    "de": [
+        "Kennt jemand eine gute Werkstatt in der Nähe von München?",
+        "Mein Auto macht ein komisches Geräusch beim Bremsen.",
+        "Verkaufe meine Winterreifen, kaum gefahren, nur Abholung.",
+        "Danke für den Tipp, die Batterie war wirklich locker.",
+        "Treffen wir uns am Samstag auf dem Parkplatz beim Einkaufszentrum.",
+        "Die Motorkontrollleuchte ist schon wieder an.",
+        "Wie oft sollte man das Kühlmittel wechseln?",
+        "Tolle Bilder vom Rennstreckentag!",
+    ],
+    "it": [
+        "Qualcuno conosce un buon meccanico vicino a Milano?",
+        "La mia macchina fa un rumore strano quando freno.",
+        "Vendo gomme invernali quasi nuove, solo ritiro a mano.",
+        "Grazie per il consiglio, la batteria era davvero scollegata.",
+        "Ci vediamo sabato mattina al parcheggio del centro commerciale.",
+        "La spia del motore si è accesa di nuovo stamattina.",
+        "Ogni quanto bisogna cambiare il liquido di raffreddamento?",
+        "Bellissime foto della giornata in pista!",
+    ],
+    "pt": [
+        "Alguém conhece uma boa oficina perto de Lisboa?",
+        "O meu carro faz um barulho estranho quando travo.",
+        "Vendo pneus de inverno quase novos, só para levantar em mão.",
+        "Obrigado pela dica, a bateria estava mesmo solta.",
+        "Encontramo-nos no sábado de manhã no estacionamento do shopping.",
+        "A luz do motor acendeu outra vez hoje de manhã.",
+        "De quanto em quanto tempo devo trocar o líquido de arrefecimento?",
+        "Fotografias fantásticas do dia na pista!",
+    ],
+    "nl": [
+        "Kent iemand een goede garage in de buurt van Utrecht?",
+        "Mijn auto maakt een raar geluid als ik rem.",
+        "Ik verkoop mijn winterbanden, bijna nieuw, alleen ophalen.",
+        "Bedankt voor de tip, de accu zat inderdaad los.",
+        "We zien elkaar zaterdagochtend op de parkeerplaats bij het winkelcentrum.",
+        "Het motorlampje brandt weer sinds vanochtend.",
+        "Hoe vaak moet je de koelvloeistof vervangen?",
+        "Mooie foto's van de circuitdag!",
+    ],
+    "ru": [
+        "Кто-нибудь знает хороший автосервис в Москве?",
+        "Машина странно шумит при торможении.",
+        "Продаю зимние шины, почти новые, только самовывоз.",
+        "Спасибо за совет, клемма аккумулятора действительно болталась.",
+    ],
+    "zh": [
+        "有人知道附近哪里换机油比较便宜吗？",
+        "我的车刹车的时候有奇怪的声音。",
+        "出售几乎全新的冬季轮胎，仅限自提。",
+        "谢谢你的建议，电池接头确实松了。",
+    ],
+    "ja": [
+        "近くで安くオイル交換できるところを知っていますか？",
+        "ブレーキを踏むと車から変な音がします。",
+        "ほぼ新品のスタッドレスタイヤを売ります。",
+        "アドバイスありがとうございます。バッテリーが緩んでいました。",
+    ],
+    "ko": [
+        "근처에 엔진오일 싸게 교환하는 곳 아시는 분 있나요?",
+        "브레이크를 밟을 때 차에서 이상한 소리가 나요.",
+        "거의 새 것인 겨울 타이어 팝니다. 직거래만 가능합니다.",
+        "조언 감사합니다. 배터리 단자가 정말 헐거웠어요.",
+    ],
+    "ar": [
+        "هل يعرف أحد ورشة جيدة قريبة من وسط المدينة؟",
+        "سيارتي تصدر صوتا غريبا عند الضغط على الفرامل.",
+        "أبيع إطارات شتوية شبه جديدة، الاستلام فقط.",
+        "شكرا على النصيحة، كان طرف البطارية مرتخيا فعلا.",
+    ],
+    "he": [
+        "מישהו מכיר מוסך טוב באזור המרכז?",
+        "הרכב שלי משמיע רעש מוזר כשאני בולם.",
+        "מוכר צמיגי חורף כמעט חדשים, איסוף עצמי בלבד.",
+        "תודה על הטיפ, המצבר באמת היה משוחרר.",
+    ],
+}
+
+
+def legacy_detect(text: str) -> str:
+    """The previous heuristic: one regex scan per script, then stop words."""
+    if re.search(r'[\u4e00-\u9fff]', text):
+        return "zh"
+    if re.search(r'[\u3040-\u309f\u30a0-\u30ff]', text):
+        return "ja"
+    if re.search(r'[\uac00-\ud7af]', text):
+        return "ko"
+    if re.search(r'[\u0600-\u06ff]', text):
+        return "ar"
+    if re.search(r'[\u0590-\u05ff]', text):
+        return "he"
+    if re.search(r'[\u0400-\u04ff]', text):
+        return "ru"
+
+    words = set(text.lower().split())
+    scores = {
+        "es": len(words & {"el", "la", "de", "que", "es", "en", "un", "por", "con"}),
+        "fr": len(words & {"le", "la", "de", "et", "est", "un", "une", "que", "pour"}),
+        "de": len(words & {"der", "die", "und", "ist", "ein", "eine", "nicht", "mit"}),
+        "it": len(words & {"il", "la", "di", "che", "è", "un", "una", "per", "con"}),
+        "pt": len(words & {"o", "a", "de", "que", "é", "um", "uma", "para", "com"}),
+    }
+    max_score = max(scores.values())
+    if max_score >= 2:
+        return max(scores, key=scores.get)
+    return "en"
+
+
+def accuracy(predictions: list[str], labels: list[str]) -> tuple[float, dict[str, float]]:
+    correct: dict[str, int] = defaultdict(int)
+    total: dict[str, int] = defaultdict(int)
+    for predicted, label in zip(predictions, labels):
+        total[label] += 1
+        correct[label] += predicted == label
+    overall = sum(correct.values()) / len(labels)
+    return overall, {lang: correct[lang] / total[lang] for lang in total}
+
+
+def throughput(fn, texts: list[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(texts)
+    return len(texts) * repeat / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    identifier = LanguageIdentifier()
+    texts = [text for texts in SAMPLES.values() for text in texts]
+    labels = [lang for lang, texts in SAMPLES.items() for _ in texts]
+
+    legacy_predictions = [legacy_detect(t) for t in texts]
+    ngram_predictions = [p.language for p in identifier.detect_batch(texts)]
+    legacy_overall, legacy_by_lang = accuracy(legacy_predictions, labels)
+    ngram_overall, ngram_by_lang = accuracy(ngram_predictions, labels)
+
+    print(f"Accuracy on {len(texts)} sentences, {len(SAMPLES)} languages")
+    print(f"{'lang':<6}{'legacy':>10}{'n-gram':>10}")
+    for lang in SAMPLES:
+        print(f"{lang:<6}{legacy_by_lang[lang]:>10.0%}{ngram_by_lang[lang]:>10.0%}")
+    print(f"{'all':<6}{legacy_overall:>10.1%}{ngram_overall:>10.1%}")
+
+    legacy_rate = throughput(lambda batch: [legacy_detect(t) for t in batch], texts, args.repeat)
+    single_rate = throughput(lambda batch: [identifier.detect(t) for t in batch], texts, args.repeat)
+    batch_rate = throughput(identifier.detect_batch, texts, args.repeat)
+    print(f"\nThroughput (texts/s): legacy {legacy_rate:,.0f}, "
+          f"n-gram single {single_rate:,.0f}, n-gram batch {batch_rate:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
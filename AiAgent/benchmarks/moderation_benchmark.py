@@ -0,0 +1,144 @@
+"""
+Moderation throughput benchmark.
+
+Compares the compiled single-pass ModerationService against the previous
+per-pattern implementation on a synthetic 10k-word lexicon.
+
+Run with: python -m benchmarks.moderation_benchmark
+"""
+import argparse
+import asyncio
+import random
+import re
+import string
+import time
+
+from app.services.moderation import ModerationService
+
+
+class LegacyModerator:
+    """The previous implementation: one scan per pattern and per check."""
+
+    def __init__(self, lexicon: dict[str, list[str]]):
+        self._profanity_patterns = [
+            re.compile(rf'\b{re.escape(word)}\b', re.IGNORECASE) for word in lexicon["profanity"]
+        ]
+        self._hate = lexicon["hate_speech"]
+        self._violence = lexicon["violence"]
+        self._spam_patterns = [re.compile(p) for p in [
+            r'(?i)buy\s+now',
+            r'(?i)click\s+here',
+            r'(?i)free\s+money',
+            r'(?i)act\s+now',
+            r'(?i)limited\s+time\s+offer',
+            r'(?i)congratulations.*won',
+            r'(?i)earn\s+\$?\d+',
+            r'https?://\S+\s*https?://\S+',
+        ]]
+        self._pii_patterns = [
+            re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+            re.compile(r'\b(?:\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+            re.compile(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b'),
+            re.compile(r'\b(?:\d{4}[-\s]?){3}\d{4}\b'),
+        ]
+
+    def moderate(self, text: str) -> list[str]:
+        flagged = []
+        if any(p.search(text) for p in self._profanity_patterns):
+            flagged.append("profanity")
+
+        spam_score = sum(1 for p in self._spam_patterns if p.search(text))
+        if len(text) > 10 and sum(1 for c in text if c.isupper()) / len(text) > 0.5:
+            spam_score += 1
+        if sum(1 for c in text if c in "!?") > 5:
+            spam_score += 1
+        if spam_score >= 2:
+            flagged.append("spam")
+
+        if any(p.search(text) for p in self._pii_patterns):
+            flagged.append("pii")
+        text_lower = text.lower()
+        if any(w in text_lower for w in self._hate):
+            flagged.append("hate_speech")
+        if any(w in text_lower for w in self._violence):
+            flagged.append("violence")
+        return flagged
+
+
+def _random_word(rng: random.Random, min_len: int = 5, max_len: int = 10) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_len, max_len)))
+
+
+def build_lexicon(size: int, rng: random.Random) -> dict[str, list[str]]:
+    """Split `size` random words across the keyword categories."""
+    words = list({_random_word(rng) for _ in range(size * 2)})[:size]
+    profanity_end = int(size * 0.6)
+    hate_end = int(size * 0.8)
+    return {
+        "profanity": words[:profanity_end],
+        "hate_speech": words[profanity_end:hate_end],
+        "violence": words[hate_end:],
+    }
+
+
+def build_texts(count: int, lexicon: dict[str, list[str]], rng: random.Random) -> list[str]:
+    """Generate comment-sized texts; about one in ten contains a flagged word."""
+    vocabulary = [_random_word(rng, 2, 9) for _ in range(2000)]
+    flagged_words = [w for words in lexicon.values() for w in words]
+    extras = ["Buy now!", "click here", "mail me at joe@example.com", "CALL 555-123-4567", "!!!"]
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(15, 60))]
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), rng.choice(flagged_words))
+        if rng.random() < 0.1:
+            words.append(rng.choice(extras))
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lexicon-size", type=int, default=10_000)
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lexicon = build_lexicon(args.lexicon_size, rng)
+    texts = build_texts(args.texts, lexicon, rng)
+
+    started = time.perf_counter()
+    legacy = LegacyModerator(lexicon)
+    legacy_build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compiled = ModerationService(lexicon=lexicon)
+    compiled_build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    legacy_results = [legacy.moderate(t) for t in texts]
+    legacy_seconds = time.perf_counter() - started
+
+    async def run_compiled():
+        return [(await compiled.moderate(t)).flagged_categories for t in texts]
+
+    started = time.perf_counter()
+    compiled_results = asyncio.run(run_compiled())
+    compiled_seconds = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(legacy_results, compiled_results) if a != b)
+    avg_chars = sum(len(t) for t in texts) / len(texts)
+
+    print(f"Lexicon: {args.lexicon_size} words, texts: {len(texts)} (avg {avg_chars:.0f} chars)")
+    print(f"{'':<10}{'build (s)':>12}{'texts/s':>12}{'ms/text':>12}")
+    for name, build, seconds in [
+        ("legacy", legacy_build, legacy_seconds),
+        ("compiled", compiled_build, compiled_seconds),
+    ]:
+        print(f"{name:<10}{build:>12.3f}{len(texts) / seconds:>12.0f}{seconds / len(texts) * 1000:>12.3f}")
+    print(f"Speedup: {legacy_seconds / compiled_seconds:.1f}x, verdict mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,29 @@ AI-powered services for the CommunityCar platform.
 
 Run with: uvicorn main:app --reload --port 8001
 """
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
 from app.core.config import settings
 from app.api.v1 import api_router
 from app.db import init_db
+from app.agents.conversation_store import conversation_store
+from app.core.cache import result_cache
+from app.core.inference import QueueFullError, inference_executor
+from app.core.model_registry import model_registry
+from app.core.uploads import UploadLimitMiddleware, UploadTooLargeError
+from app.services import (
+    analyzer_service, damage_detection_service, embedding_service, moderation_service, translator_service
+)
+from app.services.similar_items import similar_items_index
+from app.services.translation_memory import translation_memory
+from app.services.trending import trending_engine
+from app.services.profile_store import profile_store
+from app.services.ranking import ranking_pipeline
 
 load_dotenv()
 
@@ -29,7 +44,26 @@ async def lifespan(app: FastAPI):
     
     # Initialize database
     init_db()
+    
+    # Load configured models before serving the first request
+    if settings.model_warmup:
+        await asyncio.to_thread(model_registry.warm_up, settings.model_warmup)
+
+    # Build similar-item lists in the background; requests don't wait for it
+    similar_items_index.start()
     yield
+    
+    # Stop background workers
+    await conversation_store.close()
+    await analyzer_service.close()
+    await translator_service.close()
+    await similar_items_index.close()
+    await trending_engine.close()
+    await profile_store.close()
+    await embedding_service.close()
+    moderation_service.close()
+    damage_detection_service.close()
+    inference_executor.shutdown()
 
 
 app = FastAPI(
@@ -44,6 +78,7 @@ app = FastAPI(
 - **Voice Chat** - Speech-to-text and text-to-speech assistant
 - **Recommendations** - Personalized content and product recommendations
 - **Content Generator** - AI-powered content creation
+- **Embeddings** - Semantic search over community content
 
 ### 🔧 Training
 - **Training** - Dataset management and model fine-tuning
@@ -66,6 +101,7 @@ app = FastAPI(
         {"name": "Voice", "description": "Voice chat - speech-to-text & text-to-speech"},
         {"name": "Recommendations", "description": "Personalized recommendations"},
         {"name": "Content Generator", "description": "AI content creation"},
+        {"name": "Embeddings", "description": "Content embeddings and semantic search"},
         {"name": "Training", "description": "Dataset management and model training"},
         {"name": "Analyzer", "description": "Text and sentiment analysis"},
         {"name": "Moderation", "description": "Content moderation and safety"},
@@ -74,6 +110,16 @@ app = FastAPI(
     ]
 )
 
+# Upload size limits (added first so CORS headers wrap its responses)
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        # One image at the cap plus room for the multipart framing and form fields
+        f"{settings.api_v1_prefix}/damage/": (settings.damage_max_image_mb + 1) * 1024 * 1024,
+        f"{settings.api_v1_prefix}/damage/analyze-multiple": (settings.damage_max_images * settings.damage_max_image_mb + 1) * 1024 * 1024
+    }
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -83,6 +129,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    """Reject work when inference queues are saturated."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(request: Request, exc: UploadTooLargeError):
+    """Reject uploads above their size limit."""
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
@@ -97,6 +159,26 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Inference batching and queue metrics."""
+    return {
+        "sentiment_batching": analyzer_service.get_metrics(),
+        "translation_batching": translator_service.get_metrics(),
+        "inference": inference_executor.get_metrics(),
+        "models": model_registry.get_metrics(),
+        "result_cache": result_cache.get_metrics(),
+        "translation_memory": translation_memory.get_metrics(),
+        "conversations": conversation_store.get_metrics(),
+        "embeddings": embedding_service.get_metrics(),
+        "similar_items": similar_items_index.get_metrics(),
+        "trending": trending_engine.get_metrics(),
+        "profiles": profile_store.get_metrics(),
+        "ranking": ranking_pipeline.get_metrics(),
+        "damage": damage_detection_service.get_metrics()
+    }
+
+
 @app.get("/", tags=["Health"])
 async def root():
     """Root endpoint with API info."""
@@ -106,5 +188,6 @@ async def root():
         "docs": "/docs",
         "redoc": "/redoc",
         "api": settings.api_v1_prefix,
-        "health": "/health"
+        "health": "/health",
+        "metrics": "/metrics"
     }
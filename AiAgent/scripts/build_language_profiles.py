@@ -0,0 +1,94 @@
+"""
+Build the character n-gram profiles used by the language identifier.
+
+The source is the per-language n-gram frequency files of the langdetect
+project (Apache 2.0, built from Wikipedia). Only the build needs them;
+the service reads the compact JSON written here.
+
+Run with:
+    python scripts/build_language_profiles.py --source path/to/langdetect/profiles
+"""
+import argparse
+import json
+import math
+import os
+from collections import defaultdict
+
+# Languages told apart by n-grams; the others are identified by their script
+LATIN_LANGUAGES = ["en", "es", "fr", "de", "it", "pt", "nl"]
+MAX_ORDER = 3
+
+DEFAULT_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "app", "resources", "language_profiles.json"
+)
+
+
+def _is_latin_letter(ch: str) -> bool:
+    return ch.isalpha() and ("a" <= ch <= "z" or 0xC0 <= ord(ch) <= 0x24F)
+
+
+def load_profile(path: str) -> dict[str, float]:
+    """Read one langdetect profile as lowercased n-gram log-probabilities."""
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+
+    totals = profile["n_words"]
+    counts: dict[str, int] = defaultdict(int)
+    for gram, count in profile["freq"].items():
+        gram = gram.lower()
+        if not gram.strip() or len(gram) > MAX_ORDER:
+            continue
+        if not all(ch == " " or _is_latin_letter(ch) for ch in gram):
+            continue
+        counts[gram] += count
+
+    return {
+        gram: math.log(count / totals[len(gram) - 1])
+        for gram, count in counts.items()
+    }
+
+
+def build(source: str) -> dict:
+    profiles = {lang: load_profile(os.path.join(source, lang)) for lang in LATIN_LANGUAGES}
+
+    # Unseen n-grams score slightly below the rarest kept n-gram of their length
+    floor = {}
+    for order in range(1, MAX_ORDER + 1):
+        rarest = min(
+            logprob for profile in profiles.values()
+            for gram, logprob in profile.items() if len(gram) == order
+        )
+        floor[str(order)] = round(rarest - math.log(2), 2)
+
+    alphabet = sorted({ch for profile in profiles.values() for gram in profile for ch in gram} - {" "})
+    return {
+        "version": 1,
+        "source": "langdetect profiles (Apache 2.0), lowercased",
+        "max_order": MAX_ORDER,
+        "alphabet": "".join(alphabet),
+        "floor": floor,
+        "profiles": {
+            lang: {gram: round(logprob, 2) for gram, logprob in sorted(profile.items())}
+            for lang, profile in profiles.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", required=True, help="langdetect profiles directory")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    data = build(args.source)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+
+    grams = sum(len(p) for p in data["profiles"].values())
+    print(f"Wrote {grams} n-grams for {len(data['profiles'])} languages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
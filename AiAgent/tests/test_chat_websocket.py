@@ -0,0 +1,52 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints.agents import router
+
+def _client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def _reply(websocket):
+    events = [websocket.receive_json()]
+    while events[-1]["type"] != "end":
+        events.append(websocket.receive_json())
+    return events
+
+def test_websocket_keeps_conversation_across_messages():
+    with _client().websocket_connect("/chat/ws") as websocket:
+        websocket.send_json({"message": "hello"})
+        first = _reply(websocket)
+        websocket.send_json({"message": "help"})
+        second = _reply(websocket)
+
+    assert first[0]["type"] == "start" and any(event["type"] == "token" for event in first)
+    assert second[0]["conversation_id"] == first[0]["conversation_id"]
+
+def test_new_message_interrupts_reply_and_disconnect_is_clean(monkeypatch, caplog):
+    closed = []
+
+    async def slow_chat(message, conversation_id, user_id):
+        try:
+            yield {"type": "start", "conversation_id": conversation_id or "c1"}
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                yield {"type": "token", "text": message}
+            yield {"type": "end", "conversation_id": conversation_id or "c1"}
+        finally:
+            closed.append(message)
+
+    monkeypatch.setattr("app.api.v1.endpoints.agents.agent.stream_chat", slow_chat)
+    with _client().websocket_connect("/chat/ws") as websocket:
+        websocket.send_json({"message": "first"})
+        websocket.receive_json()
+        websocket.send_json({"message": "second"})
+        event = websocket.receive_json()
+        while event.get("text") == "first":
+            event = websocket.receive_json()
+        assert event == {"type": "start", "conversation_id": "c1"}
+        websocket.receive_json()
+
+    assert closed == ["first", "second"]
+    assert "never retrieved" not in caplog.text
@@ -0,0 +1,35 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.agents.conversation_store import ConversationStore
+from app.db.models import Base
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'conversations.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.mark.asyncio
+async def test_queue_stays_bounded_while_a_flush_runs(session_factory, monkeypatch):
+    store = ConversationStore(session_factory, max_pending=3)
+    write_turns = store._write_turns
+    def slow_write_turns(turns):
+        time.sleep(0.2)
+        return write_turns(turns)
+    monkeypatch.setattr(store, "_write_turns", slow_write_turns)
+    store.start("c1")
+    await store.append("c1", "user", "first")
+
+    flush = asyncio.create_task(store.flush())
+    await asyncio.sleep(0.05)
+    for i in range(5):
+        await store.append("c1", "user", f"turn {i}")
+    assert [turn["content"] for turn in store._pending] == ["turn 2", "turn 3", "turn 4"]
+    await flush
+    await store.close()
+
+    assert store.get_metrics()["dropped"] == 2
+    assert store.get_metrics()["written"] == 4
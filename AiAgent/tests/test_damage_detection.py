@@ -0,0 +1,49 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from app.services.damage_detection import DamageArea, DamageDetectionService
+
+def _area(location, confidence):
+    return DamageArea(location=location, damage_type="dent", severity="moderate",
+                      confidence=confidence, description="Detected: dent")
+
+def _jpeg(width=800, height=600):
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((height, width, 3), 128, dtype=np.uint8)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+def test_merge_keeps_best_view_per_part():
+    merged = DamageDetectionService()._merge_damage_areas([
+        _area("hood", 0.6), _area("hood", 0.9), _area("unspecified", 0.5), _area("unspecified", 0.7)
+    ])
+
+    assert [(a.location, a.confidence) for a in merged] == [("hood", 0.9), ("unspecified", 0.5), ("unspecified", 0.7)]
+    assert merged[0].description.endswith("(seen in 2 photos)")
+
+@pytest.mark.asyncio
+async def test_multiple_images_skip_unreadable_files():
+    service = DamageDetectionService()
+    service._classify_sync = lambda images: None  # model unavailable, whatever is installed
+    result = await service.analyze_multiple_images([(_jpeg(), "hood"), (b"not an image", "trunk")])
+    service.close()
+
+    assert result.image_analyzed
+    assert set(result.timing) == {"decode", "preprocess", "infer", "heuristic", "aggregate"}
+    assert "1 file(s) could not be read" in result.recommendations[-1]
+
+@pytest.mark.asyncio
+async def test_single_image_is_decoded_from_a_file_object(monkeypatch):
+    monkeypatch.setattr("app.services.damage_detection.settings.damage_cache_enabled", False)
+    service = DamageDetectionService()
+    service._classify_sync = lambda images: None
+    result = await service.detect_damage(io.BytesIO(_jpeg()), "hood")
+
+    assert result.image_analyzed and result.timing["decode"] >= 0
+
+def test_tiles_overlap_and_cover_the_image():
+    boxes = DamageDetectionService._tile_boxes(300, 400, 3)
+
+    assert len(boxes) == 9
+    assert boxes[0] == (0, 0, 150, 200) and boxes[-1] == (150, 200, 300, 400)
+    assert boxes[1][1] < boxes[0][3]  # neighbours overlap
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from PIL import Image
+from app.core.damage_heuristics import connected_regions, find_damage_regions
+from app.services.damage_detection import DamageDetectionService
+
+def _panel(seed=0):
+    """A shaded paint panel with a reflection band across it."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:480, 0:640].astype(np.float32)
+    shade = 0.8 + 0.3 * y / 480 + np.exp(-((y - 150) / 30) ** 2) * 0.25
+    paint = np.array([60, 90, 160]) * shade[..., None] + rng.normal(0, 4, (480, 640, 3))
+    return np.clip(paint, 0, 255).astype(np.uint8)
+
+def test_flagged_cells_group_into_connected_regions():
+    mask = np.array([[1, 1, 0], [0, 0, 0], [0, 1, 1]], dtype=bool)
+
+    assert sorted(sorted(region) for region in connected_regions(mask)) == [[(0, 0), (0, 1)], [(2, 1), (2, 2)]]
+    assert len(connected_regions(np.eye(3, dtype=bool))) == 3
+    assert len(connected_regions(np.eye(3, dtype=bool), diagonal=True)) == 1
+
+def test_clean_panel_and_reflection_are_not_flagged():
+    assert find_damage_regions(_panel()) == []
+    assert find_damage_regions(np.full((300, 400, 3), 128, dtype=np.uint8)) == []
+
+def test_scratch_and_rust_are_located():
+    pixels = _panel()
+    pixels[300:303, 100:260] = 235  # scratch
+    pixels[320:380, 450:510] = np.random.default_rng(1).normal([140, 70, 30], 25, (60, 60, 3)).clip(0, 255)
+
+    regions = {region["cue"]: region for region in find_damage_regions(pixels)}
+
+    assert set(regions) == {"edges", "color"}
+    x0, y0, x1, y1 = regions["edges"]["bbox"]
+    assert x0 <= 100 / 640 and x1 >= 260 / 640 and y0 <= 300 / 480 <= y1
+    x0, y0, x1, y1 = regions["color"]["bbox"]
+    assert x0 <= 480 / 640 <= x1 and y0 <= 350 / 480 <= y1
+
+def test_heuristic_fallback_reports_bounded_low_confidence_areas():
+    pixels = _panel()
+    pixels[320:380, 450:510] = np.random.default_rng(1).normal([140, 70, 30], 25, (60, 60, 3)).clip(0, 255)
+
+    areas = DamageDetectionService()._heuristic_analysis(Image.fromarray(pixels), "door")
+
+    assert [(area.location, area.damage_type) for area in areas] == [("door", "rust")]
+    assert 0.3 <= areas[0].confidence <= 0.6
+    assert areas[0].bbox and "bottom right" in areas[0].description
+
+@pytest.mark.asyncio
+async def test_heuristic_does_not_override_the_models_verdict():
+    pixels = _panel()
+    pixels[320:380, 450:510] = np.random.default_rng(1).normal([140, 70, 30], 25, (60, 60, 3)).clip(0, 255)
+    service = DamageDetectionService()
+    service._classify_sync = lambda images: [[{"label": "sports car", "score": 0.9}] for _ in images]
+    timing = {}
+
+    areas = await service._analyze_images([Image.fromarray(pixels)], ["door"], timing)
+
+    assert areas == [[]] and "heuristic" not in timing
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+import numpy as np
+from PIL import Image
+from app.core.image_cache import ImageResultCache, dhash, hamming
+
+def _photo(seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:300, 0:400]
+    base = np.stack([x / 2, y / 1.5, (x + y) / 3], axis=-1)
+    return np.clip(base + rng.normal(0, 40, (300, 400, 3)), 0, 255).astype(np.uint8)
+
+def test_dhash_tolerates_resizing_but_not_different_images():
+    photo = _photo()
+    smaller = np.asarray(Image.fromarray(photo).resize((200, 150)))
+    h = dhash(photo)
+
+    assert hamming(np.array([dhash(smaller)], dtype=np.uint64), h)[0] <= 4
+    assert hamming(np.array([dhash(photo[:, ::-1].copy())], dtype=np.uint64), h)[0] > 10
+
+def test_near_duplicates_hit_within_a_variant(tmp_path):
+    cache = ImageResultCache(str(tmp_path / "cache.db"), max_distance=2)
+    cache.set(0b1011, "model|fast", {"has_damage": True})
+
+    assert cache.get(0b1001, "model|fast") == ({"has_damage": True}, 1)
+    assert cache.get(0b0100, "model|fast") is None
+    assert cache.get(0b1011, "model|high") is None
+    assert cache.get_metrics()["hit_rate"] == round(1 / 3, 4)
+
+def test_persists_and_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ImageResultCache(path, max_entries=10)
+    for i in range(10):
+        cache.set(i << 40, "v", i)
+    cache.get(0, "v")
+    cache.set(1 << 63, "v", "high bit")
+
+    reopened = ImageResultCache(path, max_entries=10)
+    assert reopened.get(0, "v") == (0, 0)
+    assert reopened.get(1 << 63, "v") == ("high bit", 0)
+    assert reopened.get_metrics()["entries"] == 9
+
+def test_restored_entry_hits_after_an_older_one_expires(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.core.image_cache.time", SimpleNamespace(time=lambda: clock[0]))
+    cache = ImageResultCache(str(tmp_path / "cache.db"), ttl=60)
+    cache.set(0b1011, "v", "old")
+    clock[0] += 120
+
+    assert cache.get(0b1011, "v") is None
+    cache.set(0b1011, "v", "new")
+    assert cache.get(0b1011, "v") == ("new", 0)
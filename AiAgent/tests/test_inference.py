@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import pytest
+from app.core.inference import InferenceExecutor, QueueFullError
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_its_slot_until_the_work_finishes():
+    executor = InferenceExecutor(default_concurrency=1, queue_size=0)
+    release = threading.Event()
+    task = asyncio.create_task(executor.run("model", release.wait))
+    await asyncio.sleep(0.05)
+
+    task.cancel()
+    await asyncio.sleep(0.05)
+
+    assert executor.get_metrics()["model"]["in_flight"] == 1
+    with pytest.raises(QueueFullError):
+        await executor.run("model", lambda: None)
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert executor.get_metrics()["model"]["in_flight"] == 0
+    assert await executor.run("model", lambda: 42) == 42
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_shutdown_with_queued_work_returns():
+    executor = InferenceExecutor(default_concurrency=1, queue_size=1)
+    release = threading.Event()
+    running = asyncio.create_task(executor.run("model", release.wait))
+    queued = asyncio.create_task(executor.run("model", lambda: None))
+    await asyncio.sleep(0.05)
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (executor.shutdown(), done.set()), daemon=True).start()
+
+    assert await asyncio.to_thread(done.wait, 5)
+    release.set()
+    await asyncio.gather(running, queued, return_exceptions=True)
+    assert executor.get_metrics() == {}
@@ -0,0 +1,65 @@
+import pytest
+from app.core.text_matching import KeywordAutomaton
+from app.services.moderation import ModerationService
+
+@pytest.fixture
+def service():
+    return ModerationService(lexicon={
+        "profanity": ["badword", "darn it"],
+        "hate_speech": ["hate", "death to"],
+        "violence": ["attack", "bomb"],
+    })
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton()
+    automaton.add_all(["he", "she", "hers"], "words")
+
+    scan = automaton.scan("uSHErs")
+
+    assert sorted(scan.matches["words"]) == [(1, 4), (2, 4), (2, 6)]
+    assert scan.upper_count == 3
+
+def test_automaton_respects_word_boundaries():
+    automaton = KeywordAutomaton()
+    automaton.add("bad", "profanity", whole_word=True)
+
+    assert not automaton.scan("badge").has("profanity")
+    assert automaton.scan("so BAD!").has("profanity")
+
+@pytest.mark.asyncio
+async def test_safe_text(service):
+    result = await service.moderate("Great meetup last weekend, see you all next time.")
+
+    assert result.is_safe
+    assert result.flagged_categories == []
+
+@pytest.mark.asyncio
+async def test_keyword_categories(service):
+    result = await service.moderate("I hate this, darn it, they will attack")
+
+    assert result.flagged_categories == ["profanity", "hate_speech", "violence"]
+
+@pytest.mark.asyncio
+async def test_spam_counts_overlapping_patterns(service):
+    # The greedy "congratulations.*won" match spans "buy now"
+    result = await service.moderate("Congratulations, buy now, you won")
+
+    assert "spam" in result.flagged_categories
+
+@pytest.mark.asyncio
+async def test_spam_caps_and_punctuation(service):
+    result = await service.moderate("THIS IS AMAZING!!!!!!")
+
+    assert result.details["spam"]
+
+@pytest.mark.asyncio
+async def test_pii_hidden_by_spam_match(service):
+    result = await service.moderate("congratulations joe@example.com won")
+
+    assert result.details["pii"]
+
+@pytest.mark.asyncio
+async def test_auto_clean_masks_pii_and_profanity(service):
+    result = await service.moderate("badword, mail joe@example.com", auto_clean=True)
+
+    assert result.cleaned_text == "****, mail [EMAIL_REDACTED]"
@@ -0,0 +1,95 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.models import Base
+from app.services.profile_store import ProfileStore
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiles.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.mark.asyncio
+async def test_ring_buffers_and_ordered_interests(session_factory):
+    store = ProfileStore(session_factory, history_size=3)
+    for item in ["a", "b", "c", "d"]:
+        await store.update("u1", viewed_item=item, liked_item="x")
+    profile = await store.update("u1", interests=["racing", "fuel", "racing"])
+    await store.close()
+
+    assert list(profile.viewed_items) == ["b", "c", "d"]
+    assert list(profile.liked_items) == ["x"]
+    assert list(profile.interests) == ["fuel", "racing"]
+
+@pytest.mark.asyncio
+async def test_updates_are_coalesced_and_survive_restart(session_factory):
+    store = ProfileStore(session_factory)
+    for item in ["a", "b", "c"]:
+        await store.update("u1", viewed_item=item)
+    await store.update("u2", liked_item="p1")
+    await store.close()
+
+    assert store.get_metrics()["flushes"] == 1
+    assert store.get_metrics()["written"] == 2
+
+    restarted = ProfileStore(session_factory)
+    profile = await restarted.get("u1")
+    assert list(profile.viewed_items) == ["a", "b", "c"]
+
+@pytest.mark.asyncio
+async def test_workers_merge_instead_of_overwriting(session_factory):
+    first, second = ProfileStore(session_factory), ProfileStore(session_factory)
+    await first.get("u1")
+    await second.get("u1")
+    await first.update("u1", liked_item="a")
+    await second.update("u1", liked_item="b")
+    await first.close()
+    await second.close()
+
+    profile = await ProfileStore(session_factory).get("u1")
+    assert list(profile.liked_items) == ["a", "b"]
+
+@pytest.mark.asyncio
+async def test_refused_row_is_dropped_without_holding_back_others(session_factory, monkeypatch):
+    store = ProfileStore(session_factory)
+    write_rows = store._write_rows
+    monkeypatch.setattr(store, "_write_rows", lambda deltas: None if "bad" in deltas else write_rows(deltas))
+    await store.update("u1", liked_item="a")
+    await store.update("bad", liked_item="b")
+    await store.close()
+
+    assert store.get_metrics()["written"] == 1 and store.get_metrics()["dropped"] == 1
+    assert list((await ProfileStore(session_factory).get("u1")).liked_items) == ["a"]
+
+@pytest.mark.asyncio
+async def test_ids_and_locations_are_checked_against_the_columns(session_factory):
+    store = ProfileStore(session_factory)
+    with pytest.raises(ValueError):
+        await store.update("u" * 37, liked_item="a")
+    profile = await store.update("u1", location="x" * 150)
+    await store.close()
+
+    assert len(profile.location) == 100
+
+@pytest.mark.asyncio
+async def test_miss_during_a_flush_does_not_apply_committed_updates_twice(session_factory, monkeypatch):
+    store = ProfileStore(session_factory)
+    write_rows = store._write_rows
+    def slow_write_rows(deltas):
+        stored = write_rows(deltas)
+        time.sleep(0.2)  # committed, flush not finished yet
+        return stored
+    monkeypatch.setattr(store, "_write_rows", slow_write_rows)
+    await store.update("u1", viewed_item="a")
+    store._profiles.clear()
+
+    flush = asyncio.create_task(store.flush())
+    await asyncio.sleep(0.1)
+    profile = await store.get("u1")
+    await flush
+    await store.close()
+
+    assert list(profile.viewed_items) == ["a"]
@@ -0,0 +1,52 @@
+from collections import deque
+import numpy as np
+from app.core.vector_index import ExactIndex
+from app.services.profile_store import Profile
+from app.services.ranking import RankingPipeline
+from app.services.similar_items import SimilarItemsIndex
+from app.services.trending import TrendingEngine
+
+WEIGHTS = {"trending": 0.3, "similarity": 1.0, "category": 0.6, "seen": -0.5}
+
+def _pipeline(diversity=0.0):
+    trending = TrendingEngine(half_life_hours=6)
+    trending.ingest(
+        [{"item_id": f"p{i}", "item_type": "post", "event": "view", "category": "racing"}
+         for i in range(5) for _ in range(5 - i)]
+        + [{"item_id": "g1", "item_type": "guide", "event": "view", "category": "maintenance"}]
+    )
+    index = ExactIndex(dim=2)
+    keys = [("product", "liked"), ("product", "twin"), ("product", "far")]
+    index.add(keys, np.array([[1, 0], [1, 0.05], [0, 1]], dtype=np.float32))
+    similar = SimilarItemsIndex(neighbors=2)
+    similar.update(index, keys)
+    return RankingPipeline(trending, similar, WEIGHTS, diversity=diversity)
+
+def _profile(**history):
+    profile = Profile(user_id="u1", interests={}, viewed_items=deque(),
+                      liked_items=deque(), purchased_items=deque())
+    for name, values in history.items():
+        getattr(profile, name).extend(values)
+    return profile
+
+def test_cold_start_returns_trending():
+    results, timings = _pipeline().rank(_profile(), limit=3)
+
+    assert [r["item_id"] for r in results] == ["p0", "p1", "p2"]
+    assert set(timings) == {"candidates", "features", "score", "rerank"}
+
+def test_similar_to_liked_ranks_first_and_liked_is_excluded():
+    results, _ = _pipeline().rank(_profile(liked_items=["liked"]), limit=3)
+
+    assert results[0]["item_id"] == "twin"
+    assert results[0]["reason"] == "similarity"
+    assert "liked" not in {r["item_id"] for r in results}
+
+def test_exclude_ids_seen_penalty_and_diversity():
+    pipeline = _pipeline(diversity=1.0)
+    results, _ = pipeline.rank(_profile(viewed_items=["p1"]), limit=3, exclude_ids=["p0"])
+
+    ids = [r["item_id"] for r in results]
+    assert "p0" not in ids
+    assert ids.index("g1") < 2  # a second post is penalized below the guide
+    assert "p1" not in ids[:2]
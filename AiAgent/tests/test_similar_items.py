@@ -0,0 +1,53 @@
+import numpy as np
+from app.core.vector_index import ExactIndex
+from app.services.similar_items import SimilarItemsIndex
+
+def _vectors():
+    index = ExactIndex(dim=2)
+    index.add(
+        [("product", "a"), ("product", "b"), ("product", "c"), ("post", "d")],
+        np.array([[1, 0], [0.9, 0.3], [0, 1], [1, 0]], dtype=np.float32)
+    )
+    return index
+
+def test_neighbours_are_same_type_and_ranked():
+    index = _vectors()
+    similar = SimilarItemsIndex(neighbors=2)
+    similar.update(index, [("product", "a"), ("product", "b"), ("product", "c"), ("post", "d")])
+
+    neighbours = similar.similar(("product", "a"), limit=5)
+
+    assert [key for key, _, _ in neighbours] == [("product", "b"), ("product", "c")]
+
+def test_exclude_ids():
+    index = _vectors()
+    similar = SimilarItemsIndex(neighbors=2)
+    similar.update(index, [("product", "a"), ("product", "b"), ("product", "c")])
+
+    neighbours = similar.similar(("product", "a"), limit=5, exclude_ids=["b"])
+
+    assert [key for key, _, _ in neighbours] == [("product", "c")]
+
+def test_incremental_update_patches_existing_lists():
+    index = _vectors()
+    similar = SimilarItemsIndex(neighbors=2)
+    similar.update(index, [("product", "a"), ("product", "b"), ("product", "c")])
+
+    index.add([("product", "e")], np.array([[1, 0.01]]))
+    similar.update(index, [("product", "e")])
+
+    assert similar.similar(("product", "a"), limit=1)[0][0] == ("product", "e")
+    assert similar.similar(("product", "e"), limit=1)[0][0] == ("product", "a")
+
+def test_changed_item_leaves_lists_that_held_its_old_embedding():
+    index = _vectors()
+    similar = SimilarItemsIndex(neighbors=1)
+    similar.update(index, [("product", "a"), ("product", "b"), ("product", "c")])
+    assert similar.similar(("product", "a"))[0][0] == ("product", "b")
+
+    # b moves away from a and towards c; a's stored score for b is stale
+    index.add([("product", "b")], np.array([[0, 1]]))
+    similar.update(index, [("product", "b")])
+
+    assert similar.similar(("product", "a")) == []
+    assert similar.similar(("product", "c"))[0][0] == ("product", "b")
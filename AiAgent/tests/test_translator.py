@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.models import Base
+from app.services.translation_memory import TranslationMemory
+from app.services.translator import TranslatorService
+
+class _UpperBatcher:
+    async def submit(self, sentence):
+        return sentence.upper()
+
+@pytest.mark.asyncio
+async def test_translation_keeps_line_breaks_and_spacing(monkeypatch):
+    service = TranslatorService()
+    monkeypatch.setattr(service, "_get_batcher", lambda source, target: _UpperBatcher())
+    monkeypatch.setattr("app.services.translator.settings.translation_memory_enabled", False)
+    text = "Check the oil. Then   the tires.\n\n- brakes\n- lights\n"
+
+    translated = await service._translate_text(text, "en", "de")
+
+    assert translated == "CHECK THE OIL. THEN THE TIRES.\n\n- BRAKES\n- LIGHTS\n"
+
+def test_memory_entries_are_kept_apart_per_route(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'memory.db'}")
+    Base.metadata.create_all(bind=engine)
+    memory = TranslationMemory(session_factory=sessionmaker(bind=engine))
+
+    memory.store("en", "de", "opus-en-de", {"Hello.": "Hallo."})
+    memory.store("en", "de", "mbart", {"Hello.": "Guten Tag."})
+
+    assert memory.lookup("en", "de", ["opus-en-de"], ["Hello."]) == {"Hello.": "Hallo."}
+    assert memory.lookup("en", "de", ["mbart"], ["Hello."]) == {"Hello.": "Guten Tag."}
+    assert memory.lookup("en", "de", ["opus-en-de-v2"], ["Hello."]) == {}
+
+def test_memory_prefers_the_earliest_route_and_falls_back_to_later_ones(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'memory.db'}")
+    Base.metadata.create_all(bind=engine)
+    memory = TranslationMemory(session_factory=sessionmaker(bind=engine))
+    memory.store("en", "de", "opus-en-de", {"Hello.": "Hallo."})
+    memory.store("en", "de", "mbart", {"Hello.": "Guten Tag.", "Bye.": "Tschüss."})
+
+    assert memory.lookup("en", "de", ["opus-en-de", "mbart"], ["Hello.", "Bye."]) == {
+        "Hello.": "Hallo.", "Bye.": "Tschüss."
+    }
@@ -0,0 +1,56 @@
+import time
+from app.services.trending import TrendingEngine
+
+def _engine():
+    return TrendingEngine(half_life_hours=1, weights={"view": 1, "purchase": 10})
+
+def test_weighted_events_rank_first():
+    engine = _engine()
+    now = time.time()
+    engine.ingest(
+        [{"item_id": "a", "item_type": "product", "event": "view", "timestamp": now}] * 5
+        + [{"item_id": "b", "item_type": "product", "event": "purchase", "timestamp": now}]
+    )
+
+    assert [item["item_id"] for item in engine.trending(limit=2)] == ["b", "a"]
+
+def test_old_events_decay():
+    engine = _engine()
+    now = time.time()
+    accepted, rejected = engine.ingest([
+        {"item_id": "old", "item_type": "post", "event": "view", "timestamp": now - 5 * 3600},
+        {"item_id": "new", "item_type": "post", "event": "view", "timestamp": now},
+        {"item_id": "bad", "item_type": "post", "event": "unknown"}
+    ])
+
+    scores = {item["item_id"]: item["score"] for item in engine.trending("post")}
+    assert (accepted, rejected) == (2, 1)
+    assert abs(scores["old"] / scores["new"] - 1 / 32) < 1e-3
+
+def test_scoped_by_category_and_snapshot(tmp_path):
+    path = str(tmp_path / "trending.npz")
+    engine = TrendingEngine(half_life_hours=1, snapshot_path=path)
+    engine.ingest([
+        {"item_id": "a", "item_type": "post", "event": "view", "category": "racing"},
+        {"item_id": "b", "item_type": "post", "event": "view", "category": "maintenance"}
+    ])
+    engine.save_snapshot()
+
+    restored = TrendingEngine(half_life_hours=1, snapshot_path=path)
+    assert [item["item_id"] for item in restored.trending(category="racing")] == ["a"]
+    assert {c["category"] for c in restored.trending_categories()} == {"racing", "maintenance"}
+
+def test_non_finite_timestamps_and_non_string_fields_are_rejected():
+    engine = _engine()
+
+    counts = engine.ingest([
+        {"item_id": "a", "item_type": "product", "event": "view", "timestamp": float("nan")},
+        {"item_id": "a", "item_type": "product", "event": "view", "timestamp": float("inf")},
+        {"item_id": "a", "item_type": "product", "event": ["view"]},
+        {"item_id": ["a"], "item_type": "product", "event": "view"},
+        {"item_id": "a", "item_type": {"t": 1}, "event": "view"},
+        {"item_id": "b", "item_type": "product", "event": "view"},
+    ])
+
+    assert counts == (1, 5)
+    assert [(item["item_id"], item["score"] > 0) for item in engine.trending()] == [("b", True)]
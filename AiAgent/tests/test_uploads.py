@@ -0,0 +1,35 @@
+import io
+import os
+import pytest
+from app.core.uploads import UploadLimitMiddleware, UploadTooLargeError, spool_upload
+
+def test_spool_copies_in_chunks(tmp_path):
+    path, size = spool_upload(io.BytesIO(b"x" * 3_000_000), 5_000_000, str(tmp_path))
+
+    assert size == 3_000_000
+    assert os.path.getsize(path) == size
+
+def test_spool_rejects_oversize_and_cleans_up(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        spool_upload(io.BytesIO(b"x" * 3_000_000), 2_000_000, str(tmp_path))
+
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.asyncio
+async def test_longest_matching_prefix_sets_the_limit():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    middleware = UploadLimitMiddleware(app, {"/damage/": 100, "/damage/analyze-multiple": 1000})
+
+    async def status(path, length):
+        sent = []
+        async def send(message):
+            sent.append(message)
+        scope = {"type": "http", "path": path, "headers": [(b"content-length", str(length).encode())]}
+        await middleware(scope, None, send)
+        return sent[0]["status"]
+
+    assert await status("/damage/analyze", 500) == 413
+    assert await status("/damage/analyze-multiple", 500) == 200
+    assert await status("/other", 5000) == 200
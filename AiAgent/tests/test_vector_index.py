@@ -0,0 +1,81 @@
+import numpy as np
+from app.core.vector_index import ExactIndex, IVFIndex, load_index
+
+def _index():
+    index = ExactIndex(dim=3)
+    index.add(
+        [("post", "a"), ("post", "b"), ("guide", "c")],
+        np.array([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0]], dtype=np.float32)
+    )
+    return index
+
+def test_search_returns_nearest_first():
+    hits = _index().search(np.array([1, 0, 0]), k=2)[0]
+
+    assert [hit[1] for hit in hits] == ["a", "b"]
+    assert hits[0][2] == 1.0
+
+def test_search_filters_by_entity_type():
+    hits = _index().search(np.array([1, 0, 0]), k=5, entity_type="guide")[0]
+
+    assert [hit[1] for hit in hits] == ["c"]
+
+def test_remove_and_overwrite():
+    index = _index()
+    index.remove([("post", "a")])
+    index.add([("guide", "c")], np.array([[1, 0, 0]]))
+
+    hits = index.search(np.array([1, 0, 0]), k=5)[0]
+
+    assert len(index) == 2
+    assert [hit[1] for hit in hits] == ["c", "b"]
+
+def test_save_and_memory_mapped_load(tmp_path):
+    path = str(tmp_path / "index.npy")
+    _index().save(path, {"model": "test"})
+
+    index, meta = ExactIndex.load(path)
+    assert meta == {"model": "test"}
+    assert isinstance(index._vectors, np.memmap)
+
+    index.add([("post", "d")], np.array([[0, 0, 1]]))
+    assert len(index) == 4
+    assert index.search(np.array([0, 0, 1]), k=1)[0][0][1] == "d"
+
+def _ivf(count=2000):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, 8)).astype(np.float32)
+    keys = [("post", str(i)) for i in range(count)]
+    index = IVFIndex(dim=8, nlist=16, nprobe=16, train_threshold=1000)
+    index.add(keys, vectors)
+    return index, keys, vectors
+
+def test_ivf_matches_exact_when_probing_every_list():
+    index, keys, vectors = _ivf()
+    exact = ExactIndex(dim=8)
+    exact.add(keys, vectors)
+
+    assert index.get_metrics()["lists"] == 16
+    assert index.search(vectors[:5], k=5) == exact.search(vectors[:5], k=5)
+
+def test_ivf_tombstones_and_compaction():
+    index, keys, vectors = _ivf()
+    index.remove(keys[:100])
+
+    assert len(index) == 1900
+    assert index.get_metrics()["tombstones"] == 100
+    assert all(hit[1] not in {k[1] for k in keys[:100]} for hit in index.search(vectors[0], k=20)[0])
+
+    index.remove(keys[100:1000])
+    assert index.get_metrics()["tombstones"] == 0
+
+def test_ivf_save_and_load(tmp_path):
+    index, keys, vectors = _ivf()
+    path = str(tmp_path / "ivf.npy")
+    index.remove(keys[:10])
+    index.save(path, {"model": "test"})
+
+    loaded, meta = load_index(path)
+    assert isinstance(loaded, IVFIndex) and meta == {"model": "test"}
+    assert len(loaded) == 1990
+    assert loaded.search(vectors[10:13], k=3) == index.search(vectors[10:13], k=3)